@@ -1,8 +1,11 @@
+import startup
 import tkinter as tk
 import random
+import threading
 import time
-import numpy as np
-import simpleaudio as sa
+
+np = startup.lazy_import("numpy")
+sa = startup.lazy_import("simpleaudio")
 
 NOTE_NAMES = [
     'C4', 'Cs4', 'D4', 'Ds4', 'E4', 'F4', 'Fs4', 'G4', 'Gs4', 'A4', 'As4', 'B4',
@@ -249,6 +252,8 @@ def main():
     root = tk.Tk()
     root.geometry("1000x750")
     app = MainApp(root)
+    # Import audio in the background once the window is up, not before it
+    root.after_idle(lambda: threading.Thread(target=startup.preload, args=("numpy", "simpleaudio"), daemon=True).start())
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+import random
+
+
+class FenwickTree:
+    """Prefix sums over a weight array with O(log n) update and search"""
+
+    def __init__(self, weights):
+        self.n = len(weights)
+        self.weights = list(weights)
+        self.tree = [0.0] * (self.n + 1)
+        for i, w in enumerate(self.weights, start=1):
+            self.tree[i] += w
+            parent = i + (i & -i)
+            if parent <= self.n:
+                self.tree[parent] += self.tree[i]
+        self.top_bit = 1 << (self.n.bit_length() - 1) if self.n else 0
+
+    def set(self, index, weight):
+        delta = weight - self.weights[index]
+        self.weights[index] = weight
+        i = index + 1
+        while i <= self.n:
+            self.tree[i] += delta
+            i += i & -i
+
+    def total(self):
+        total, i = 0.0, self.n
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, target):
+        """Index of the entry whose cumulative weight range contains target"""
+        pos, bit = 0, self.top_bit
+        while bit:
+            nxt = pos + bit
+            if nxt <= self.n and self.tree[nxt] <= target:
+                pos = nxt
+                target -= self.tree[nxt]
+            bit >>= 1
+        # Float rounding can push target past the last entry
+        return min(pos, self.n - 1)
+
+
+class AdaptiveSampler:
+    """Picks (item, root) questions per exercise, favouring ones answered wrongly.
+
+    Every combination has weight (wrong + 1) / (correct + 1), divided by the
+    number of roots its item has so each item starts equally likely however
+    many roots fit it. Recording an answer is one O(log n) tree update.
+    """
+
+    def __init__(self, rng=None):
+        self.rng = rng or random
+        self.exercises = {}
+
+    def register(self, exercise, keys):
+        """Declare the (item, root) combinations an exercise can ask about"""
+        keys = list(keys)
+        roots_per_item = {}
+        for item, _ in keys:
+            roots_per_item[item] = roots_per_item.get(item, 0) + 1
+        share = [1.0 / roots_per_item[item] for item, _ in keys]
+        self.exercises[exercise] = {
+            "keys": keys,
+            "index": {key: i for i, key in enumerate(keys)},
+            "share": share,
+            "correct": [0] * len(keys),
+            "wrong": [0] * len(keys),
+            "tree": FenwickTree(share),
+        }
+
+    def sample(self, exercise):
+        """Draw an (item, root) pair in O(log n)"""
+        ex = self.exercises[exercise]
+        tree = ex["tree"]
+        return ex["keys"][tree.find(self.rng.random() * tree.total())]
+
+    def record(self, exercise, item, root, correct):
+        """Update the weight of one combination after an answer"""
+        ex = self.exercises[exercise]
+        i = ex["index"].get((item, root))
+        if i is None:
+            return
+        if correct:
+            ex["correct"][i] += 1
+        else:
+            ex["wrong"][i] += 1
+        weight = (ex["wrong"][i] + 1) / (ex["correct"][i] + 1) * ex["share"][i]
+        ex["tree"].set(i, weight)
+
+    def restore(self, exercise, item, root, correct, wrong):
+        """Set saved answer counts for one combination, e.g. when resuming a session"""
+        ex = self.exercises.get(exercise)
+        i = ex["index"].get((item, root)) if ex else None
+        if i is None:
+            return
+        ex["correct"][i] = correct
+        ex["wrong"][i] = wrong
+        ex["tree"].set(i, (wrong + 1) / (correct + 1) * ex["share"][i])
+
+    def probability(self, exercise, item, root):
+        ex = self.exercises[exercise]
+        tree = ex["tree"]
+        return tree.weights[ex["index"][(item, root)]] / tree.total()
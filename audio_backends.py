@@ -0,0 +1,443 @@
+"""Audio output backends, picked at runtime by probing what actually works.
+
+Every backend has simpleaudio's play_buffer(data, num_channels,
+bytes_per_sample, sample_rate) signature and returns an object with
+wait_done(), is_playing() and stop(). The module-level play_buffer() sends
+to the current backend, chosen on first use:
+
+    TRAINER_AUDIO=simpleaudio|sounddevice|pygame|null|file[:folder]
+
+forces one; otherwise simpleaudio, sounddevice, then pygame are probed and
+the null sink is the fallback. The null and file sinks record every buffer
+they are given.
+
+stream() plays an iterable of buffers, such as a synth.stream() generator,
+through the backend's open_stream(callback, ...). The backend asks
+callback() for the next buffer only when it needs one, so chunks are
+rendered just ahead of playback. sounddevice pulls from a real device
+callback. pygame queues each chunk behind the one that is playing. Both
+set streams = True. simpleaudio has no streaming API, and opening a device
+per chunk would click between them, so it and the sinks gather every
+chunk and play the whole buffer at once.
+
+    python audio_backends.py      # report which backends work on this machine
+"""
+import os
+import queue
+import sys
+import threading
+import time
+import wave
+from collections import deque, namedtuple
+
+from startup import lazy_import
+
+sa = lazy_import("simpleaudio")
+np = lazy_import("numpy")
+
+BACKEND_ENV = "TRAINER_AUDIO"
+PROBE_ORDER = ["simpleaudio", "sounddevice", "pygame"]
+MAX_RECORDS = 10000  # Buffers a recording sink remembers; older ones are dropped
+MAX_RECORD_BYTES = 32 * 1024 * 1024  # Total audio a recording sink holds on to, whatever the buffer count
+STREAM_QUEUE = 4  # Chunks rendered ahead of a device callback
+SOUNDDEVICE_DTYPES = {1: "uint8", 2: "int16", 4: "int32"}
+
+PlayedBuffer = namedtuple("PlayedBuffer", "time data num_channels bytes_per_sample sample_rate")
+
+
+class FinishedPlayback:
+    """Play object for sinks that consume a buffer immediately"""
+
+    def wait_done(self):
+        pass
+
+    def is_playing(self):
+        return False
+
+    def stop(self):
+        pass
+
+
+class StreamPlayback:
+    """Play object for a stream fed by a background thread running feed(stopped)"""
+
+    def __init__(self, feed):
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=feed, args=(self.stopped,), name="AudioStream", daemon=True)
+        self.thread.start()
+
+    def wait_done(self):
+        self.thread.join()
+
+    def is_playing(self):
+        return self.thread.is_alive()
+
+    def stop(self):
+        self.stopped.set()
+
+
+def play_whole(backend, callback, num_channels, bytes_per_sample, sample_rate):
+    """open_stream for backends without a callback stream: gather every chunk, then play one buffer"""
+    chunks = []
+    chunk = callback()
+    while chunk is not None:
+        chunks.append(bytes(memoryview(chunk).cast("B")))
+        chunk = callback()
+    return backend.play_buffer(b"".join(chunks), num_channels, bytes_per_sample, sample_rate)
+
+
+class SimpleaudioBackend:
+    name = "simpleaudio"
+    streams = False
+
+    def probe(self):
+        # A millisecond of silence proves there is a device to open
+        sa.play_buffer(bytes(88), 1, 2, 44100).stop()
+
+    def play_buffer(self, data, num_channels, bytes_per_sample, sample_rate):
+        return sa.play_buffer(data, num_channels, bytes_per_sample, sample_rate)
+
+    def open_stream(self, callback, num_channels, bytes_per_sample, sample_rate):
+        return play_whole(self, callback, num_channels, bytes_per_sample, sample_rate)
+
+
+class SounddeviceStream:
+    """A device callback stream fed by a render thread through a bounded queue.
+
+    The device callback never renders anything itself: it copies from
+    chunks already in the queue and plays silence on an underrun, so a slow
+    render is a gap rather than a stalled audio thread.
+    """
+
+    def __init__(self, sd, callback, num_channels, bytes_per_sample, sample_rate):
+        self.sd = sd
+        self.callback = callback
+        self.chunks = queue.Queue(maxsize=STREAM_QUEUE)
+        self.pending = b""
+        self.done = threading.Event()
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.stream = sd.RawOutputStream(
+            samplerate=sample_rate, channels=num_channels, dtype=SOUNDDEVICE_DTYPES[bytes_per_sample],
+            callback=self._fill, finished_callback=self.done.set)
+        self.render_thread = threading.Thread(target=self._render, name="AudioStream", daemon=True)
+        self.render_thread.start()
+        self.stream.start()
+
+    def _render(self):
+        while not self.stopped.is_set():
+            chunk = self.callback()
+            self._put(None if chunk is None else bytes(memoryview(chunk).cast("B")))
+            if chunk is None:
+                break
+
+    def _put(self, chunk):
+        while not self.stopped.is_set():
+            try:
+                self.chunks.put(chunk, timeout=0.05)
+                return
+            except queue.Full:
+                pass
+
+    def _fill(self, outdata, frames, time_info, status):
+        need = len(outdata)
+        data = self.pending
+        finished = False
+        while len(data) < need:
+            try:
+                chunk = self.chunks.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is None:
+                finished = True
+                break
+            data += chunk
+        outdata[:min(need, len(data))] = data[:need]
+        if len(data) < need:
+            outdata[len(data):] = bytes(need - len(data))
+        self.pending = data[need:]
+        if finished:
+            raise self.sd.CallbackStop
+
+    def _close(self):
+        with self.lock:
+            if not self.stream.closed:
+                self.stream.close()
+
+    def wait_done(self):
+        while not self.done.wait(0.05):
+            pass
+        self._close()
+
+    def is_playing(self):
+        return not self.done.is_set()
+
+    def stop(self):
+        self.stopped.set()
+        self.stream.stop()
+        self._close()
+        self.done.set()
+
+
+class SounddevicePlayback:
+    """Play object for a whole buffer handed to sd.play()"""
+
+    def __init__(self, sd):
+        self.sd = sd
+        self.stream = sd.get_stream()
+
+    def _current(self):
+        # sd.play() keeps one stream; a later buffer has already replaced this one
+        return self.sd.get_stream() is self.stream
+
+    def wait_done(self):
+        if self._current():
+            self.sd.wait()
+
+    def is_playing(self):
+        return self._current() and self.stream.active
+
+    def stop(self):
+        if self._current():
+            self.sd.stop()
+
+
+class SounddeviceBackend:
+    name = "sounddevice"
+    streams = True
+
+    def __init__(self):
+        self.sd = None
+
+    def probe(self):
+        import sounddevice
+        self.sd = sounddevice
+        self.sd.check_output_settings(channels=1, dtype="int16", samplerate=44100)
+
+    def play_buffer(self, data, num_channels, bytes_per_sample, sample_rate):
+        """Short buffers go to sd.play(); open_stream() is only for real streams"""
+        samples = np.frombuffer(memoryview(data).cast("B"), dtype=SOUNDDEVICE_DTYPES[bytes_per_sample])
+        self.sd.play(samples.reshape(-1, num_channels), sample_rate)
+        return SounddevicePlayback(self.sd)
+
+    def open_stream(self, callback, num_channels, bytes_per_sample, sample_rate):
+        return SounddeviceStream(self.sd, callback, num_channels, bytes_per_sample, sample_rate)
+
+
+class PygamePlayback:
+    def __init__(self, channel):
+        self.channel = channel
+
+    def wait_done(self):
+        while self.is_playing():
+            time.sleep(0.005)
+
+    def is_playing(self):
+        return self.channel is not None and self.channel.get_busy()
+
+    def stop(self):
+        if self.channel is not None:
+            self.channel.stop()
+
+
+class PygameBackend:
+    name = "pygame"
+    streams = True
+
+    def __init__(self):
+        self.pygame = None
+        self.lock = threading.Lock()
+
+    def probe(self):
+        import pygame
+        self.pygame = pygame
+        self._init(44100, 1)
+
+    def _init(self, sample_rate, num_channels):
+        mixer = self.pygame.mixer
+        if mixer.get_init() != (sample_rate, -16, num_channels):
+            # The mixer has one fixed output format; reopen it when buffers change format
+            mixer.quit()
+            mixer.init(frequency=sample_rate, size=-16, channels=num_channels)
+
+    def play_buffer(self, data, num_channels, bytes_per_sample, sample_rate):
+        if bytes_per_sample != 2:
+            raise ValueError("the pygame backend only plays 16-bit audio")
+        with self.lock:
+            self._init(sample_rate, num_channels)
+            sound = self.pygame.mixer.Sound(buffer=bytes(memoryview(data).cast("B")))
+            return PygamePlayback(sound.play())
+
+    def open_stream(self, callback, num_channels, bytes_per_sample, sample_rate):
+        """Queue each chunk on the channel behind the one that is playing"""
+        def feed(stopped):
+            channel = None
+            while not stopped.is_set():
+                chunk = callback()
+                if chunk is None:
+                    break
+                with self.lock:
+                    self._init(sample_rate, num_channels)
+                    sound = self.pygame.mixer.Sound(buffer=bytes(memoryview(chunk).cast("B")))
+                if channel is None:
+                    channel = sound.play()
+                    continue
+                while channel.get_queue() is not None and not stopped.is_set():
+                    time.sleep(0.005)
+                channel.queue(sound)
+            playback = PygamePlayback(channel)
+            playback.stop() if stopped.is_set() else playback.wait_done()
+        return StreamPlayback(feed)
+
+
+class RecordingSink:
+    """Base for sinks that never touch a sound device but keep what they were sent.
+
+    The most recent buffers are kept in played, up to max_records of them
+    and max_bytes of audio in total; count and bytes cover everything.
+    """
+
+    streams = False
+
+    def __init__(self, max_records=MAX_RECORDS, max_bytes=MAX_RECORD_BYTES):
+        self.played = deque()
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.held = 0  # Bytes of audio in played
+        self.count = 0
+        self.bytes = 0
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def probe(self):
+        pass
+
+    def play_buffer(self, data, num_channels, bytes_per_sample, sample_rate):
+        now = time.perf_counter()
+        record = PlayedBuffer(now, bytes(memoryview(data).cast("B")), num_channels, bytes_per_sample, sample_rate)
+        with self.lock:
+            self.played.append(record)
+            self.held += len(record.data)
+            while len(self.played) > self.max_records or (self.held > self.max_bytes and len(self.played) > 1):
+                self.held -= len(self.played.popleft().data)
+            self.count += 1
+            index = self.count
+            self.bytes += len(record.data)
+            listeners = list(self.listeners)
+        self.consume(record, index)
+        for listener in listeners:
+            listener(now)
+        return FinishedPlayback()
+
+    def consume(self, record, index):
+        """Handle the index-th buffer (counting from 1)"""
+
+    def open_stream(self, callback, num_channels, bytes_per_sample, sample_rate):
+        return play_whole(self, callback, num_channels, bytes_per_sample, sample_rate)
+
+    def add_listener(self, callback):
+        """Call callback(timestamp) on the playing thread whenever a buffer arrives"""
+        with self.lock:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self.lock:
+            self.listeners.remove(callback)
+
+    def stats(self):
+        return {"backend": self.name, "buffers": self.count, "bytes": self.bytes}
+
+
+class NullSink(RecordingSink):
+    name = "null"
+
+
+class WavFileSink(RecordingSink):
+    """Writes every buffer to its own numbered .wav file"""
+
+    name = "file"
+
+    def __init__(self, out_dir="played", max_records=MAX_RECORDS, max_bytes=MAX_RECORD_BYTES):
+        super().__init__(max_records, max_bytes)
+        self.out_dir = out_dir
+
+    def probe(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+
+    def consume(self, record, index):
+        path = os.path.join(self.out_dir, f"{index:06d}.wav")
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(record.num_channels)
+            wf.setsampwidth(record.bytes_per_sample)
+            wf.setframerate(record.sample_rate)
+            wf.writeframes(record.data)
+
+
+def make_backend(spec):
+    """Backend for a name like "pygame" or "file:some/folder" (not yet probed)"""
+    name, _, arg = spec.partition(":")
+    if name == "simpleaudio":
+        return SimpleaudioBackend()
+    if name == "sounddevice":
+        return SounddeviceBackend()
+    if name == "pygame":
+        return PygameBackend()
+    if name == "null":
+        return NullSink()
+    if name == "file":
+        return WavFileSink(arg or "played")
+    raise ValueError(f"Unknown audio backend: {spec}")
+
+
+def probe(spec):
+    """Return a working backend for spec, or None with the reason printed"""
+    backend = make_backend(spec)
+    try:
+        backend.probe()
+    except Exception as e:
+        print(f"Audio backend {spec} unavailable: {e}")
+        return None
+    return backend
+
+
+_current = None
+_lock = threading.Lock()
+
+
+def select(spec=None):
+    """Pick the backend to use from now on and return it"""
+    global _current
+    spec = spec or os.environ.get(BACKEND_ENV)
+    with _lock:
+        backend = probe(spec) if spec else None
+        if backend is None:
+            for name in PROBE_ORDER:
+                backend = probe(name)
+                if backend is not None:
+                    break
+            else:
+                print("No sound device found; audio goes to the null sink")
+                backend = NullSink()
+        _current = backend
+    return backend
+
+
+def current():
+    """The active backend, probing for one on first use"""
+    return _current or select()
+
+
+def play_buffer(data, num_channels, bytes_per_sample, sample_rate):
+    return current().play_buffer(data, num_channels, bytes_per_sample, sample_rate)
+
+
+def stream(chunks, num_channels, bytes_per_sample, sample_rate):
+    """Play an iterable of buffers in order, pulling each one only when the backend needs it"""
+    chunks = iter(chunks)
+    return current().open_stream(lambda: next(chunks, None), num_channels, bytes_per_sample, sample_rate)
+
+
+if __name__ == "__main__":
+    for spec in PROBE_ORDER:
+        print(f"{'✅' if probe(spec) is not None else '❌'} {spec}")
+    print(f"Selected: {select(sys.argv[1] if len(sys.argv) > 1 else None).name}")
@@ -0,0 +1,87 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+
+
+class AudioScheduler(threading.Thread):
+    """Runs playback jobs on a dedicated thread so the Tk mainloop never blocks.
+
+    Jobs arrive through a command queue and are placed on a timeline ordered
+    by due time. Completion callbacks are never called from the audio thread;
+    they are handed to the Tk thread, which drains them with root.after.
+    """
+
+    def __init__(self, poll_ms=15):
+        super().__init__(name="AudioScheduler", daemon=True)
+        self.commands = queue.Queue()
+        self.completions = queue.Queue()
+        self.timeline = []
+        self.poll_ms = poll_ms
+        self.root = None
+        self._seq = itertools.count()
+
+    def submit(self, job, *args, delay=0.0, on_done=None):
+        """Run job(*args) on the audio thread after delay seconds.
+
+        If on_done is given it is called on the Tk thread with job's result.
+        """
+        self.commands.put(("job", time.monotonic() + delay, (job, args), on_done))
+
+    def cancel_pending(self):
+        """Drop every job that has not started yet"""
+        self.commands.put(("clear", None, None, None))
+
+    def stop(self):
+        """Stop the audio thread once the current job returns"""
+        self.commands.put(("stop", None, None, None))
+
+    def attach(self, root):
+        """Start delivering completion callbacks on root's thread"""
+        self.root = root
+        self.root.after(self.poll_ms, self._drain_completions)
+
+    def _drain_completions(self):
+        while True:
+            try:
+                callback, result = self.completions.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(result)
+            except Exception as e:
+                print(f"Error in audio callback: {e}")
+        try:
+            self.root.after(self.poll_ms, self._drain_completions)
+        except Exception:
+            # The window was destroyed; nothing left to deliver to
+            self.root = None
+
+    def run(self):
+        while True:
+            timeout = None
+            if self.timeline:
+                timeout = max(0.0, self.timeline[0][0] - time.monotonic())
+            try:
+                kind, due, job, on_done = self.commands.get(timeout=timeout)
+            except queue.Empty:
+                kind = None
+            if kind == "stop":
+                return
+            if kind == "clear":
+                self.timeline.clear()
+            elif kind == "job":
+                heapq.heappush(self.timeline, (due, next(self._seq), job, on_done))
+            self._run_due()
+
+    def _run_due(self):
+        while self.timeline and self.timeline[0][0] <= time.monotonic():
+            _, _, (job, args), on_done = heapq.heappop(self.timeline)
+            try:
+                result = job(*args)
+            except Exception as e:
+                print(f"Error in audio job: {e}")
+                continue
+            if on_done is not None:
+                self.completions.put((on_done, result))
@@ -0,0 +1,241 @@
+"""Startup and time-to-first-sound benchmark for the trainer apps.
+
+Runs each app against the null audio backend and writes a JSON report that
+can be compared across revisions:
+
+    python benchmarks/bench_app.py --apps main new --out bench_app.json
+
+Tk still needs a display; on machines without one run it under xvfb-run.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+APPS = ["main", "new", "dhj", "newu"]
+EXERCISES = {
+    # Button handlers: App methods in main.py, EarTraining methods elsewhere
+    "main": {"interval": "play_random_interval", "chord": "play_random_chord", "scale": "play_random_scale"},
+    "trainer": {"interval": "generate_interval", "note": "generate_note",
+                "chord": "generate_chord", "scale": "generate_scale", "melody": "generate_melody"},
+}
+TIMEOUT = 10.0
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples_ms):
+    return {
+        "n": len(samples_ms),
+        "mean_ms": statistics.fmean(samples_ms) if samples_ms else None,
+        "p50_ms": percentile(samples_ms, 50),
+        "p90_ms": percentile(samples_ms, 90),
+        "p99_ms": percentile(samples_ms, 99),
+        "max_ms": max(samples_ms) if samples_ms else None,
+    }
+
+
+def load_app(name):
+    """Import an app module with audio going to the null sink.
+
+    Returns (module, sink, db_dir); pass db_dir to close_app() when done.
+    """
+    sys.path.insert(0, REPO_DIR)
+    os.chdir(REPO_DIR)
+    # Keep benchmark answers out of the real learner database
+    db_dir = tempfile.TemporaryDirectory()
+    os.environ["TRAINER_DB"] = os.path.join(db_dir.name, "bench.db")
+    os.environ["TRAINER_AUDIO"] = "null"
+    import audio_backends
+    return importlib.import_module(name), audio_backends.select("null"), db_dir
+
+
+def close_app(root, main_app, db_dir):
+    """Tear the app down, then delete its scratch learner database"""
+    root.destroy()
+    store = getattr(main_app, "store", None)
+    if store is not None:
+        store.close()
+    db_dir.cleanup()
+
+
+def pump_until(root, done, timeout=TIMEOUT):
+    deadline = time.perf_counter() + timeout
+    while not done():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("app did not reach the expected state in time")
+        root.update()
+        time.sleep(0.001)
+
+
+def mark_time(startup, label):
+    for name, elapsed in startup.MARKS:
+        if name == label:
+            return startup.T0 + elapsed
+    return None
+
+
+def child_startup(app_name, spawn_wall):
+    """Measure one launch; runs in a fresh interpreter"""
+    wall0, perf0 = time.time(), time.perf_counter()
+    import_start = time.perf_counter()
+    app, _, db_dir = load_app(app_name)
+    import_s = time.perf_counter() - import_start
+    startup = sys.modules["startup"]
+    root, main_app = app.create_app()
+    pump_until(root, lambda: mark_time(startup, "audio ready") is not None)
+
+    def since_spawn(perf):
+        return (wall0 + (perf - perf0) - spawn_wall) * 1000
+
+    result = {
+        "interpreter_ms": (wall0 - spawn_wall) * 1000,
+        "import_app_ms": import_s * 1000,
+        "first_window_ms": since_spawn(mark_time(startup, "first window")),
+        "audio_ready_ms": since_spawn(mark_time(startup, "audio ready")),
+        "deferred_imports_ms": {name: s * 1000 for name, s in startup.IMPORTS.items()},
+    }
+    close_app(root, main_app, db_dir)
+    print(json.dumps(result))
+
+
+def measure_startup(app_name, runs):
+    launches = []
+    for _ in range(runs):
+        spawn_wall = time.time()
+        out = subprocess.run(
+            [sys.executable, __file__, "--child-startup", app_name, str(spawn_wall)],
+            capture_output=True, text=True, check=True, cwd=REPO_DIR,
+        )
+        launches.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    cold, warm = launches[0], launches[1:]
+    keys = ["interpreter_ms", "import_app_ms", "first_window_ms", "audio_ready_ms"]
+    return {
+        "cold": cold,
+        "warm": {key: summarize([run[key] for run in warm]) for key in keys} if warm else None,
+    }
+
+
+def wait_idle(scheduler):
+    """Block until every job queued so far on the audio thread has run"""
+    idle = threading.Event()
+    scheduler.submit(idle.set)
+    if not idle.wait(TIMEOUT):
+        raise TimeoutError("audio scheduler did not drain")
+
+
+def click_latency(root, handler, sink, scheduler):
+    """Call handler as a button press would and time it to the first buffer"""
+    heard = []
+    first = threading.Event()
+
+    def listener(now):
+        if not heard:
+            heard.append(now)
+            first.set()
+
+    sink.add_listener(listener)
+    try:
+        start = time.perf_counter()
+        handler()
+        while not first.is_set():
+            root.update()
+            if time.perf_counter() - start > TIMEOUT:
+                raise TimeoutError(f"no sound from {handler.__name__}")
+            first.wait(0.001)
+        latency = (heard[0] - start) * 1000
+    finally:
+        sink.remove_listener(listener)
+    wait_idle(scheduler)
+    root.update()
+    return latency
+
+
+def measure_exercises(app_name, clicks):
+    app, sink, db_dir = load_app(app_name)
+    startup = sys.modules["startup"]
+    root, main_app = app.create_app()
+    pump_until(root, lambda: mark_time(startup, "audio ready") is not None)
+    if app_name == "main":
+        target, handlers = main_app, EXERCISES["main"]
+    else:
+        main_app.start_ear_training()
+        target, handlers = main_app.trainer, EXERCISES["trainer"]
+    results = {}
+    for exercise, method in handlers.items():
+        handler = getattr(target, method, None)
+        if handler is None:
+            continue  # Older trainers lack the newer exercises
+        first = click_latency(root, handler, sink, app.SCHEDULER)
+        steady = [click_latency(root, handler, sink, app.SCHEDULER) for _ in range(clicks)]
+        results[exercise] = {"first_sound_ms": first, "steady": summarize(steady)}
+    results["sample_bank"] = app.SAMPLE_BANK.stats()
+    results["audio"] = sink.stats()
+    close_app(root, main_app, db_dir)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=REPO_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark app startup and time to first sound")
+    parser.add_argument("--apps", nargs="+", default=["main", "new"], choices=APPS)
+    parser.add_argument("--runs", type=int, default=5, help="launches per app; the first counts as cold")
+    parser.add_argument("--clicks", type=int, default=20, help="steady-state clicks per exercise")
+    parser.add_argument("--out", default="bench_app.json")
+    parser.add_argument("--child-startup", nargs=2, metavar=("APP", "SPAWN_TIME"), help=argparse.SUPPRESS)
+    parser.add_argument("--child-exercises", nargs=2, metavar=("APP", "CLICKS"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child_startup:
+        child_startup(args.child_startup[0], float(args.child_startup[1]))
+        return
+    if args.child_exercises:
+        print(json.dumps(measure_exercises(args.child_exercises[0], int(args.child_exercises[1]))))
+        return
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "apps": {},
+    }
+    for name in args.apps:
+        print(f"⏱ {name}: startup x{args.runs}, {args.clicks} clicks per exercise")
+        # Each app gets its own interpreter so module state never leaks between them
+        out = subprocess.run([sys.executable, __file__, "--child-exercises", name, str(args.clicks)],
+                             capture_output=True, text=True, check=True, cwd=REPO_DIR)
+        report["apps"][name] = {
+            "startup": measure_startup(name, args.runs),
+            "exercises": json.loads(out.stdout.strip().splitlines()[-1]),
+        }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
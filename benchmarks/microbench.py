@@ -0,0 +1,335 @@
+"""Microbenchmarks for the audio and music-theory hot paths.
+
+    python benchmarks/microbench.py                       # run and print
+    python benchmarks/microbench.py --save-baseline       # store results as the baseline
+    python benchmarks/microbench.py --check               # exit 1 on any regression or error
+    python benchmarks/microbench.py --filter mix sequence # only matching cases
+
+Each case is timed like timeit: the loop count is calibrated so one repeat
+takes at least MIN_REPEAT_S, the garbage collector is paused, and the
+median of several repeats is compared with the baseline. A case counts as
+a regression when its median is more than --threshold slower than the
+baseline's. Machine metadata is stored with every result so baselines from
+different machines are not compared silently. For the same reason no
+baseline is committed: record one with --save-baseline on the machine that
+runs --check (benchmarks/baseline.json, or --baseline elsewhere). --check
+fails without one, and a case that raises fails it like a regression.
+
+New cases register with @case("group.name") and return the callable to time.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+MIN_REPEAT_S = 0.05
+REPEATS = 7
+THRESHOLD = 0.25  # Fractional slowdown of the median that counts as a regression
+
+CASES = {}
+
+
+def case(name):
+    """Register setup() -> callable as a benchmark case"""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+# --- Cases -------------------------------------------------------------------
+
+@case("theory.note_to_freq")
+def _note_to_freq():
+    from main import NOTE_NAMES, note_to_freq
+    return lambda: [note_to_freq(note) for note in NOTE_NAMES]
+
+
+@case("theory.notes_to_freqs")
+def _notes_to_freqs():
+    from keyboard_bank import KEYBOARD
+    from pitch import notes_to_freqs
+    return lambda: notes_to_freqs(KEYBOARD)
+
+
+@case("synth.generate_sine_wave")
+def _generate_sine_wave():
+    from generate_notes import generate_sine_wave
+    return lambda: generate_sine_wave(440.0, 0.5, 44100)
+
+
+@case("synth.synthesize_tone")
+def _synthesize_tone():
+    import main
+    return lambda: main.synthesize_tone(440.0, 0.8, 44100)
+
+
+@case("synth.render_piano")
+def _render_piano():
+    import synth
+    return lambda: synth.render(440.0, 0.8, "piano")
+
+
+@case("synth.stream_chunk")
+def _stream_chunk():
+    import synth
+    chunks = synth.stream_notes((t * 0.25, 220.0, 1.0) for t in range(10 ** 9))  # Four notes always sounding
+    return lambda: next(chunks)
+
+
+@case("synth.generate_tone_cached")
+def _generate_tone():
+    import main
+    main.render_tone(440.0)  # Prime the tone cache so only the hit path is timed
+    return lambda: main.generate_tone(440.0)
+
+
+@case("io.wav_decode")
+def _wav_decode():
+    from sample_bank import SampleBank
+    path = write_test_notes(1)["C4"]
+    bank = SampleBank({})
+    return lambda: bank._decode(path)
+
+
+@case("io.pack_load")
+def _pack_load():
+    from sample_bank import SampleBank, write_pack
+    notes = write_test_notes(15)
+    pack = os.path.join(os.path.dirname(notes["C4"]), "notes.bank")
+    write_pack(notes, pack)
+    # The map is released with the bank once nothing references its slices
+    return lambda: SampleBank({}).load_pack(pack)
+
+
+@case("synth.pitch_shift")
+def _pitch_shift():
+    from keyboard_bank import resample
+    from pitch import note_to_freq
+    source = test_buffers(1)[0]  # C4
+    return lambda: resample(source, 2 ** (5 / 12), period=44100 / note_to_freq("C4"))
+
+
+@case("mix.chord")
+def _mix_chord():
+    from mixer import mix
+    buffers = test_buffers(3)
+    return lambda: mix(buffers)
+
+
+@case("mix.sequence")
+def _mix_sequence():
+    from mixer import render_sequence, SCALE_GAP
+    buffers = test_buffers(8)
+    return lambda: render_sequence(buffers, SCALE_GAP)
+
+
+@case("mix.phrase_32")
+def _mix_phrase():
+    from mixer import overlap_add
+    buffers = test_buffers(15) * 3
+    return lambda: overlap_add(buffers[:32])
+
+
+@case("theory.sample_interval")
+def _sample_interval():
+    from exercise_session import build_sampler
+    sampler = build_sampler()
+    sampler.rng = random.Random(1)
+    for _ in range(200):
+        item, root = sampler.sample("interval")
+        sampler.record("interval", item, root, sampler.rng.random() < 0.7)
+    return lambda: sampler.sample("interval")
+
+
+@case("theory.record_interval")
+def _record_interval():
+    from exercise_session import build_sampler
+    sampler = build_sampler()
+    return lambda: sampler.record("interval", 7, 3, True)
+
+
+# --- Fixtures ----------------------------------------------------------------
+
+_fixture_dir = None
+
+
+def write_test_notes(count):
+    """Write count 0.5 s sine notes to a temp folder; returns {note: path}"""
+    global _fixture_dir
+    from generate_notes import DEFAULT_NOTES, generate_sine_wave, write_wav
+    from pitch import note_to_freq
+    if _fixture_dir is None:
+        _fixture_dir = tempfile.mkdtemp(prefix="microbench")
+    notes = {}
+    for note in DEFAULT_NOTES[:count]:
+        path = os.path.join(_fixture_dir, f"{note}.wav")
+        if not os.path.exists(path):
+            write_wav(path, generate_sine_wave(note_to_freq(note), 0.5, 44100), 44100)
+        notes[note] = path
+    return notes
+
+
+def test_buffers(count):
+    from generate_notes import DEFAULT_NOTES, generate_sine_wave
+    from pitch import note_to_freq
+    return [generate_sine_wave(note_to_freq(note), 0.5, 44100) for note in DEFAULT_NOTES[:count]]
+
+
+# --- Harness -----------------------------------------------------------------
+
+def calibrate(fn, min_time=MIN_REPEAT_S):
+    """Smallest power-of-ten loop count whose run takes at least min_time"""
+    loops = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            fn()
+        if (time.perf_counter_ns() - start) / 1e9 >= min_time or loops >= 10 ** 7:
+            return loops
+        loops *= 10
+
+
+def measure(fn, repeats=REPEATS, min_time=MIN_REPEAT_S):
+    """Per-call times in microseconds for each repeat"""
+    fn()  # Warm caches and lazy imports
+    loops = calibrate(fn, min_time)
+    times = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter_ns()
+            for _ in range(loops):
+                fn()
+            times.append((time.perf_counter_ns() - start) / loops / 1000)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return loops, times
+
+
+def machine_info():
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                  text=True, cwd=REPO_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "platform": platform.platform(),
+        "python": f"{platform.python_implementation()} {platform.python_version()}",
+        "numpy": numpy_version,
+        "revision": revision,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run(names, repeats=REPEATS, min_time=MIN_REPEAT_S):
+    """Time each case; returns (results, errors), errors mapping failed cases to their message"""
+    results, errors = {}, {}
+    for name in names:
+        try:
+            fn = CASES[name]()
+            loops, times = measure(fn, repeats, min_time)
+        except Exception as e:
+            print(f"Error running {name}: {e}")
+            errors[name] = str(e)
+            continue
+        results[name] = {
+            "loops": loops,
+            "median_us": statistics.median(times),
+            "min_us": min(times),
+            "stdev_us": statistics.stdev(times) if len(times) > 1 else 0.0,
+        }
+        print(f"{name:<30} {results[name]['median_us']:>12.2f} µs  (min {results[name]['min_us']:.2f}, "
+              f"±{results[name]['stdev_us']:.2f}, {loops} loops)")
+    return results, errors
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Print the change against baseline; returns the names that regressed"""
+    ignored = {"timestamp", "revision"}
+    base_machine = {k: v for k, v in baseline.get("machine", {}).items() if k not in ignored}
+    this_machine = {k: v for k, v in machine_info().items() if k not in ignored}
+    if base_machine != this_machine:
+        changed = sorted(k for k in set(base_machine) | set(this_machine) if base_machine.get(k) != this_machine.get(k))
+        print(f"⚠ Baseline was recorded on a different setup ({', '.join(changed)} differ)")
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        ratio = result["median_us"] / base["median_us"]
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "❌ REGRESSION"
+        elif ratio < 1 / (1 + threshold):
+            flag = "✅ faster"
+        else:
+            flag = ""
+        print(f"{name:<30} {ratio:>6.2f}x baseline {flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the audio and theory hot paths")
+    parser.add_argument("--filter", nargs="+", help="only run cases whose name contains one of these")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--min-time", type=float, default=MIN_REPEAT_S, help="seconds per repeat")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="slowdown that counts as a regression (default: 0.25 = 25%%)")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if anything regressed")
+    parser.add_argument("--out", help="also write this run as JSON")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_DIR)
+    os.environ.setdefault("TRAINER_AUDIO", "null")
+    names = [n for n in CASES if not args.filter or any(f in n for f in args.filter)]
+    results, errors = run(names, args.repeats, args.min_time)
+    report = {"machine": machine_info(), "results": results, "errors": errors}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if errors:
+        print(f"❌ {len(errors)} case(s) failed: {', '.join(errors)}")
+    if args.save_baseline:
+        if errors:
+            print("Baseline not saved; fix the failing cases first")
+            return 1
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 1 if args.check else 0
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.threshold)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+    return 1 if (regressions or errors) and args.check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,14 @@
+import startup
 import tkinter as tk
 import random
 import time
-import numpy as np
-import simpleaudio as sa
 import os
+from sample_bank import SampleBank
+from audio_scheduler import AudioScheduler
+import audio_backends
+from mixer import play_mix, play_sequence, INTERVAL_GAP, SCALE_GAP
+
+startup.mark("modules imported")
 
 NOTE_NAMES = [
     'C4', 'Cs4', 'D4', 'Ds4', 'E4', 'F4', 'Fs4', 'G4', 'Gs4', 'A4', 'As4', 'B4',
@@ -15,6 +20,10 @@ AUDIO_DIR = "audio"
 if not os.path.exists(AUDIO_DIR):
     os.makedirs(AUDIO_DIR)
 NOTE_FILES = {note: f"{AUDIO_DIR}/{note}.wav" for note in NOTE_NAMES}
+BANK_FILE = f"{AUDIO_DIR}/notes.bank"
+SAMPLE_BANK = SampleBank(NOTE_FILES)
+SCHEDULER = AudioScheduler()
+SCHEDULER.start()
 
 INTERVALS = [
     "Unison", "m2", "M2", "m3", "M3", "P4", "TT", "P5", "m6", "M6", "m7", "M7", "Octave"
@@ -32,46 +41,48 @@ SCALES = {
 }
 
 def play_note(note):
-    if note in NOTE_FILES and os.path.exists(NOTE_FILES[note]):
+    if note in SAMPLE_BANK:
         try:
-            wave_obj = sa.WaveObject.from_wave_file(NOTE_FILES[note])
-            play_obj = wave_obj.play()
+            play_obj = SAMPLE_BANK.play(note)
             play_obj.wait_done()
         except Exception as e:
             print(f"Error playing note {note}: {e}")
     else:
         print(f"Audio file for {note} not found")
 
+def play_notes(notes, gap):
+    buffers = [b for b in (SAMPLE_BANK.buffer(note) for note in notes) if b is not None]
+    if not buffers:
+        return
+    play_obj = play_sequence(buffers, gap)
+    play_obj.wait_done()
+
 def play_interval(start_index, interval):
-    play_note(NOTE_NAMES[start_index])
-    time.sleep(0.4)
-    play_note(NOTE_NAMES[start_index + interval])
+    play_notes([NOTE_NAMES[start_index], NOTE_NAMES[start_index + interval]], INTERVAL_GAP)
 
 def play_chord(root_index, intervals):
-    objs = []
+    buffers = []
     for i in intervals:
         if root_index + i < len(NOTE_NAMES):
             note = NOTE_NAMES[root_index + i]
-            if os.path.exists(NOTE_FILES[note]):
-                try:
-                    wave_obj = sa.WaveObject.from_wave_file(NOTE_FILES[note])
-                    objs.append(wave_obj.play())
-                except:
-                    print(f"Failed to play chord note {note}")
+            if note in SAMPLE_BANK:
+                buffers.append(SAMPLE_BANK.buffer(note))
+            else:
+                print(f"Failed to play chord note {note}")
+    if not buffers:
+        return
+    play_obj = play_mix(buffers)
     time.sleep(1)
-    for obj in objs:
-        obj.wait_done()
+    play_obj.wait_done()
 
 def play_scale(root_index, intervals):
-    for i in intervals:
-        if root_index + i < len(NOTE_NAMES):
-            play_note(NOTE_NAMES[root_index + i])
-            time.sleep(0.25)
+    play_notes([NOTE_NAMES[root_index + i] for i in intervals if root_index + i < len(NOTE_NAMES)], SCALE_GAP)
 
 class EarTraining:
     def __init__(self, root, back_callback):
         self.root = root
         self.back_callback = back_callback
+        self.frame = None
         self.stats = {i: {"correct": 0, "wrong": 0} for i in range(13)}
         self.streak = 0
         self.max_streak = 0
@@ -88,10 +99,13 @@ class EarTraining:
         self.scale_type = None
 
     def start(self):
-        self.clear()
-        tk.Label(self.root, text="🎧 Full Ear Training Suite", font=("Helvetica", 16)).pack(pady=10)
+        """Build the training screen on first use and return its frame"""
+        if self.frame is not None:
+            return self.frame
+        self.frame = tk.Frame(self.root)
+        tk.Label(self.frame, text="🎧 Full Ear Training Suite", font=("Helvetica", 16)).pack(pady=10)
 
-        interval_frame = tk.LabelFrame(self.root, text="Intervals", padx=10, pady=5)
+        interval_frame = tk.LabelFrame(self.frame, text="Intervals", padx=10, pady=5)
         interval_frame.pack(pady=5)
         tk.Button(interval_frame, text="▶ Play Interval", command=self.generate_interval).pack(pady=2)
         self.interval_feedback = tk.Label(interval_frame, text="")
@@ -102,7 +116,7 @@ class EarTraining:
             btn = tk.Button(btn_frame, text=name, width=6, command=lambda i=i: self.check_interval(i))
             btn.grid(row=i//7, column=i%7, padx=2, pady=2)
 
-        note_frame = tk.LabelFrame(self.root, text="Notes", padx=10, pady=5)
+        note_frame = tk.LabelFrame(self.frame, text="Notes", padx=10, pady=5)
         note_frame.pack(pady=5)
         tk.Button(note_frame, text="▶ Play Note", command=self.generate_note).pack(pady=2)
         self.note_feedback = tk.Label(note_frame, text="")
@@ -113,7 +127,7 @@ class EarTraining:
             btn = tk.Button(grid, text=note, width=4, command=lambda i=i: self.check_note(i))
             btn.grid(row=i//8, column=i%8, padx=2, pady=2)
 
-        chord_frame = tk.LabelFrame(self.root, text="Chords", padx=10, pady=5)
+        chord_frame = tk.LabelFrame(self.frame, text="Chords", padx=10, pady=5)
         chord_frame.pack(pady=5)
         tk.Button(chord_frame, text="▶ Play Chord", command=self.generate_chord).pack(pady=2)
         self.chord_feedback = tk.Label(chord_frame, text="")
@@ -123,7 +137,7 @@ class EarTraining:
         for name in CHORDS:
             tk.Button(chord_btns, text=name, width=10, command=lambda n=name: self.check_chord(n)).pack(side=tk.LEFT, padx=5)
 
-        scale_frame = tk.LabelFrame(self.root, text="Scales", padx=10, pady=5)
+        scale_frame = tk.LabelFrame(self.frame, text="Scales", padx=10, pady=5)
         scale_frame.pack(pady=5)
         tk.Button(scale_frame, text="▶ Play Scale", command=self.generate_scale).pack(pady=2)
         self.scale_feedback = tk.Label(scale_frame, text="")
@@ -133,7 +147,7 @@ class EarTraining:
         for name in SCALES:
             tk.Button(scale_btns, text=name, width=15, command=lambda n=name: self.check_scale(n)).pack(side=tk.LEFT, padx=5)
 
-        extra_frame = tk.Frame(self.root)
+        extra_frame = tk.Frame(self.frame)
         extra_frame.pack(pady=10)
         for text, cmd in [
             ("🏆 Achievements", self.achievements),
@@ -144,17 +158,14 @@ class EarTraining:
         ]:
             tk.Button(extra_frame, text=text, width=25, command=cmd).pack(pady=2)
 
-        tk.Button(self.root, text="⬅ Back to Menu", command=self.back_callback).pack(pady=10)
-
-    def clear(self):
-        for widget in self.root.winfo_children():
-            widget.destroy()
+        tk.Button(self.frame, text="⬅ Back to Menu", command=self.back_callback).pack(pady=10)
+        return self.frame
 
     def generate_interval(self):
         weights = [(self.stats[i]['wrong'] + 1) / (self.stats[i]['correct'] + 1) for i in range(13)]
-        self.current_interval = np.random.choice(range(13), p=np.array(weights)/sum(weights))
+        self.current_interval = random.choices(range(13), weights=weights)[0]
         self.base_index = random.randint(0, len(NOTE_NAMES) - self.current_interval - 1)
-        play_interval(self.base_index, self.current_interval)
+        SCHEDULER.submit(play_interval, self.base_index, self.current_interval)
         self.interval_feedback.config(text="Interval played.")
 
     def check_interval(self, guess):
@@ -175,7 +186,7 @@ class EarTraining:
 
     def generate_note(self):
         self.note_index = random.randint(0, len(NOTE_NAMES) - 1)
-        play_note(NOTE_NAMES[self.note_index])
+        SCHEDULER.submit(play_note, NOTE_NAMES[self.note_index])
         self.note_feedback.config(text="Note played.")
 
     def check_note(self, guess):
@@ -188,7 +199,7 @@ class EarTraining:
     def generate_chord(self):
         self.chord_root = random.randint(0, len(NOTE_NAMES) - 8)
         self.chord_type = random.choice(list(CHORDS.keys()))
-        play_chord(self.chord_root, CHORDS[self.chord_type])
+        SCHEDULER.submit(play_chord, self.chord_root, CHORDS[self.chord_type])
         self.chord_feedback.config(text="Chord played.")
 
     def check_chord(self, guess):
@@ -201,7 +212,7 @@ class EarTraining:
     def generate_scale(self):
         self.scale_root = random.randint(0, len(NOTE_NAMES) - 13)
         self.scale_type = random.choice(list(SCALES.keys()))
-        play_scale(self.scale_root, SCALES[self.scale_type])
+        SCHEDULER.submit(play_scale, self.scale_root, SCALES[self.scale_type])
         self.scale_feedback.config(text="Scale played.")
 
     def check_scale(self, guess):
@@ -249,33 +260,60 @@ class EarTraining:
             interval = self.mistakes.pop(0)
             self.current_interval = interval
             self.base_index = random.randint(0, len(NOTE_NAMES) - interval - 1)
-            play_interval(self.base_index, interval)
+            SCHEDULER.submit(play_interval, self.base_index, interval)
             self.interval_feedback.config(text=f"🔁 Reviewing: {INTERVALS[interval]}")
 
 class MainApp:
     def __init__(self, root):
         self.root = root
         self.root.title("AI Music Theory Trainer")
+        # Screens are built once and stacked in one grid cell; switching
+        # raises the wanted one, so widgets and their state survive
+        self.screens = tk.Frame(self.root)
+        self.screens.pack(fill=tk.BOTH, expand=True)
+        self.screens.grid_rowconfigure(0, weight=1)
+        self.screens.grid_columnconfigure(0, weight=1)
+        self.menu = None
+        self.trainer = None
         self.show_main_menu()
 
     def show_main_menu(self):
-        self.clear()
-        tk.Label(self.root, text="🎵 AI Music Theory Trainer", font=("Helvetica", 18)).pack(pady=20)
-        tk.Button(self.root, text="🎧 Start Ear Training", width=30, command=self.start_ear_training).pack(pady=5)
-        tk.Button(self.root, text="❌ Exit", width=30, command=self.root.quit).pack(pady=5)
+        if self.menu is None:
+            self.menu = tk.Frame(self.screens)
+            self.menu.grid(row=0, column=0, sticky="nsew")
+            tk.Label(self.menu, text="🎵 AI Music Theory Trainer", font=("Helvetica", 18)).pack(pady=20)
+            tk.Button(self.menu, text="🎧 Start Ear Training", width=30, command=self.start_ear_training).pack(pady=5)
+            tk.Button(self.menu, text="❌ Exit", width=30, command=self.root.quit).pack(pady=5)
+        self.menu.tkraise()
 
     def start_ear_training(self):
-        self.trainer = EarTraining(self.root, self.show_main_menu)
-        self.trainer.start()
-
-    def clear(self):
-        for widget in self.root.winfo_children():
-            widget.destroy()
-
-def main():
+        if self.trainer is None:
+            self.trainer = EarTraining(self.screens, self.show_main_menu)
+            self.trainer.start().grid(row=0, column=0, sticky="nsew")
+        self.trainer.frame.tkraise()
+
+def warm_up():
+    """Import numpy, pick an audio backend and load samples; runs first on the audio thread"""
+    startup.preload("numpy")
+    audio_backends.current()
+    SAMPLE_BANK.load(BANK_FILE)
+    startup.mark("audio ready")
+    startup.report()
+
+def first_window():
+    startup.mark("first window")
+    SCHEDULER.submit(warm_up)
+
+def create_app():
     root = tk.Tk()
     root.geometry("1000x750")
+    SCHEDULER.attach(root)
     app = MainApp(root)
+    root.after_idle(first_window)
+    return root, app
+
+def main():
+    root, app = create_app()
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,277 @@
+import datetime
+import random
+import threading
+from collections import namedtuple
+
+from adaptive_sampler import AdaptiveSampler
+from mixer import INTERVAL_GAP, SCALE_GAP, MELODY_STEP
+from pitch import note_range
+from review_scheduler import ReviewScheduler
+from stats_engine import StatsEngine
+
+# Notes the exercises use. Roots are saved as indices into this list, so
+# it may grow upwards but must keep starting at C4.
+NOTE_NAMES = note_range("C4", "C6")
+
+# Music theory definitions
+INTERVALS = [
+    "Unison", "m2", "M2", "m3", "M3", "P4", "TT", "P5", "m6", "M6", "m7", "M7", "Octave"
+]
+CHORDS = {
+    "Major": [0, 4, 7],
+    "Minor": [0, 3, 7],
+    "Diminished": [0, 3, 6],
+    "Augmented": [0, 4, 8]
+}
+SCALES = {
+    "Major": [0, 2, 4, 5, 7, 9, 11, 12],
+    "Natural Minor": [0, 2, 3, 5, 7, 8, 10, 12],
+    "Pentatonic": [0, 2, 4, 7, 9, 12]
+}
+EXERCISES = ["interval", "note", "chord", "scale", "melody"]
+MELODY_LENGTH = 4  # Notes in a dictation melody unless the learner picks another length
+MELODY_LENGTHS = [3, 4, 6, 8, 16, 32]
+MELODY_MOVES = [-2, -1, -1, 1, 1, 2]  # Scale-degree steps a melody takes, mostly stepwise
+
+# How a question is played: notes one after another with a gap, together,
+# or as a legato phrase with a fixed onset spacing
+PLAYBACK = {
+    "interval": ("sequence", INTERVAL_GAP),
+    "note": ("sequence", 0.0),
+    "chord": ("mix", 0.0),
+    "scale": ("sequence", SCALE_GAP),
+    "melody": ("phrase", MELODY_STEP),
+}
+
+# degrees is only set for melodies: indices into SCALES[item], tonic first
+Question = namedtuple("Question", "exercise item root notes degrees", defaults=(None,))
+
+
+def build_sampler():
+    """Register every (exercise, item, root) combination that fits in NOTE_NAMES"""
+    sampler = AdaptiveSampler()
+    top = len(NOTE_NAMES)
+    sampler.register("interval", [(i, r) for i in range(len(INTERVALS)) for r in range(top - i)])
+    sampler.register("note", [(i, i) for i in range(top)])
+    sampler.register("chord", [(name, r) for name, iv in CHORDS.items() for r in range(top - max(iv))])
+    sampler.register("scale", [(name, r) for name, iv in SCALES.items() for r in range(top - max(iv))])
+    sampler.register("melody", [(name, r) for name, iv in SCALES.items() for r in range(top - max(iv))])
+    return sampler
+
+
+def build_stats():
+    """Answer counters for every exercise, indexed by item and root note"""
+    stats = StatsEngine()
+    roots = range(len(NOTE_NAMES))
+    stats.register("interval", range(len(INTERVALS)), roots)
+    stats.register("note", range(len(NOTE_NAMES)), roots)
+    stats.register("chord", CHORDS, roots)
+    stats.register("scale", SCALES, roots)
+    stats.register("melody", SCALES, roots)
+    return stats
+
+
+def random_melody(scale, length=MELODY_LENGTH, rng=random):
+    """Scale-degree indices for a melody in scale, starting on the tonic"""
+    top = len(SCALES[scale]) - 1
+    degrees = [0]
+    for _ in range(length - 1):
+        move = rng.choice(MELODY_MOVES)
+        if not 0 <= degrees[-1] + move <= top:
+            move = -move  # Turn back at either end of the scale rather than repeat the note
+        degrees.append(degrees[-1] + move)
+    return degrees
+
+
+def question_notes(exercise, item, root, degrees=None):
+    """Note names a question plays, lowest first (in playing order for melodies)"""
+    if exercise == "interval":
+        offsets = [0, item]
+    elif exercise == "note":
+        offsets = [0]
+    elif exercise == "chord":
+        offsets = CHORDS[item]
+    elif exercise == "melody":
+        offsets = [SCALES[item][d] for d in degrees]
+    else:
+        offsets = SCALES[item]
+    return [NOTE_NAMES[root + i] for i in offsets if root + i < len(NOTE_NAMES)]
+
+
+def item_label(exercise, item):
+    if exercise == "interval":
+        return INTERVALS[item]
+    if exercise == "note":
+        return NOTE_NAMES[item]
+    return item
+
+
+def answer_label(exercise, answer):
+    """An answer as shown to learners; melodies are 1-based scale degrees"""
+    if exercise == "melody":
+        return [d + 1 for d in answer]
+    return item_label(exercise, answer)
+
+
+def random_root(exercise, item):
+    """Any root the item fits on, for replaying it during review"""
+    if exercise == "note":
+        return item
+    if exercise == "interval":
+        return random.randint(0, len(NOTE_NAMES) - item - 1)
+    offsets = CHORDS[item] if exercise == "chord" else SCALES[item]  # Melodies fit wherever their scale does
+    return random.randint(0, len(NOTE_NAMES) - max(offsets) - 1)
+
+
+class ExerciseSession:
+    """One learner's questions, answers and progress, independent of any UI.
+
+    The Tk trainer and the network service both drive exercises through
+    this class; it never plays audio itself, it only says which notes a
+    question is made of.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self.stats = build_stats()
+        self.sampler = build_sampler()
+        self.reviews = ReviewScheduler()
+        self.streak = 0
+        self.max_streak = 0
+        self.daily_goal = 10
+        self.daily_progress = 0
+        self.melody_length = MELODY_LENGTH
+        self.current = {}  # exercise -> the last Question asked
+        self.lock = threading.RLock()  # Held while answers change saved state; snapshot() runs on the writer thread
+        if self.store is not None:
+            self.restore(*self.store.load())
+
+    def snapshot(self):
+        """Session state to persist between runs"""
+        with self.lock:
+            return {
+                "history": self.stats.to_state(),
+                "streak": self.streak,
+                "max_streak": self.max_streak,
+                "daily_goal": self.daily_goal,
+                "daily_progress": self.daily_progress,
+                "day": datetime.date.today().isoformat(),
+                "reviews": self.reviews.to_state(),
+            }
+
+    def restore(self, state, counts):
+        """Resume a saved session"""
+        if state:
+            self.stats.load_state(state.get("history", {}))
+            self.streak = state["streak"]
+            self.max_streak = state["max_streak"]
+            self.daily_goal = state["daily_goal"]
+            if state["day"] == datetime.date.today().isoformat():
+                self.daily_progress = state["daily_progress"]
+            self.reviews.load_state(state.get("reviews", []))
+            # Sessions saved before reviews were scheduled kept a plain list
+            for interval in state.get("mistakes", []):
+                self.reviews.record("interval", interval, False)
+        for exercise, item, root, correct, wrong in counts:
+            self.sampler.restore(exercise, item, root, correct, wrong)
+            self.stats.restore(exercise, item, root, correct, wrong)
+
+    def record(self, exercise, item, root, correct):
+        """Feed an answer to the stats, sampler and review queue and queue it for saving"""
+        with self.lock:
+            self.stats.record(exercise, item, root, correct)
+            self.sampler.record(exercise, item, root, correct)
+            self.reviews.record(exercise, item, correct)
+        if self.store is not None:
+            self.store.record_answer(exercise, item, root, correct)
+
+    def save(self):
+        """Queue a state save; the snapshot itself is taken later, on the store's writer thread"""
+        if self.store is not None:
+            self.store.save_state(self.snapshot)
+
+    def ask(self, exercise, item, root):
+        degrees = random_melody(item, self.melody_length) if exercise == "melody" else None
+        question = Question(exercise, item, root, question_notes(exercise, item, root, degrees), degrees)
+        self.current[exercise] = question
+        return question
+
+    def current_question(self, exercise):
+        """The last question asked for an exercise, or None"""
+        return self.current.get(exercise)
+
+    def next_question(self, exercise):
+        """Draw a new question, favouring items the learner gets wrong"""
+        item, root = self.sampler.sample(exercise)
+        return self.ask(exercise, item, root)
+
+    def review(self, now=None):
+        """Ask the mistake most overdue for review, or return None if nothing is due"""
+        due = self.reviews.next_due(now)
+        if due is None:
+            return None
+        exercise, item = due
+        return self.ask(exercise, item, random_root(exercise, item))
+
+    def check(self, exercise, guess):
+        """Check a guess at the last question; returns (correct, right answer), or None before any question.
+
+        A melody is answered with its list of scale-degree indices.
+        """
+        question = self.current.get(exercise)
+        if question is None:
+            return None
+        answer = question.degrees if exercise == "melody" else question.item
+        correct = guess == answer
+        with self.lock:
+            self.record(exercise, question.item, question.root, correct)
+            if exercise == "interval":
+                if correct:
+                    self.streak += 1
+                    self.max_streak = max(self.streak, self.max_streak)
+                    self.daily_progress += 1
+                else:
+                    self.streak = 0
+        self.save()
+        return correct, answer
+
+    def achievement(self):
+        correct_total, _ = self.stats.totals()
+        if correct_total >= 50:
+            return "🏅 Master Listener: 50+ correct answers!"
+        if correct_total >= 20:
+            return "🎖 Skilled Ear: 20+ correct answers!"
+        if correct_total >= 10:
+            return "🔰 Beginner Badge: 10+ correct answers!"
+        return "🚀 Keep practicing for achievements!"
+
+    def summary(self):
+        """Plain-data view of progress, e.g. for sending as JSON"""
+        correct, wrong = self.stats.totals()
+        exercises = {}
+        for exercise in EXERCISES:
+            ex = self.stats[exercise]
+            exercises[exercise] = {
+                "correct": ex.total_correct,
+                "wrong": ex.total_wrong,
+                "rolling_accuracy": ex.rolling_accuracy(),
+                "items": {
+                    str(item_label(exercise, item)): [int(ex.item_correct[i]), int(ex.item_wrong[i])]
+                    for i, item in enumerate(ex.items) if ex.item_correct[i] + ex.item_wrong[i]
+                },
+            }
+        hardest = self.stats.hardest("interval")
+        return {
+            "correct": correct,
+            "wrong": wrong,
+            "today": self.stats.day(),
+            "streak": self.streak,
+            "max_streak": self.max_streak,
+            "daily_goal": self.daily_goal,
+            "daily_progress": self.daily_progress,
+            "achievement": self.achievement(),
+            "hardest_interval": None if hardest is None else INTERVALS[hardest],
+            "reviews_pending": len(self.reviews),
+            "next_review_in": self.reviews.seconds_until_next(),
+            "exercises": exercises,
+        }
@@ -1,31 +1,145 @@
-import numpy as np
-import wave
+import argparse
+import hashlib
+import json
 import os
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 
-# Note frequencies (in Hz)
-FREQUENCIES = {
-    'C4': 261.63, 'Cs4': 277.18, 'D4': 293.66, 'Ds4': 311.13, 'E4': 329.63,
-    'F4': 349.23, 'Fs4': 369.99, 'G4': 392.00, 'Gs4': 415.30, 'A4': 440.00,
-    'As4': 466.16, 'B4': 493.88, 'C5': 523.25, 'Cs5': 554.37, 'D5': 587.33
-}
+import synth
+from pitch import note_to_midi, midi_to_freq, note_range
+from sample_bank import write_pack
+
+DEFAULT_NOTES = note_range("C4", "D5")  # The set the trainers ship with
 
 SAMPLE_RATE = 44100  # Hz
 DURATION = 0.5       # Seconds
+MANIFEST = "manifest.json"
+GENERATOR_VERSION = 4  # Bump when rendering changes so every output is rebuilt
+TIMBRES = synth.TIMBRES
 
 def generate_sine_wave(freq, duration, sample_rate):
     t = np.linspace(0, duration, int(sample_rate * duration), False)
     tone = 0.5 * np.sin(2 * np.pi * freq * t)
     return np.int16(tone * 32767)
 
-# Ensure audio directory exists
-os.makedirs("audio", exist_ok=True)
+def render_note(freq, duration, sample_rate, timbre):
+    return synth.render(freq, duration, timbre, sample_rate)
 
-for note, freq in FREQUENCIES.items():
-    samples = generate_sine_wave(freq, DURATION, SAMPLE_RATE)
-    with wave.open(f"audio/{note}.wav", 'w') as wf:
+def write_wav(path, samples, sample_rate):
+    with wave.open(path, 'w') as wf:
         wf.setnchannels(1)
         wf.setsampwidth(2)
-        wf.setframerate(SAMPLE_RATE)
+        wf.setframerate(sample_rate)
         wf.writeframes(samples.tobytes())
 
-print("✅ Dummy .wav notes generated in /audio folder!")
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def params_hash(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+def render_job(job):
+    """Render one note to disk; runs in a worker process"""
+    path, params = job
+    samples = render_note(params["freq"], params["duration"], params["sample_rate"], params["timbre"])
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    write_wav(path, samples, params["sample_rate"])
+    return path, params_hash(params), file_hash(path)
+
+def plan_jobs(out_dir, notes, durations, timbres, sample_rate):
+    """List (path, params) for every output; flat layout for a single set"""
+    nested = len(durations) > 1 or len(timbres) > 1
+    jobs = []
+    for timbre in timbres:
+        for duration in durations:
+            folder = os.path.join(out_dir, timbre, f"{duration:g}s") if nested else out_dir
+            for note in notes:
+                params = {
+                    "note": note,
+                    "freq": midi_to_freq(note_to_midi(note)),
+                    "duration": duration,
+                    "sample_rate": sample_rate,
+                    "timbre": timbre,
+                    "version": GENERATOR_VERSION,
+                }
+                jobs.append((os.path.join(folder, f"{note}.wav"), params))
+    return jobs
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST)
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def is_current(out_dir, path, params, manifest):
+    """True if path was rendered from the same params and is unchanged on disk"""
+    entry = manifest.get(os.path.relpath(path, out_dir))
+    if not entry or entry["params"] != params_hash(params) or not os.path.exists(path):
+        return False
+    return file_hash(path) == entry["sha256"]
+
+def generate(out_dir="audio", notes=None, durations=(DURATION,), timbres=(synth.DEFAULT_TIMBRE,),
+             sample_rate=SAMPLE_RATE, workers=None, force=False, pack=False):
+    """Render a sample set in parallel, skipping outputs that are already current.
+
+    With pack=True each output folder also gets a notes.bank file for
+    SampleBank.load. Returns (rendered, skipped) counts.
+    """
+    notes = list(notes or DEFAULT_NOTES)
+    for timbre in timbres:
+        if timbre not in TIMBRES:
+            raise ValueError(f"Unknown timbre: {timbre}")
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)  # Entries outside this run are kept even when forcing
+    jobs = plan_jobs(out_dir, notes, list(durations), list(timbres), sample_rate)
+    todo = [job for job in jobs if force or not is_current(out_dir, job[0], job[1], manifest)]
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path, p_hash, c_hash in pool.map(render_job, todo, chunksize=8):
+                manifest[os.path.relpath(path, out_dir)] = {"params": p_hash, "sha256": c_hash}
+    save_manifest(out_dir, manifest)
+    if pack:
+        folders = {}
+        for path, params in jobs:
+            folders.setdefault(os.path.dirname(path), {})[params["note"]] = path
+        for folder, note_files in folders.items():
+            write_pack(note_files, os.path.join(folder, "notes.bank"))
+    return len(todo), len(jobs) - len(todo)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render note sample sets as .wav files")
+    parser.add_argument("--out", default="audio", help="output folder (default: audio)")
+    parser.add_argument("--low", default="C4", help="lowest note, e.g. A0 (default: C4)")
+    parser.add_argument("--high", default="D5", help="highest note, e.g. C8 (default: D5)")
+    parser.add_argument("--piano", action="store_true", help="render the full 88-key range A0-C8")
+    parser.add_argument("--durations", type=float, nargs="+", default=[DURATION],
+                        help="note lengths in seconds (default: 0.5)")
+    parser.add_argument("--timbres", nargs="+", default=[synth.DEFAULT_TIMBRE], choices=sorted(TIMBRES),
+                        help=f"timbres to render (default: {synth.DEFAULT_TIMBRE})")
+    parser.add_argument("--sample-rate", type=int, default=SAMPLE_RATE)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-render even if outputs are current")
+    parser.add_argument("--pack", action="store_true", help="also write a packed notes.bank per folder")
+    args = parser.parse_args(argv)
+
+    low, high = ("A0", "C8") if args.piano else (args.low, args.high)
+    start = time.perf_counter()
+    rendered, skipped = generate(args.out, note_range(low, high), args.durations, args.timbres,
+                                 args.sample_rate, args.workers, args.force, args.pack)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {rendered} .wav notes rendered, {skipped} up to date, in {args.out}/ ({elapsed:.2f} s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import bisect
+import threading
+
+import audio_backends
+import synth
+from pitch import note_to_midi, midi_to_note, midi_to_freq, note_range
+from startup import lazy_import
+from tone_cache import ToneCache
+
+np = lazy_import("numpy")
+
+LOWEST_KEY = 21   # A0
+HIGHEST_KEY = 108  # C8
+SHIFT_CACHE_BYTES = 24 * 1024 * 1024  # Room for all 88 keys at about 0.5 s each, with headroom
+FADE_SECONDS = 0.005  # Fade applied where a downward shift cuts the note short
+TAIL_SECONDS = 0.08  # End of the source an upward shift replaces with a fade, after sustaining
+LOOP_SECONDS = 0.02  # About this much of the source, in whole cycles, repeats to sustain an upward shift
+FALLBACK_DURATION = 0.5  # Length of synthesized notes when no samples are loaded at all
+
+
+KEYBOARD = note_range("A0", "C8")
+
+
+def resample(samples, ratio, sample_rate=synth.SAMPLE_RATE, period=None):
+    """Play samples back ratio times faster, by linear interpolation.
+
+    The result keeps the source's length. A downward shift would stretch
+    the note, so it is cut and faded out. An upward shift would shorten it,
+    so once reading reaches the last TAIL_SECONDS it jumps back a whole
+    number of the source's cycles (period samples each): the note sustains
+    at its new pitch and is faded out where the source ends. Without a
+    period an upward shift simply ends early.
+    """
+    src = np.asarray(samples, dtype=np.float32)
+    natural = int((len(src) - 1) / ratio)
+    tail = min(int(TAIL_SECONDS * sample_rate), len(src) // 4)
+    end = len(src) - 1 - tail
+    loop = period * max(1, round(LOOP_SECONDS * sample_rate / period)) if period else 0
+    sustain = natural < len(src) and loop and end - loop > 0
+    n_out = len(src) if sustain else min(len(src), natural)
+    if n_out <= 0:
+        return np.zeros(0, dtype=np.int16)
+    pos = np.arange(n_out, dtype=np.float64) * ratio
+    if sustain:
+        wrapped = pos > end
+        pos[wrapped] = end - loop + np.mod(pos[wrapped] - end, loop)
+    i = pos.astype(np.int64)
+    frac = (pos - i).astype(np.float32)
+    out = src[i] + (src[i + 1] - src[i]) * frac
+    if sustain or n_out < natural:
+        fade = min(n_out, tail if sustain else int(FADE_SECONDS * sample_rate))
+        out[n_out - fade:] *= np.linspace(1.0, 0.0, fade, dtype=np.float32)
+    return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+
+class KeyboardBank:
+    """Every key from A0 to C8 on top of whatever samples a SampleBank holds.
+
+    Keys with their own sample are served as-is. Any other key is resampled
+    from the nearest loaded key and kept in a byte-bounded LRU cache, so a
+    handful of files covers the whole keyboard.
+    """
+
+    def __init__(self, bank, max_bytes=SHIFT_CACHE_BYTES, sample_rate=synth.SAMPLE_RATE):
+        self.bank = bank
+        self.sample_rate = sample_rate
+        self.cache = ToneCache(max_bytes)
+        self.anchors = []  # MIDI numbers of loaded samples, sorted
+        self.shifted = 0
+        self.lock = threading.Lock()
+
+    def load(self, pack_path=None):
+        self.bank.load(pack_path)
+        self.refresh()
+        return self
+
+    def refresh(self):
+        """Re-read which keys have real samples, e.g. after loading more"""
+        self.anchors = sorted(note_to_midi(note) for note in self.bank.samples)
+        self.cache.clear()
+
+    def __contains__(self, note):
+        return note in self.bank or note_to_midi(note) in range(LOWEST_KEY, HIGHEST_KEY + 1)
+
+    def nearest(self, midi):
+        """Closest loaded key, preferring the one above on a tie since shifting down keeps the length"""
+        i = bisect.bisect_left(self.anchors, midi)
+        candidates = self.anchors[max(i - 1, 0):i + 1]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda a: (abs(a - midi), a < midi))
+
+    def buffer(self, note):
+        """int16 PCM for any key, or None if it is off the keyboard"""
+        if note in self.bank:
+            return self.bank.buffer(note)
+        midi = note_to_midi(note)
+        if not LOWEST_KEY <= midi <= HIGHEST_KEY:
+            return None
+        if midi in self.anchors:
+            return self.bank.buffer(midi_to_note(midi))  # Another spelling, e.g. 'Db4' for 'Cs4'
+        return self.cache.get(midi_to_freq(midi), 0.0, self.sample_rate, lambda *_: self._render(midi))
+
+    def _render(self, midi):
+        anchor = self.nearest(midi)
+        if anchor is None:
+            return synth.render(midi_to_freq(midi), FALLBACK_DURATION, sample_rate=self.sample_rate)
+        with self.lock:
+            self.shifted += 1
+        source = self.bank.buffer(midi_to_note(anchor))
+        return resample(source, 2 ** ((midi - anchor) / 12), self.sample_rate,
+                        self.sample_rate / midi_to_freq(anchor))
+
+    def play(self, note):
+        """Play a key from memory, returning None if it is off the keyboard"""
+        buffer = self.buffer(note)
+        if buffer is None:
+            return None
+        return audio_backends.play_buffer(buffer, 1, 2, self.sample_rate)
+
+    def stats(self):
+        stats = self.bank.stats()
+        stats["anchors"] = len(self.anchors)
+        with self.lock:
+            stats["shifted"] = self.shifted
+        stats["shift_cache"] = self.cache.stats()
+        return stats
@@ -0,0 +1,153 @@
+"""Per-stage playback latency, from button press to the audio backend.
+
+A Trace is started when a handler runs and carried with the job to the
+audio thread. Each mark() times the stage that just ended with
+perf_counter_ns and adds it to a histogram keyed by (stage, exercise):
+
+    select    choosing the question
+    dispatch  waiting for the audio thread to pick the job up
+    lookup    fetching (or synthesizing) the note samples
+    mix       mixing or sequencing them into one buffer
+    submit    handing the buffer to the audio backend
+    total     button handler start to backend return
+
+METRICS holds the histograms; export() writes them as JSON or, for a
+.prom path, Prometheus text format.
+"""
+import bisect
+import json
+import threading
+import time
+
+# Upper bucket bounds in milliseconds, roughly 1-2-5 steps
+BUCKETS_MS = [0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000]
+STAGES = ["select", "dispatch", "lookup", "mix", "submit", "total"]
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with O(log buckets) observe"""
+
+    def __init__(self, bounds=BUCKETS_MS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.sum += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+
+    def quantile(self, q):
+        """Estimate by interpolating within the bucket that holds the q-th observation"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lo = self.bounds[i - 1] if i else 0.0
+                hi = self.bounds[i] if i < len(self.bounds) else self.max
+                estimate = lo + (hi - lo) * (rank - seen) / n
+                return min(max(estimate, self.min), self.max)
+            seen += n
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.sum / self.count if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p90_ms": self.quantile(0.9),
+            "p99_ms": self.quantile(0.99),
+            "min_ms": self.min,
+            "max_ms": self.max,
+        }
+
+
+class LatencyMetrics:
+    """Histograms per (stage, exercise), shared by the Tk and audio threads"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def observe(self, stage, exercise, ms):
+        with self.lock:
+            hist = self.histograms.get((stage, exercise))
+            if hist is None:
+                hist = self.histograms[(stage, exercise)] = Histogram()
+            hist.observe(ms)
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def rows(self):
+        """(stage, exercise, summary) in stage order"""
+        with self.lock:
+            keys = sorted(self.histograms, key=lambda k: (k[1], STAGES.index(k[0]) if k[0] in STAGES else len(STAGES)))
+            return [(stage, exercise, self.histograms[(stage, exercise)].summary()) for stage, exercise in keys]
+
+    def to_json(self):
+        return {
+            "unit": "ms",
+            "buckets_ms": BUCKETS_MS,
+            "stages": [
+                dict(summary, stage=stage, exercise=exercise) for stage, exercise, summary in self.rows()
+            ],
+        }
+
+    def to_prometheus(self):
+        name = "trainer_playback_stage_seconds"
+        lines = [f"# HELP {name} Time spent in each playback stage",
+                 f"# TYPE {name} histogram"]
+        with self.lock:
+            for (stage, exercise), hist in sorted(self.histograms.items()):
+                labels = f'stage="{stage}",exercise="{exercise}"'
+                cumulative = 0
+                for bound, n in zip(hist.bounds + [None], hist.counts):
+                    cumulative += n
+                    le = "+Inf" if bound is None else repr(bound / 1000)
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {hist.sum / 1000!r}")
+                lines.append(f"{name}_count{{{labels}}} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write JSON, or Prometheus text if path ends in .prom"""
+        with open(path, "w") as f:
+            if path.endswith(".prom"):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_json(), f, indent=2)
+        return path
+
+
+METRICS = LatencyMetrics()
+
+
+class Trace:
+    """Timestamps for one button press as it moves through the stages"""
+
+    def __init__(self, exercise, metrics=METRICS):
+        self.exercise = exercise
+        self.metrics = metrics
+        self.start_ns = self.last_ns = time.perf_counter_ns()
+
+    def mark(self, stage):
+        """Record the time since the previous mark as stage"""
+        now = time.perf_counter_ns()
+        self.metrics.observe(stage, self.exercise, (now - self.last_ns) / 1e6)
+        self.last_ns = now
+
+    def finish(self):
+        self.metrics.observe("total", self.exercise, (time.perf_counter_ns() - self.start_ns) / 1e6)
+
+
+def start(exercise):
+    return Trace(exercise)
@@ -1,11 +1,17 @@
+import startup
 import tkinter as tk
 import random
 import time
-import numpy as np
-import simpleaudio as sa
-import os
 import os
 import sys
+from sample_bank import SampleBank
+from audio_scheduler import AudioScheduler
+from mixer import play_mix, play_sequence, INTERVAL_GAP, SCALE_GAP
+from pitch import note_to_freq
+import synth
+import audio_backends
+
+startup.mark("modules imported")
 
 def resource_path(relative_path):
     """ Get absolute path to resource (works for dev and PyInstaller) """
@@ -21,6 +27,11 @@ NOTE_NAMES = [
 ]
 
 NOTE_FILES = {note: resource_path(f"audio/{note}.wav") for note in NOTE_NAMES}
+BANK_FILE = resource_path("audio/notes.bank")
+STREAM_AFTER = 2.0  # Synthetic tones longer than this (seconds) are streamed where the backend can, and never cached
+SAMPLE_BANK = SampleBank(NOTE_FILES)
+SCHEDULER = AudioScheduler()
+SCHEDULER.start()
 INTERVALS = [
     "Unison", "m2", "M2", "m3", "M3", "P4", "TT", "P5", "m6", "M6", "m7", "M7", "Octave"
 ]
@@ -36,27 +47,24 @@ SCALES = {
     "Pentatonic": [0, 2, 4, 7, 9, 12]
 }
 
-def note_to_freq(note):
-    note_names = ['C', 'Cs', 'D', 'Ds', 'E', 'F', 'Fs', 'G', 'Gs', 'A', 'As', 'B']
-    octave = int(note[-1])
-    key = note[:-1]
-    n = note_names.index(key) + (octave - 4) * 12
-    freq = 440 * (2 ** ((n - 9) / 12))  # A4 is the reference (n=9)
-    return freq
+def synthesize_tone(freq, duration, fs):
+    return synth.render(freq, duration, synth.DEFAULT_TIMBRE, fs)
+
+def render_tone(freq, duration=0.8):
+    return synth.tone(freq, duration)
 
 def generate_tone(freq, duration=0.8):
-    fs = 44100
-    t = np.linspace(0, duration, int(fs * duration), False)
-    tone = 0.5 * np.sin(freq * 2 * np.pi * t)
-    tone = (tone * 32767).astype(np.int16)
-    return sa.play_buffer(tone, 1, 2, fs)
+    if duration <= STREAM_AFTER:
+        return audio_backends.play_buffer(render_tone(freq, duration), 1, 2, 44100)
+    if audio_backends.current().streams:
+        return audio_backends.stream(synth.stream(freq, duration), 1, 2, 44100)
+    return audio_backends.play_buffer(synthesize_tone(freq, duration, 44100), 1, 2, 44100)
 
 def play_note(note, duration=0.8):
     print(f"Playing note: {note}")
     try:
-        if note in NOTE_FILES and os.path.exists(NOTE_FILES[note]):
-            wave_obj = sa.WaveObject.from_wave_file(NOTE_FILES[note])
-            play_obj = wave_obj.play()
+        play_obj = SAMPLE_BANK.play(note)
+        if play_obj is not None:
             play_obj.wait_done()
             return
     except Exception as e:
@@ -66,34 +74,38 @@ def play_note(note, duration=0.8):
     play_obj = generate_tone(freq, duration)
     play_obj.wait_done()
 
+def note_buffer(note, duration=0.8):
+    buffer = SAMPLE_BANK.buffer(note)
+    if buffer is None:
+        buffer = render_tone(note_to_freq(note), duration)
+    return buffer
+
+def play_notes(notes, gap, duration=0.8):
+    """Play notes one after another, streaming them when all are synthesized and the backend can"""
+    if audio_backends.current().streams and not any(note in SAMPLE_BANK for note in notes):
+        schedule = synth.sequence([note_to_freq(note) for note in notes], duration, gap)
+        return audio_backends.stream(synth.stream_notes(schedule), 1, 2, 44100)
+    return play_sequence([note_buffer(note, duration) for note in notes], gap)
+
 def play_interval(start_index, interval):
     first_note = NOTE_NAMES[start_index]
     second_note = NOTE_NAMES[start_index + interval]
     print(f"Interval notes: {first_note}, {second_note}")
-    play_note(first_note)
-    time.sleep(0.4)
-    play_note(second_note)
+    play_obj = play_notes([first_note, second_note], INTERVAL_GAP)
+    play_obj.wait_done()
     return first_note, second_note
 
 def play_chord(root_index, intervals):
-    players = []
+    buffers = []
     notes = []
     for i in intervals:
         note = NOTE_NAMES[root_index + i]
         notes.append(note)
         print(f"Chord note: {note}")
-        try:
-            if note in NOTE_FILES and os.path.exists(NOTE_FILES[note]):
-                wave_obj = sa.WaveObject.from_wave_file(NOTE_FILES[note])
-                players.append(wave_obj.play())
-                continue
-        except:
-            pass
-        freq = note_to_freq(note)
-        players.append(generate_tone(freq))
+        buffers.append(note_buffer(note))
+    play_obj = play_mix(buffers)
     time.sleep(1)
-    for p in players:
-        p.wait_done()
+    play_obj.wait_done()
     return notes
 
 def play_scale(root_index, intervals):
@@ -102,8 +114,8 @@ def play_scale(root_index, intervals):
         if root_index + i < len(NOTE_NAMES):
             note = NOTE_NAMES[root_index + i]
             notes.append(note)
-            play_note(note)
-            time.sleep(0.25)
+    play_obj = play_notes(notes, SCALE_GAP)
+    play_obj.wait_done()
     return notes
 
 class App:
@@ -128,24 +140,48 @@ class App:
     def play_random_interval(self):
         interval = random.randint(1, 12)
         base = random.randint(0, len(NOTE_NAMES) - interval - 1)
-        notes = play_interval(base, interval)
-        self.output_label.config(text=f"Interval Played: {INTERVALS[interval]} ({notes[0]} → {notes[1]})")
+        SCHEDULER.submit(
+            play_interval, base, interval,
+            on_done=lambda notes: self.output_label.config(
+                text=f"Interval Played: {INTERVALS[interval]} ({notes[0]} → {notes[1]})"))
 
     def play_random_chord(self):
         chord_name, intervals = random.choice(list(CHORDS.items()))
         root = random.randint(0, len(NOTE_NAMES) - max(intervals) - 1)
-        notes = play_chord(root, intervals)
-        self.output_label.config(text=f"Chord Played: {chord_name} ({', '.join(notes)})")
+        SCHEDULER.submit(
+            play_chord, root, intervals,
+            on_done=lambda notes: self.output_label.config(
+                text=f"Chord Played: {chord_name} ({', '.join(notes)})"))
 
     def play_random_scale(self):
         scale_name, intervals = random.choice(list(SCALES.items()))
         root = random.randint(0, len(NOTE_NAMES) - max(intervals) - 1)
-        notes = play_scale(root, intervals)
-        self.output_label.config(text=f"Scale Played: {scale_name} ({' → '.join(notes)})")
-
-def main():
+        SCHEDULER.submit(
+            play_scale, root, intervals,
+            on_done=lambda notes: self.output_label.config(
+                text=f"Scale Played: {scale_name} ({' → '.join(notes)})"))
+
+def warm_up():
+    """Import numpy, pick an audio backend and load samples; runs first on the audio thread"""
+    startup.preload("numpy")
+    audio_backends.current()
+    SAMPLE_BANK.load(BANK_FILE)
+    startup.mark("audio ready")
+    startup.report()
+
+def first_window():
+    startup.mark("first window")
+    SCHEDULER.submit(warm_up)
+
+def create_app():
     root = tk.Tk()
+    SCHEDULER.attach(root)
     app = App(root)
+    root.after_idle(first_window)
+    return root, app
+
+def main():
+    root, app = create_app()
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+import audio_backends
+from startup import lazy_import
+
+np = lazy_import("numpy")
+
+SAMPLE_RATE = 44100
+HEADROOM_DB = 1.0  # Keep mixed peaks this far below int16 full scale
+INTERVAL_GAP = 0.4  # Silence between the two notes of an interval
+SCALE_GAP = 0.25    # Silence between consecutive scale notes
+MELODY_STEP = 0.4   # Onset to onset spacing of phrase notes
+PHRASE_FADE = 0.08  # Each phrase note fades out over this long, overlapping the next
+
+
+def mix(buffers, headroom_db=HEADROOM_DB):
+    """Sum int16 buffers sample-aligned into one int16 buffer.
+
+    Buffers may differ in length; shorter ones are zero-padded. The sum is
+    only attenuated when its peak would exceed the headroom ceiling, so a
+    single quiet note is left untouched.
+    """
+    buffers = [np.asarray(b, dtype=np.int16) for b in buffers if len(b)]
+    if not buffers:
+        return np.zeros(0, dtype=np.int16)
+    total = np.zeros(max(len(b) for b in buffers), dtype=np.int32)
+    for b in buffers:
+        total[:len(b)] += b
+    ceiling = 32767 * 10 ** (-headroom_db / 20)
+    peak = int(np.abs(total).max())
+    if peak > ceiling:
+        return (total * (ceiling / peak)).astype(np.int16)
+    return total.astype(np.int16)
+
+
+def play_mix(buffers, sample_rate=SAMPLE_RATE, headroom_db=HEADROOM_DB):
+    """Mix buffers and play them as a single mono stream"""
+    return audio_backends.play_buffer(mix(buffers, headroom_db), 1, 2, sample_rate)
+
+
+def render_sequence(buffers, gap=SCALE_GAP, sample_rate=SAMPLE_RATE):
+    """Lay buffers end to end in one preallocated int16 buffer.
+
+    Each note starts exactly gap seconds after the previous one ends, at a
+    sample offset computed up front, so timing does not depend on how
+    quickly the caller can start streams.
+    """
+    buffers = [np.asarray(b, dtype=np.int16) for b in buffers]
+    gap_samples = int(round(gap * sample_rate))
+    total = sum(len(b) for b in buffers) + gap_samples * max(len(buffers) - 1, 0)
+    out = np.zeros(total, dtype=np.int16)
+    offset = 0
+    for b in buffers:
+        out[offset:offset + len(b)] = b
+        offset += len(b) + gap_samples
+    return out
+
+
+def play_sequence(buffers, gap=SCALE_GAP, sample_rate=SAMPLE_RATE):
+    """Render buffers as a sequence and play it with a single call"""
+    return audio_backends.play_buffer(render_sequence(buffers, gap, sample_rate), 1, 2, sample_rate)
+
+
+_ramps = {}
+
+
+def fade_ramp(length):
+    """Raised-cosine fade from 1 to 0 over length samples, cached per length"""
+    if length not in _ramps:
+        _ramps[length] = 0.5 + 0.5 * np.cos(np.linspace(0, np.pi, length, dtype=np.float32))
+    return _ramps[length]
+
+
+def overlap_add(buffers, step=MELODY_STEP, fade=PHRASE_FADE, sample_rate=SAMPLE_RATE, headroom_db=HEADROOM_DB):
+    """Render buffers as a legato phrase with one onset every step seconds.
+
+    Each note plays for step seconds and then fades out over the next fade
+    seconds (at most one step) underneath the following note, instead of
+    stopping dead. The output is viewed as one row per step: note heads
+    are copied into their own rows, and the tails are shaped in one
+    batched multiply and added to the rows after. The sum is attenuated
+    like mix() only if it would clip.
+    """
+    buffers = [np.asarray(b, dtype=np.int16) for b in buffers]
+    if not any(len(b) for b in buffers):
+        return np.zeros(0, dtype=np.int16)
+    hop = int(round(step * sample_rate))
+    tail = min(int(round(fade * sample_rate)), hop)
+    width = min(hop + tail, max(len(b) for b in buffers))
+    total = np.zeros((len(buffers) + 1) * hop, dtype=np.float32)
+    rows = total.reshape(-1, hop)
+    tails = np.zeros((len(buffers), tail), dtype=np.float32)
+    for i, b in enumerate(buffers):
+        rows[i, :min(len(b), hop)] = b[:hop]
+        tails[i, :max(min(len(b) - hop, tail), 0)] = b[hop:hop + tail]
+    tails *= fade_ramp(tail)
+    rows[1:, :tail] += tails
+    total = total[:hop * (len(buffers) - 1) + width]
+    ceiling = 32767 * 10 ** (-headroom_db / 20)
+    peak = max(float(total.max()), -float(total.min()))
+    if peak > ceiling:
+        total *= np.float32(ceiling / peak)
+    return total.astype(np.int16)
@@ -1,99 +1,164 @@
+import startup
 import tkinter as tk
-import random
-import time
-import numpy as np
-import simpleaudio as sa
 import os
 from pathlib import Path
-
-# Note definitions
-NOTE_NAMES = [
-    'C4', 'Cs4', 'D4', 'Ds4', 'E4', 'F4', 'Fs4', 'G4', 'Gs4', 'A4', 'As4', 'B4',
-    'C5', 'Cs5', 'D5'
-]
+from sample_bank import SampleBank
+from keyboard_bank import KeyboardBank, KEYBOARD, FALLBACK_DURATION
+from audio_scheduler import AudioScheduler
+import audio_backends
+from mixer import mix, overlap_add, render_sequence, SAMPLE_RATE, PHRASE_FADE
+from pitch import note_to_freq
+import synth
+import latency
+import session_store
+from exercise_session import (ExerciseSession, NOTE_NAMES, INTERVALS, CHORDS, SCALES,
+                              PLAYBACK, MELODY_LENGTHS)
+
+startup.mark("modules imported")
 
 # Create audio directory if it doesn't exist
 audio_dir = Path("audio")
 audio_dir.mkdir(exist_ok=True)
 
-# Load note files that exist
+# Load note files that exist; every other key is pitch-shifted from the nearest one
 NOTE_FILES = {}
-for note in NOTE_NAMES:
+for note in KEYBOARD:
     file_path = audio_dir / f"{note}.wav"
     if file_path.exists():
         NOTE_FILES[note] = str(file_path)
-    else:
-        print(f"Warning: Missing audio file for note {note}")
-
-# Music theory definitions
-INTERVALS = [
-    "Unison", "m2", "M2", "m3", "M3", "P4", "TT", "P5", "m6", "M6", "m7", "M7", "Octave"
-]
-CHORDS = {
-    "Major": [0, 4, 7],
-    "Minor": [0, 3, 7],
-    "Diminished": [0, 3, 6],
-    "Augmented": [0, 4, 8]
-}
-SCALES = {
-    "Major": [0, 2, 4, 5, 7, 9, 11, 12],
-    "Natural Minor": [0, 2, 3, 5, 7, 8, 10, 12],
-    "Pentatonic": [0, 2, 4, 7, 9, 12]
-}
+BANK_FILE = str(audio_dir / "notes.bank")
+if not NOTE_FILES and not os.path.exists(BANK_FILE):
+    print(f"Warning: No note samples in {audio_dir}; notes will be synthesized")
+SAMPLE_BANK = KeyboardBank(SampleBank(NOTE_FILES))
+SCHEDULER = AudioScheduler()
+SCHEDULER.start()
+LATENCY_JSON = "latency.json"
+LATENCY_PROM = "latency.prom"
 
 class EarTraining:
-    def __init__(self, root, back_callback):
+    def __init__(self, root, back_callback, store=None):
         self.root = root
         self.back_callback = back_callback
-        self.stats = {i: {"correct": 0, "wrong": 0} for i in range(13)}
-        self.streak = 0
-        self.max_streak = 0
-        self.daily_goal = 10
-        self.daily_progress = 0
-        self.mistakes = []
-        self.current_interval = 0
-        self.base_index = 0
-        self.note_index = 0
-        self.chord_root = 0
-        self.chord_type = ""
-        self.scale_root = 0
-        self.scale_type = ""
-
-    def play_note(self, note):
+        self.session = ExerciseSession(store)
+        self.frame = None
+
+    def ask(self, exercise):
+        """Draw a question and queue it for playback, timing both"""
+        trace = latency.start(exercise)
+        question = self.session.next_question(exercise)
+        trace.mark("select")
+        self.play_question(question, trace)
+
+    def play_question(self, question, trace=None):
+        """Queue a question's notes on the audio thread"""
+        trace = trace or latency.start(question.exercise)
+        mode, gap = PLAYBACK[question.exercise]
+        if question.exercise == "note":
+            SCHEDULER.submit(self.play_note, question.notes[0], trace)
+        elif mode == "mix":
+            SCHEDULER.submit(self.play_mixed, question.notes, trace)
+        elif mode == "phrase":
+            SCHEDULER.submit(self.play_phrase, question.notes, gap, trace)
+        else:
+            SCHEDULER.submit(self.play_sequence, question.notes, gap, trace)
+
+    def play_note(self, note, trace):
         """Play a single note"""
-        if note in NOTE_FILES:
-            try:
-                wave_obj = sa.WaveObject.from_wave_file(NOTE_FILES[note])
-                return wave_obj.play()
-            except Exception as e:
-                print(f"Error playing note {note}: {e}")
+        trace.mark("dispatch")
+        buffer = SAMPLE_BANK.buffer(note)
+        trace.mark("lookup")
+        if buffer is None:
+            trace.finish()
+            return None
+        try:
+            play_obj = audio_backends.play_buffer(buffer, 1, 2, SAMPLE_RATE)
+            trace.mark("submit")
+            trace.finish()
+            return play_obj
+        except Exception as e:
+            print(f"Error playing note {note}: {e}")
+        return None
+
+    def play_mixed(self, notes, trace):
+        """Mix the given notes into one buffer and play it as a single stream"""
+        trace.mark("dispatch")
+        buffers = [b for b in (SAMPLE_BANK.buffer(note) for note in notes) if b is not None]
+        trace.mark("lookup")
+        if not buffers:
+            trace.finish()
+            return None
+        try:
+            return self.submit(mix(buffers), trace)
+        except Exception as e:
+            print(f"Error playing chord {notes}: {e}")
         return None
 
-    def play_interval(self, start_index, interval):
-        """Play two notes with a delay between them"""
-        self.play_note(NOTE_NAMES[start_index])
-        if start_index + interval < len(NOTE_NAMES):
-            self.root.after(400, lambda: self.play_note(NOTE_NAMES[start_index + interval]))
+    def play_sequence(self, notes, gap, trace):
+        """Render the notes into one buffer at exact offsets and play it once"""
+        trace.mark("dispatch")
+        if self.streams_synthesized():
+            freqs = [note_to_freq(note) for note in notes]
+            return self.stream(synth.sequence(freqs, FALLBACK_DURATION, gap), trace)
+        buffers = [b for b in (SAMPLE_BANK.buffer(note) for note in notes) if b is not None]
+        trace.mark("lookup")
+        if not buffers:
+            trace.finish()
+            return None
+        try:
+            return self.submit(render_sequence(buffers, gap), trace)
+        except Exception as e:
+            print(f"Error playing sequence {notes}: {e}")
+        return None
 
-    def play_chord(self, root_index, intervals):
-        """Play multiple notes simultaneously as a chord"""
-        for i in intervals:
-            if root_index + i < len(NOTE_NAMES):
-                self.play_note(NOTE_NAMES[root_index + i])
+    def play_phrase(self, notes, step, trace):
+        """Overlap-add the notes into one legato phrase and play it once"""
+        trace.mark("dispatch")
+        if self.streams_synthesized():
+            length = min(FALLBACK_DURATION, step + PHRASE_FADE)
+            return self.stream([(i * step, note_to_freq(note), length) for i, note in enumerate(notes)], trace)
+        buffers = [b for b in (SAMPLE_BANK.buffer(note) for note in notes) if b is not None]
+        trace.mark("lookup")
+        if not buffers:
+            trace.finish()
+            return None
+        try:
+            return self.submit(overlap_add(buffers, step), trace)
+        except Exception as e:
+            print(f"Error playing melody {notes}: {e}")
+        return None
 
-    def play_scale(self, root_index, intervals):
-        """Play notes sequentially with delays as a scale"""
-        for i, interval in enumerate(intervals):
-            if root_index + interval < len(NOTE_NAMES):
-                self.root.after(250 * i, lambda i=i: self.play_note(NOTE_NAMES[root_index + intervals[i]]))
+    def streams_synthesized(self):
+        """Whether notes are all synthesized and the backend can play them as they render"""
+        return not SAMPLE_BANK.anchors and audio_backends.current().streams
+
+    def stream(self, notes, trace):
+        """Stream synthesized (start, freq, duration) notes chunk by chunk"""
+        trace.mark("lookup")
+        try:
+            play_obj = audio_backends.stream(synth.stream_notes(notes), 1, 2, SAMPLE_RATE)
+        except Exception as e:
+            print(f"Error streaming notes: {e}")
+            return None
+        trace.mark("submit")
+        trace.finish()
+        return play_obj
+
+    def submit(self, pcm, trace):
+        trace.mark("mix")
+        play_obj = audio_backends.play_buffer(pcm, 1, 2, SAMPLE_RATE)
+        trace.mark("submit")
+        trace.finish()
+        return play_obj
 
     def start(self):
-        """Initialize the GUI"""
-        self.clear()
-        tk.Label(self.root, text="🎧 Full Ear Training Suite", font=("Helvetica", 16)).pack(pady=10)
+        """Build the training screen on first use and return its frame"""
+        if self.frame is not None:
+            return self.frame
+        self.frame = tk.Frame(self.root)
+        tk.Label(self.frame, text="🎧 Full Ear Training Suite", font=("Helvetica", 16)).pack(pady=10)
 
         # Interval training section
-        interval_frame = tk.LabelFrame(self.root, text="Intervals", padx=10, pady=5)
+        interval_frame = tk.LabelFrame(self.frame, text="Intervals", padx=10, pady=5)
         interval_frame.pack(pady=5)
         tk.Button(interval_frame, text="▶ Play Interval", command=self.generate_interval).pack(pady=2)
         self.interval_feedback = tk.Label(interval_frame, text="")
@@ -105,7 +170,7 @@ class EarTraining:
             btn.grid(row=i//7, column=i%7, padx=2, pady=2)
 
         # Note training section
-        note_frame = tk.LabelFrame(self.root, text="Notes", padx=10, pady=5)
+        note_frame = tk.LabelFrame(self.frame, text="Notes", padx=10, pady=5)
         note_frame.pack(pady=5)
         tk.Button(note_frame, text="▶ Play Note", command=self.generate_note).pack(pady=2)
         self.note_feedback = tk.Label(note_frame, text="")
@@ -117,7 +182,7 @@ class EarTraining:
             btn.grid(row=i//8, column=i%8, padx=2, pady=2)
 
         # Chord training section
-        chord_frame = tk.LabelFrame(self.root, text="Chords", padx=10, pady=5)
+        chord_frame = tk.LabelFrame(self.frame, text="Chords", padx=10, pady=5)
         chord_frame.pack(pady=5)
         tk.Button(chord_frame, text="▶ Play Chord", command=self.generate_chord).pack(pady=2)
         self.chord_feedback = tk.Label(chord_frame, text="")
@@ -128,7 +193,7 @@ class EarTraining:
             tk.Button(chord_btns, text=name, width=10, command=lambda n=name: self.check_chord(n)).pack(side=tk.LEFT, padx=5)
 
         # Scale training section
-        scale_frame = tk.LabelFrame(self.root, text="Scales", padx=10, pady=5)
+        scale_frame = tk.LabelFrame(self.frame, text="Scales", padx=10, pady=5)
         scale_frame.pack(pady=5)
         tk.Button(scale_frame, text="▶ Play Scale", command=self.generate_scale).pack(pady=2)
         self.scale_feedback = tk.Label(scale_frame, text="")
@@ -138,156 +203,318 @@ class EarTraining:
         for name in SCALES:
             tk.Button(scale_btns, text=name, width=15, command=lambda n=name: self.check_scale(n)).pack(side=tk.LEFT, padx=5)
 
+        # Melodic dictation section
+        melody_frame = tk.LabelFrame(self.frame, text="Melodic Dictation", padx=10, pady=5)
+        melody_frame.pack(pady=5)
+        melody_controls = tk.Frame(melody_frame)
+        melody_controls.pack(pady=2)
+        tk.Button(melody_controls, text="▶ Play Melody", command=self.generate_melody).pack(side=tk.LEFT, padx=5)
+        tk.Button(melody_controls, text="🔁 Replay", command=self.replay_melody).pack(side=tk.LEFT, padx=5)
+        tk.Label(melody_controls, text="Notes:").pack(side=tk.LEFT, padx=5)
+        for n in MELODY_LENGTHS:
+            tk.Button(melody_controls, text=str(n), width=3, command=lambda n=n: self.set_melody_length(n)).pack(side=tk.LEFT, padx=1)
+        self.melody_feedback = tk.Label(melody_frame, text="")
+        self.melody_feedback.pack()
+        self.melody_answer = tk.Label(melody_frame, text="")
+        self.melody_answer.pack()
+        degree_btns = tk.Frame(melody_frame)
+        degree_btns.pack()
+        for degree in range(1, max(len(offsets) for offsets in SCALES.values()) + 1):
+            tk.Button(degree_btns, text=str(degree), width=3, command=lambda d=degree: self.enter_degree(d - 1)).pack(side=tk.LEFT, padx=2)
+        tk.Button(degree_btns, text="⌫", width=3, command=self.undo_degree).pack(side=tk.LEFT, padx=2)
+        self.melody_guess = []
+
         # Additional features
-        extra_frame = tk.Frame(self.root)
+        extra_frame = tk.Frame(self.frame)
         extra_frame.pack(pady=10)
         for text, cmd in [
             ("🏆 Achievements", self.achievements),
             ("🤖 AI Difficulty", self.ai_difficulty),
             ("📊 Advanced Stats", self.advanced_stats),
             ("🔥 Streak & Daily Goal", self.show_streak_and_goal),
-            ("🔁 Mistake Review", self.review_mistakes)
+            ("🔁 Mistake Review", self.review_mistakes),
+            ("⏱ Diagnostics", self.toggle_diagnostics)
         ]:
             tk.Button(extra_frame, text=text, width=25, command=cmd).pack(pady=2)
 
-        tk.Button(self.root, text="⬅ Back to Menu", command=self.back_callback).pack(pady=10)
-
-    def clear(self):
-        """Clear all widgets from the root"""
-        for widget in self.root.winfo_children():
-            widget.destroy()
+        self.back_button = tk.Button(self.frame, text="⬅ Back to Menu", command=self.back_callback)
+        self.back_button.pack(pady=10)
+        self.diagnostics = None
+        return self.frame
+
+    def toggle_diagnostics(self):
+        """Show or hide the playback latency panel"""
+        if self.diagnostics is None:
+            self.diagnostics = tk.LabelFrame(self.frame, text="Playback latency (ms)", padx=10, pady=5)
+            self.latency_table = tk.Label(self.diagnostics, text="", font=("Courier", 9), justify=tk.LEFT)
+            self.latency_table.pack()
+            buttons = tk.Frame(self.diagnostics)
+            buttons.pack(pady=2)
+            tk.Button(buttons, text="Refresh", command=self.show_latency).pack(side=tk.LEFT, padx=5)
+            tk.Button(buttons, text="Export", command=self.export_latency).pack(side=tk.LEFT, padx=5)
+            tk.Button(buttons, text="Reset", command=self.reset_latency).pack(side=tk.LEFT, padx=5)
+            self.diagnostics_shown = False
+        if self.diagnostics_shown:
+            self.diagnostics.pack_forget()
+        else:
+            self.diagnostics.pack(pady=5, before=self.back_button)
+            self.show_latency()
+        self.diagnostics_shown = not self.diagnostics_shown
+
+    def show_latency(self):
+        """Fill the diagnostics panel with per-stage percentiles"""
+        lines = [f"{'exercise':<9}{'stage':<9}{'n':>6}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}"]
+        for stage, exercise, s in latency.METRICS.rows():
+            lines.append(f"{exercise:<9}{stage:<9}{s['count']:>6}{s['p50_ms']:>8.2f}{s['p90_ms']:>8.2f}"
+                         f"{s['p99_ms']:>8.2f}{s['max_ms']:>8.2f}")
+        if len(lines) == 1:
+            lines.append("Play a few questions to collect timings.")
+        self.latency_table.config(text="\n".join(lines))
+
+    def export_latency(self):
+        try:
+            latency.METRICS.export(LATENCY_JSON)
+            latency.METRICS.export(LATENCY_PROM)
+            self.show_latency()
+            self.latency_table.config(text=self.latency_table.cget("text") + f"\n✅ Saved {LATENCY_JSON} and {LATENCY_PROM}")
+        except OSError as e:
+            print(f"Error exporting latency metrics: {e}")
+
+    def reset_latency(self):
+        latency.METRICS.reset()
+        self.show_latency()
 
     def generate_interval(self):
         """Generate a random interval to identify"""
-        weights = [(self.stats[i]['wrong'] + 1) / (self.stats[i]['correct'] + 1) for i in range(13)]
-        self.current_interval = np.random.choice(range(13), p=np.array(weights)/sum(weights))
-        self.base_index = random.randint(0, len(NOTE_NAMES) - self.current_interval - 1)
-        self.play_interval(self.base_index, self.current_interval)
+        self.ask("interval")
         self.interval_feedback.config(text="Interval played.")
 
     def check_interval(self, guess):
         """Check if the interval guess was correct"""
-        if guess == self.current_interval:
-            self.stats[guess]['correct'] += 1
-            self.streak += 1
-            self.max_streak = max(self.streak, self.max_streak)
-            self.daily_progress += 1
+        result = self.session.check("interval", guess)
+        if result is None:
+            self.interval_feedback.config(text="▶ Play an interval first.")
+            return
+        correct, answer = result
+        if correct:
             self.interval_feedback.config(text="✅ Correct!")
         else:
-            self.stats[self.current_interval]['wrong'] += 1
-            self.streak = 0
-            self.mistakes.append(self.current_interval)
-            self.interval_feedback.config(text=f"❌ Wrong! It was: {INTERVALS[self.current_interval]}")
+            self.interval_feedback.config(text=f"❌ Wrong! It was: {INTERVALS[answer]}")
 
     def generate_note(self):
         """Generate a random note to identify"""
-        self.note_index = random.randint(0, len(NOTE_NAMES) - 1)
-        self.play_note(NOTE_NAMES[self.note_index])
+        self.ask("note")
         self.note_feedback.config(text="Note played.")
 
     def check_note(self, guess):
         """Check if the note guess was correct"""
-        result = "✅ Correct!" if guess == self.note_index else f"❌ Wrong! It was {NOTE_NAMES[self.note_index]}"
+        result = self.session.check("note", guess)
+        if result is None:
+            self.note_feedback.config(text="▶ Play a note first.")
+            return
+        correct, answer = result
+        result = "✅ Correct!" if correct else f"❌ Wrong! It was {NOTE_NAMES[answer]}"
         self.note_feedback.config(text=result)
 
     def generate_chord(self):
         """Generate a random chord to identify"""
-        self.chord_root = random.randint(0, len(NOTE_NAMES) - 8)
-        self.chord_type = random.choice(list(CHORDS.keys()))
-        self.play_chord(self.chord_root, CHORDS[self.chord_type])
+        self.ask("chord")
         self.chord_feedback.config(text="Chord played.")
 
     def check_chord(self, guess):
         """Check if the chord guess was correct"""
-        result = "✅ Correct!" if guess == self.chord_type else f"❌ Wrong! It was {self.chord_type}"
+        result = self.session.check("chord", guess)
+        if result is None:
+            self.chord_feedback.config(text="▶ Play a chord first.")
+            return
+        correct, answer = result
+        result = "✅ Correct!" if correct else f"❌ Wrong! It was {answer}"
         self.chord_feedback.config(text=result)
 
     def generate_scale(self):
         """Generate a random scale to identify"""
-        self.scale_root = random.randint(0, len(NOTE_NAMES) - 13)
-        self.scale_type = random.choice(list(SCALES.keys()))
-        self.play_scale(self.scale_root, SCALES[self.scale_type])
+        self.ask("scale")
         self.scale_feedback.config(text="Scale played.")
 
     def check_scale(self, guess):
         """Check if the scale guess was correct"""
-        result = "✅ Correct!" if guess == self.scale_type else f"❌ Wrong! It was {self.scale_type}"
+        result = self.session.check("scale", guess)
+        if result is None:
+            self.scale_feedback.config(text="▶ Play a scale first.")
+            return
+        correct, answer = result
+        result = "✅ Correct!" if correct else f"❌ Wrong! It was {answer}"
         self.scale_feedback.config(text=result)
 
+    def generate_melody(self):
+        """Play a new melody to write down as scale degrees"""
+        self.ask("melody")
+        question = self.session.current_question("melody")
+        self.melody_guess = []
+        self.show_melody_guess()
+        self.melody_feedback.config(
+            text=f"🎼 {question.item} on {NOTE_NAMES[question.root]}: enter the {len(question.degrees)} scale degrees")
+
+    def replay_melody(self):
+        question = self.session.current_question("melody")
+        if question is None:
+            self.melody_feedback.config(text="▶ Play a melody first.")
+            return
+        self.play_question(question)
+
+    def set_melody_length(self, length):
+        self.session.melody_length = length
+        self.melody_feedback.config(text=f"New melodies will have {length} notes.")
+
+    def show_melody_guess(self):
+        question = self.session.current_question("melody")
+        slots = len(question.degrees) if question is not None else 0
+        entered = [str(d + 1) for d in self.melody_guess]
+        self.melody_answer.config(text=" ".join(entered + ["_"] * (slots - len(entered))))
+
+    def enter_degree(self, degree):
+        """Add a scale degree to the answer, checking it once the melody is complete"""
+        question = self.session.current_question("melody")
+        if question is None:
+            self.melody_feedback.config(text="▶ Play a melody first.")
+            return
+        self.melody_guess.append(degree)
+        self.show_melody_guess()
+        if len(self.melody_guess) == len(question.degrees):
+            self.check_melody()
+
+    def undo_degree(self):
+        if self.melody_guess:
+            self.melody_guess.pop()
+            self.show_melody_guess()
+
+    def check_melody(self):
+        """Check the entered scale degrees against the melody"""
+        correct, answer = self.session.check("melody", self.melody_guess)
+        self.melody_guess = []
+        if correct:
+            self.melody_feedback.config(text="✅ Correct!")
+        else:
+            self.melody_feedback.config(text=f"❌ Wrong! It was {' '.join(str(d + 1) for d in answer)}")
+
     def achievements(self):
         """Show achievements based on performance"""
-        correct_total = sum(v['correct'] for v in self.stats.values())
-        if correct_total >= 50:
-            msg = "🏅 Master Listener: 50+ correct answers!"
-        elif correct_total >= 20:
-            msg = "🎖 Skilled Ear: 20+ correct answers!"
-        elif correct_total >= 10:
-            msg = "🔰 Beginner Badge: 10+ correct answers!"
-        else:
-            msg = "🚀 Keep practicing for achievements!"
-        self.interval_feedback.config(text=msg)
+        self.interval_feedback.config(text=self.session.achievement())
 
     def ai_difficulty(self):
         """Show which interval is most challenging"""
-        hardest = max(self.stats.items(), key=lambda x: x[1]['wrong'] - x[1]['correct'])[0]
+        hardest = self.session.stats.hardest("interval")
+        if hardest is None:
+            self.interval_feedback.config(text="🤖 Answer a few intervals first!")
+            return
         self.interval_feedback.config(text=f"🤖 Focus on: {INTERVALS[hardest]} (based on performance)")
 
     def advanced_stats(self):
         """Show detailed statistics"""
-        total = sum(self.stats[i]['correct'] + self.stats[i]['wrong'] for i in self.stats)
-        correct = sum(self.stats[i]['correct'] for i in self.stats)
+        stats = self.session.stats
+        correct, wrong = stats.totals()
+        total = correct + wrong
         accuracy = (correct / total * 100) if total > 0 else 0
         lines = [f"📊 Stats — Total: {total}, Correct: {correct}, Accuracy: {accuracy:.1f}%"]
-        for i in self.stats:
-            attempts = self.stats[i]['correct'] + self.stats[i]['wrong']
+        today = stats.day()
+        today_correct = sum(c for c, _ in today.values())
+        today_total = sum(c + w for c, w in today.values())
+        lines.append(f"Today: {today_correct}/{today_total}")
+        for exercise in ("interval", "note", "chord", "scale", "melody"):
+            recent = stats[exercise].rolling_accuracy()
+            if recent is not None:
+                label = "Melodies" if exercise == "melody" else f"{exercise.capitalize()}s"
+                lines.append(f"{label}, last {stats[exercise].recent_count}: {recent * 100:.0f}%")
+        intervals = stats["interval"]
+        for i, name in enumerate(INTERVALS):
+            attempts = int(intervals.item_correct[i] + intervals.item_wrong[i])
             if attempts:
-                acc = self.stats[i]['correct'] / attempts * 100
-                lines.append(f"{INTERVALS[i]}: {self.stats[i]['correct']}/{attempts} ({acc:.0f}%)")
+                acc = intervals.item_correct[i] / attempts * 100
+                lines.append(f"{name}: {intervals.item_correct[i]}/{attempts} ({acc:.0f}%)")
         self.interval_feedback.config(text="\n".join(lines))
 
     def show_streak_and_goal(self):
         """Show current streak and daily progress"""
-        self.interval_feedback.config(text=f"🔥 Streak: {self.streak} (Max: {self.max_streak})\n🎯 Daily Progress: {self.daily_progress}/{self.daily_goal}")
+        s = self.session
+        self.interval_feedback.config(text=f"🔥 Streak: {s.streak} (Max: {s.max_streak})\n🎯 Daily Progress: {s.daily_progress}/{s.daily_goal}")
 
     def review_mistakes(self):
-        """Review previously mistaken intervals"""
-        if not self.mistakes:
-            self.interval_feedback.config(text="✅ No mistakes to review!")
+        """Replay the mistake that is most overdue for review"""
+        question = self.session.review()
+        if question is None:
+            wait = self.session.reviews.seconds_until_next()
+            if wait is None:
+                self.interval_feedback.config(text="✅ No mistakes to review!")
+            else:
+                self.interval_feedback.config(text=f"✅ Nothing due — next review in {wait / 60:.0f} min")
+            return
+        self.play_question(question)
+        if question.exercise == "melody":
+            self.melody_guess = []
+            self.show_melody_guess()
+        if question.exercise == "interval":
+            self.interval_feedback.config(text=f"🔁 Reviewing: {INTERVALS[question.item]}")
         else:
-            interval = self.mistakes.pop(0)
-            self.current_interval = interval
-            self.base_index = random.randint(0, len(NOTE_NAMES) - interval - 1)
-            self.play_interval(self.base_index, interval)
-            self.interval_feedback.config(text=f"🔁 Reviewing: {INTERVALS[interval]}")
+            feedback = getattr(self, f"{question.exercise}_feedback")
+            feedback.config(text=f"🔁 Reviewing a {question.exercise}.")
 
 class MainApp:
-    def __init__(self, root):
+    def __init__(self, root, store=None):
         self.root = root
+        self.store = store
         self.root.title("AI Music Theory Trainer")
+        # Screens are built once and stacked in one grid cell; switching
+        # raises the wanted one, so widgets and their state survive
+        self.screens = tk.Frame(self.root)
+        self.screens.pack(fill=tk.BOTH, expand=True)
+        self.screens.grid_rowconfigure(0, weight=1)
+        self.screens.grid_columnconfigure(0, weight=1)
+        self.menu = None
+        self.trainer = None
         self.show_main_menu()
 
     def show_main_menu(self):
         """Show the main menu screen"""
-        self.clear()
-        tk.Label(self.root, text="🎵 AI Music Theory Trainer", font=("Helvetica", 18)).pack(pady=20)
-        tk.Button(self.root, text="🎧 Start Ear Training", width=30, command=self.start_ear_training).pack(pady=5)
-        tk.Button(self.root, text="❌ Exit", width=30, command=self.root.quit).pack(pady=5)
+        if self.menu is None:
+            self.menu = tk.Frame(self.screens)
+            self.menu.grid(row=0, column=0, sticky="nsew")
+            tk.Label(self.menu, text="🎵 AI Music Theory Trainer", font=("Helvetica", 18)).pack(pady=20)
+            tk.Button(self.menu, text="🎧 Start Ear Training", width=30, command=self.start_ear_training).pack(pady=5)
+            tk.Button(self.menu, text="❌ Exit", width=30, command=self.root.quit).pack(pady=5)
+        self.menu.tkraise()
 
     def start_ear_training(self):
         """Start the ear training module"""
-        self.trainer = EarTraining(self.root, self.show_main_menu)
-        self.trainer.start()
-
-    def clear(self):
-        """Clear all widgets from the root"""
-        for widget in self.root.winfo_children():
-            widget.destroy()
-
-def main():
+        if self.trainer is None:
+            self.trainer = EarTraining(self.screens, self.show_main_menu, self.store)
+            self.trainer.start().grid(row=0, column=0, sticky="nsew")
+        self.trainer.frame.tkraise()
+
+def warm_up():
+    """Import numpy, pick an audio backend and load samples; runs first on the audio thread"""
+    startup.preload("numpy")
+    audio_backends.current()
+    SAMPLE_BANK.load(BANK_FILE)
+    startup.mark("audio ready")
+    startup.report()
+
+def first_window():
+    startup.mark("first window")
+    SCHEDULER.submit(warm_up)
+
+def create_app():
     root = tk.Tk()
     root.geometry("1000x750")
-    app = MainApp(root)
+    SCHEDULER.attach(root)
+    app = MainApp(root, session_store.open_default())
+    root.after_idle(first_window)
+    return root, app
+
+def main():
+    root, app = create_app()
     root.mainloop()
+    if app.store is not None:
+        app.store.close()
 
 if __name__ == "__main__":
     main()
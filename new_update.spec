@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('audio/*', 'audio')],
-    hiddenimports=[],
+    hiddenimports=['numpy', 'simpleaudio'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -1,15 +1,23 @@
+import startup
 import tkinter as tk
 import random
 import time
-import numpy as np
-import simpleaudio as sa
-
-NOTE_NAMES = [
-    'C4', 'Cs4', 'D4', 'Ds4', 'E4', 'F4', 'Fs4', 'G4', 'Gs4', 'A4', 'As4', 'B4',
-    'C5', 'Cs5', 'D5'
-]
-
-NOTE_FILES = {note: f"audio/{note}.wav" for note in NOTE_NAMES}
+from sample_bank import SampleBank
+from keyboard_bank import KeyboardBank, KEYBOARD
+from pitch import note_range
+from audio_scheduler import AudioScheduler
+import audio_backends
+from mixer import play_mix, play_sequence, INTERVAL_GAP, SCALE_GAP
+
+startup.mark("modules imported")
+
+NOTE_NAMES = note_range("C4", "C6")
+
+NOTE_FILES = {note: f"audio/{note}.wav" for note in KEYBOARD}
+BANK_FILE = "audio/notes.bank"
+SAMPLE_BANK = KeyboardBank(SampleBank(NOTE_FILES))
+SCHEDULER = AudioScheduler()
+SCHEDULER.start()
 INTERVALS = [
     "Unison", "m2", "M2", "m3", "M3", "P4", "TT", "P5", "m6", "M6", "m7", "M7", "Octave"
 ]
@@ -26,49 +34,49 @@ SCALES = {
 }
 
 def play_note(note):
-    if note in NOTE_FILES:
+    if note in SAMPLE_BANK:
         try:
-            wave_obj = sa.WaveObject.from_wave_file(NOTE_FILES[note])
-            play_obj = wave_obj.play()
+            play_obj = SAMPLE_BANK.play(note)
             play_obj.wait_done()
         except Exception as e:
             print(f"Error playing note {note}: {e}")
 
+def play_notes(notes, gap):
+    buffers = [b for b in (SAMPLE_BANK.buffer(note) for note in notes) if b is not None]
+    if not buffers:
+        return
+    play_obj = play_sequence(buffers, gap)
+    play_obj.wait_done()
+
 def play_interval(start_index, interval):
     if start_index < 0 or start_index + interval >= len(NOTE_NAMES):
         print("⚠ Interval out of range.")
         return
-    play_note(NOTE_NAMES[start_index])
-    time.sleep(0.4)
-    play_note(NOTE_NAMES[start_index + interval])
+    play_notes([NOTE_NAMES[start_index], NOTE_NAMES[start_index + interval]], INTERVAL_GAP)
 
 def play_chord(root_index, intervals):
     if any(root_index + i >= len(NOTE_NAMES) for i in intervals):
         print("⚠ Chord notes out of range.")
         return
-    objs = []
+    buffers = []
     for i in intervals:
-        note = NOTE_NAMES[root_index + i]
-        try:
-            wave_obj = sa.WaveObject.from_wave_file(NOTE_FILES[note])
-            objs.append(wave_obj.play())
-        except:
-            pass
+        buffer = SAMPLE_BANK.buffer(NOTE_NAMES[root_index + i])
+        if buffer is not None:
+            buffers.append(buffer)
+    if not buffers:
+        return
+    play_obj = play_mix(buffers)
     time.sleep(1)
-    for obj in objs:
-        obj.wait_done()
+    play_obj.wait_done()
 
 def play_scale(root_index, intervals):
-    for i in intervals:
-        note_index = root_index + i
-        if 0 <= note_index < len(NOTE_NAMES):
-            play_note(NOTE_NAMES[note_index])
-            time.sleep(0.25)
+    play_notes([NOTE_NAMES[root_index + i] for i in intervals if 0 <= root_index + i < len(NOTE_NAMES)], SCALE_GAP)
 
 class EarTraining:
     def __init__(self, root, back_callback):
         self.root = root
         self.back_callback = back_callback
+        self.frame = None
         self.stats = {i: {"correct": 0, "wrong": 0} for i in range(13)}
         self.streak = 0
         self.max_streak = 0
@@ -77,10 +85,13 @@ class EarTraining:
         self.mistakes = []
 
     def start(self):
-        self.clear()
-        tk.Label(self.root, text="🎧 Full Ear Training Suite", font=("Helvetica", 16)).pack(pady=10)
+        """Build the training screen on first use and return its frame"""
+        if self.frame is not None:
+            return self.frame
+        self.frame = tk.Frame(self.root)
+        tk.Label(self.frame, text="🎧 Full Ear Training Suite", font=("Helvetica", 16)).pack(pady=10)
 
-        interval_frame = tk.LabelFrame(self.root, text="Intervals", padx=10, pady=5)
+        interval_frame = tk.LabelFrame(self.frame, text="Intervals", padx=10, pady=5)
         interval_frame.pack(pady=5)
         tk.Button(interval_frame, text="▶ Play Interval", command=self.generate_interval).pack(pady=2)
         self.interval_feedback = tk.Label(interval_frame, text="")
@@ -91,7 +102,7 @@ class EarTraining:
             btn = tk.Button(btn_frame, text=name, width=6, command=lambda i=i: self.check_interval(i))
             btn.grid(row=i//7, column=i%7, padx=2, pady=2)
 
-        note_frame = tk.LabelFrame(self.root, text="Notes", padx=10, pady=5)
+        note_frame = tk.LabelFrame(self.frame, text="Notes", padx=10, pady=5)
         note_frame.pack(pady=5)
         tk.Button(note_frame, text="▶ Play Note", command=self.generate_note).pack(pady=2)
         self.note_feedback = tk.Label(note_frame, text="")
@@ -102,7 +113,7 @@ class EarTraining:
             btn = tk.Button(grid, text=note, width=4, command=lambda i=i: self.check_note(i))
             btn.grid(row=i//8, column=i%8, padx=2, pady=2)
 
-        chord_frame = tk.LabelFrame(self.root, text="Chords", padx=10, pady=5)
+        chord_frame = tk.LabelFrame(self.frame, text="Chords", padx=10, pady=5)
         chord_frame.pack(pady=5)
         tk.Button(chord_frame, text="▶ Play Chord", command=self.generate_chord).pack(pady=2)
         self.chord_feedback = tk.Label(chord_frame, text="")
@@ -112,7 +123,7 @@ class EarTraining:
         for name in CHORDS:
             tk.Button(chord_btns, text=name, width=10, command=lambda n=name: self.check_chord(n)).pack(side=tk.LEFT, padx=5)
 
-        scale_frame = tk.LabelFrame(self.root, text="Scales", padx=10, pady=5)
+        scale_frame = tk.LabelFrame(self.frame, text="Scales", padx=10, pady=5)
         scale_frame.pack(pady=5)
         tk.Button(scale_frame, text="▶ Play Scale", command=self.generate_scale).pack(pady=2)
         self.scale_feedback = tk.Label(scale_frame, text="")
@@ -122,7 +133,7 @@ class EarTraining:
         for name in SCALES:
             tk.Button(scale_btns, text=name, width=15, command=lambda n=name: self.check_scale(n)).pack(side=tk.LEFT, padx=5)
 
-        extra_frame = tk.Frame(self.root)
+        extra_frame = tk.Frame(self.frame)
         extra_frame.pack(pady=10)
         for text, cmd in [
             ("🏆 Achievements", self.achievements),
@@ -133,21 +144,18 @@ class EarTraining:
         ]:
             tk.Button(extra_frame, text=text, width=25, command=cmd).pack(pady=2)
 
-        tk.Button(self.root, text="⬅ Back to Menu", command=self.back_callback).pack(pady=10)
-
-    def clear(self):
-        for widget in self.root.winfo_children():
-            widget.destroy()
+        tk.Button(self.frame, text="⬅ Back to Menu", command=self.back_callback).pack(pady=10)
+        return self.frame
 
     def generate_interval(self):
         weights = [(self.stats[i]['wrong'] + 1) / (self.stats[i]['correct'] + 1) for i in range(13)]
-        self.current_interval = np.random.choice(range(13), p=np.array(weights)/sum(weights))
+        self.current_interval = random.choices(range(13), weights=weights)[0]
         max_base = len(NOTE_NAMES) - self.current_interval - 1
         if max_base < 0:
             self.interval_feedback.config(text="⚠ Not enough notes to play this interval.")
             return
         self.base_index = random.randint(0, max_base)
-        play_interval(self.base_index, self.current_interval)
+        SCHEDULER.submit(play_interval, self.base_index, self.current_interval)
         self.interval_feedback.config(text="Interval played.")
 
     def check_interval(self, guess):
@@ -165,7 +173,7 @@ class EarTraining:
 
     def generate_note(self):
         self.note_index = random.randint(0, len(NOTE_NAMES) - 1)
-        play_note(NOTE_NAMES[self.note_index])
+        SCHEDULER.submit(play_note, NOTE_NAMES[self.note_index])
         self.note_feedback.config(text="Note played.")
 
     def check_note(self, guess):
@@ -181,7 +189,7 @@ class EarTraining:
             self.chord_feedback.config(text="⚠ Not enough notes for this chord.")
             return
         self.chord_root = random.randint(0, max_root)
-        play_chord(self.chord_root, intervals)
+        SCHEDULER.submit(play_chord, self.chord_root, intervals)
         self.chord_feedback.config(text="Chord played.")
 
     def check_chord(self, guess):
@@ -197,7 +205,7 @@ class EarTraining:
             self.scale_feedback.config(text="⚠ Not enough notes for this scale.")
             return
         self.scale_root = random.randint(0, max_root)
-        play_scale(self.scale_root, intervals)
+        SCHEDULER.submit(play_scale, self.scale_root, intervals)
         self.scale_feedback.config(text="Scale played.")
 
     def check_scale(self, guess):
@@ -246,33 +254,60 @@ class EarTraining:
                 self.interval_feedback.config(text="⚠ Not enough notes to review this interval.")
                 return
             self.base_index = random.randint(0, max_base)
-            play_interval(self.base_index, interval)
+            SCHEDULER.submit(play_interval, self.base_index, interval)
             self.interval_feedback.config(text=f"🔁 Reviewing: {INTERVALS[interval]}")
 
 class MainApp:
     def __init__(self, root):
         self.root = root
         self.root.title("AI Music Theory Trainer")
+        # Screens are built once and stacked in one grid cell; switching
+        # raises the wanted one, so widgets and their state survive
+        self.screens = tk.Frame(self.root)
+        self.screens.pack(fill=tk.BOTH, expand=True)
+        self.screens.grid_rowconfigure(0, weight=1)
+        self.screens.grid_columnconfigure(0, weight=1)
+        self.menu = None
+        self.trainer = None
         self.show_main_menu()
 
     def show_main_menu(self):
-        self.clear()
-        tk.Label(self.root, text="🎵 AI Music Theory Trainer", font=("Helvetica", 18)).pack(pady=20)
-        tk.Button(self.root, text="🎧 Start Ear Training", width=30, command=self.start_ear_training).pack(pady=5)
-        tk.Button(self.root, text="❌ Exit", width=30, command=self.root.quit).pack(pady=5)
+        if self.menu is None:
+            self.menu = tk.Frame(self.screens)
+            self.menu.grid(row=0, column=0, sticky="nsew")
+            tk.Label(self.menu, text="🎵 AI Music Theory Trainer", font=("Helvetica", 18)).pack(pady=20)
+            tk.Button(self.menu, text="🎧 Start Ear Training", width=30, command=self.start_ear_training).pack(pady=5)
+            tk.Button(self.menu, text="❌ Exit", width=30, command=self.root.quit).pack(pady=5)
+        self.menu.tkraise()
 
     def start_ear_training(self):
-        self.trainer = EarTraining(self.root, self.show_main_menu)
-        self.trainer.start()
-
-    def clear(self):
-        for widget in self.root.winfo_children():
-            widget.destroy()
-
-def main():
+        if self.trainer is None:
+            self.trainer = EarTraining(self.screens, self.show_main_menu)
+            self.trainer.start().grid(row=0, column=0, sticky="nsew")
+        self.trainer.frame.tkraise()
+
+def warm_up():
+    """Import numpy, pick an audio backend and load samples; runs first on the audio thread"""
+    startup.preload("numpy")
+    audio_backends.current()
+    SAMPLE_BANK.load(BANK_FILE)
+    startup.mark("audio ready")
+    startup.report()
+
+def first_window():
+    startup.mark("first window")
+    SCHEDULER.submit(warm_up)
+
+def create_app():
     root = tk.Tk()
     root.geometry("1000x750")
+    SCHEDULER.attach(root)
     app = MainApp(root)
+    root.after_idle(first_window)
+    return root, app
+
+def main():
+    root, app = create_app()
     root.mainloop()
 
 if __name__ == "__main__":
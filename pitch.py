@@ -0,0 +1,101 @@
+"""Pitches as MIDI numbers, with lookup tables instead of string work.
+
+Note names are parsed once: 'C4', 'Cs4', 'C#4', 'Db4', 'Bbb3', 'C-1' and
+'C10' all work, and every name of the 128 MIDI keys is pre-parsed so the
+common case is a single dict lookup. Frequencies and canonical names
+(the 'Cs4' spelling the audio files use) come from precomputed tables:
+
+    note_to_midi("Db4") -> 61        midi_to_note(61) -> 'Cs4'
+    midi_to_freq(69) -> 440.0        note_to_freq("A4") -> 440.0
+
+notes_to_midi() and midi_to_freqs() convert whole sequences to numpy arrays.
+"""
+from startup import lazy_import
+
+np = lazy_import("numpy")
+
+PITCH_CLASSES = ['C', 'Cs', 'D', 'Ds', 'E', 'F', 'Fs', 'G', 'Gs', 'A', 'As', 'B']
+LETTERS = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+ACCIDENTALS = {'s': 1, '#': 1, 'b': -1}
+MIDI_KEYS = 128
+A4_MIDI = 69
+A4_FREQ = 440.0
+
+FREQUENCIES = [A4_FREQ * 2 ** ((m - A4_MIDI) / 12) for m in range(MIDI_KEYS)]
+NAMES = [f"{PITCH_CLASSES[m % 12]}{m // 12 - 1}" for m in range(MIDI_KEYS)]
+
+
+def parse(note):
+    """MIDI number for any spelling: letter, accidentals (s, #, b), octave"""
+    letter = LETTERS.get(note[:1].upper())
+    if letter is None:
+        raise ValueError(f"Unrecognised note name: {note}")
+    i = 1
+    while i < len(note) and note[i] in ACCIDENTALS:
+        letter += ACCIDENTALS[note[i]]
+        i += 1
+    try:
+        octave = int(note[i:])
+    except ValueError:
+        raise ValueError(f"Unrecognised note name: {note}") from None
+    return letter + (octave + 1) * 12
+
+
+def _spellings():
+    """Every common spelling of the 128 keys: 'Cs4', 'C#4' and 'Db4'"""
+    lookup = {}
+    for midi, name in enumerate(NAMES):
+        lookup[name] = midi
+        key, octave = PITCH_CLASSES[midi % 12], midi // 12 - 1
+        if key.endswith('s'):
+            lookup[f"{key[0]}#{octave}"] = midi
+            lookup[f"{PITCH_CLASSES[(midi + 1) % 12]}b{octave}"] = midi
+    return lookup
+
+
+_MIDI = _spellings()
+
+
+def note_to_midi(note):
+    midi = _MIDI.get(note)
+    return midi if midi is not None else parse(note)
+
+
+def midi_to_note(midi):
+    return NAMES[midi] if 0 <= midi < MIDI_KEYS else f"{PITCH_CLASSES[midi % 12]}{midi // 12 - 1}"
+
+
+def midi_to_freq(midi):
+    return FREQUENCIES[midi] if 0 <= midi < MIDI_KEYS else A4_FREQ * 2 ** ((midi - A4_MIDI) / 12)
+
+
+def note_to_freq(note):
+    return midi_to_freq(note_to_midi(note))
+
+
+def note_range(low, high):
+    """Note names from low to high inclusive, e.g. note_range("C4", "C6")"""
+    return [midi_to_note(m) for m in range(note_to_midi(low), note_to_midi(high) + 1)]
+
+
+_freq_array = None
+
+
+def notes_to_midi(notes):
+    """int array of MIDI numbers for a sequence of note names"""
+    return np.fromiter((note_to_midi(note) for note in notes), dtype=np.int64, count=len(notes))
+
+
+def midi_to_freqs(midis):
+    """float64 array of frequencies for an array of MIDI numbers, by table lookup"""
+    global _freq_array
+    if _freq_array is None:
+        _freq_array = np.array(FREQUENCIES)
+    midis = np.asarray(midis, dtype=np.int64)
+    if midis.size and (midis.min() < 0 or midis.max() >= MIDI_KEYS):
+        return A4_FREQ * 2.0 ** ((midis - A4_MIDI) / 12)
+    return _freq_array[midis]
+
+
+def notes_to_freqs(notes):
+    return midi_to_freqs(notes_to_midi(notes))
@@ -0,0 +1,44 @@
+"""Answer choices and question audio shared by the trainer service and quiz packs.
+
+load_bank() opens the full-keyboard bank over a folder of note files, and
+render_pcm() turns a Question into one mono int16 buffer, mixed, spaced or
+overlapped as its exercise's PLAYBACK entry says.
+"""
+import os
+
+from exercise_session import NOTE_NAMES, INTERVALS, CHORDS, SCALES, PLAYBACK
+from keyboard_bank import KeyboardBank, KEYBOARD
+from mixer import mix, overlap_add, render_sequence
+from sample_bank import SampleBank
+
+CHOICES = {
+    "interval": INTERVALS,
+    "note": NOTE_NAMES,
+    "chord": list(CHORDS),
+    "scale": list(SCALES),
+    "melody": list(range(1, max(len(offsets) for offsets in SCALES.values()) + 1)),  # Scale degrees
+}
+
+
+def load_bank(audio_dir, warn=True):
+    """Full-keyboard bank over the note files (and pack) found in audio_dir"""
+    note_files = {}
+    for note in KEYBOARD:
+        path = os.path.join(audio_dir, f"{note}.wav")
+        if os.path.exists(path):
+            note_files[note] = path
+    bank = KeyboardBank(SampleBank(note_files)).load(os.path.join(audio_dir, "notes.bank"))
+    if warn and not bank.anchors:
+        print(f"Warning: No note samples in {audio_dir}; notes will be synthesized")
+    return bank
+
+
+def render_pcm(bank, question):
+    """Render a question into one mono int16 buffer"""
+    buffers = [b for b in (bank.buffer(note) for note in question.notes) if b is not None]
+    mode, gap = PLAYBACK[question.exercise]
+    if mode == "mix":
+        return mix(buffers)
+    if mode == "phrase":
+        return overlap_add(buffers, gap)
+    return render_sequence(buffers, gap)
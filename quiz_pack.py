@@ -0,0 +1,180 @@
+"""Render offline practice sets ("quiz packs") in bulk.
+
+    python quiz_pack.py --count 40 --packs 200 --exercises interval chord scale --out packs
+
+Each pack is one file: a fixed header, the question list as JSON, then every
+question's audio back to back as mono int16 PCM. Questions are drawn up
+front, identical ones across all packs are rendered once, and rendering is
+spread over a process pool.
+"""
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from exercise_session import (EXERCISES, MELODY_LENGTH, Question, answer_label, build_sampler,
+                              question_notes, random_melody)
+from mixer import SAMPLE_RATE
+from question_audio import CHOICES, load_bank, render_pcm
+
+QUIZ_MAGIC = b"QUIZPACK"
+QUIZ_VERSION = 1
+QUIZ_HEADER = struct.Struct("<8sHIHHQ")  # magic, version, rate, channels, width, metadata bytes
+QUIZ_ALIGN = 64
+DEFAULT_EXERCISES = ["interval", "chord", "scale"]
+
+_bank = None  # Per worker process
+
+
+def draw_questions(count, exercises, rng):
+    """count questions spread evenly over exercises, then over items and roots"""
+    sampler = build_sampler()
+    sampler.rng = rng
+    questions = []
+    for i in range(count):
+        exercise = exercises[i % len(exercises)]
+        item, root = sampler.sample(exercise)
+        degrees = random_melody(item, MELODY_LENGTH, rng) if exercise == "melody" else None
+        questions.append(Question(exercise, item, root, question_notes(exercise, item, root, degrees), degrees))
+    rng.shuffle(questions)
+    return questions
+
+
+def audio_key(question):
+    """Questions with equal keys sound the same"""
+    return question.exercise, tuple(question.notes)
+
+
+def _init_worker(audio_dir):
+    global _bank
+    _bank = load_bank(audio_dir, warn=False)
+
+
+def render_job(question):
+    """Render one question to PCM bytes; runs in a worker process"""
+    return render_pcm(_bank, question).astype("<i2").tobytes()
+
+
+def render_all(questions, audio_dir="audio", workers=None):
+    """PCM for each distinct question, keyed by audio_key(), rendered across processes"""
+    unique = {}
+    for q in questions:
+        unique.setdefault(audio_key(q), q)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(audio_dir,)) as pool:
+        rendered = pool.map(render_job, unique.values(), chunksize=16)
+        return dict(zip(unique, rendered))
+
+
+def write_quiz_pack(path, questions, audio, seed=None):
+    """Write questions and their audio (keyed by audio_key()) as one pack file"""
+
+    def align(n):
+        return (n + QUIZ_ALIGN - 1) // QUIZ_ALIGN * QUIZ_ALIGN
+
+    blobs, offsets, entries = [], {}, []
+    blob_size = 0
+    for q in questions:
+        key = audio_key(q)
+        if key not in offsets:
+            offsets[key] = blob_size
+            blobs.append(audio[key])
+            blob_size = align(blob_size + len(audio[key]))
+        entries.append({
+            "exercise": q.exercise,
+            "answer": answer_label(q.exercise, q.degrees if q.exercise == "melody" else q.item),
+            "notes": q.notes,
+            "offset": offsets[key],
+            "frames": len(audio[key]) // 2,
+        })
+    metadata = json.dumps({
+        "seed": seed,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "choices": {ex: CHOICES[ex] for ex in sorted({q.exercise for q in questions})},
+        "questions": entries,
+    }, separators=(",", ":")).encode()
+    data_start = align(QUIZ_HEADER.size + len(metadata))
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(QUIZ_HEADER.pack(QUIZ_MAGIC, QUIZ_VERSION, SAMPLE_RATE, 1, 2, len(metadata)))
+        f.write(metadata)
+        offset = 0
+        for data in blobs:
+            f.seek(data_start + offset)
+            f.write(data)
+            offset = align(offset + len(data))
+        f.truncate(data_start + blob_size)
+    os.replace(tmp, path)
+    return len(entries)
+
+
+class QuizPack:
+    """A quiz pack opened for reading; audio is served straight from the mapped file"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rate, channels, width, meta_len = QUIZ_HEADER.unpack_from(self.map, 0)
+        if magic != QUIZ_MAGIC or version != QUIZ_VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a version {QUIZ_VERSION} quiz pack")
+        self.sample_rate, self.num_channels, self.bytes_per_sample = rate, channels, width
+        start = QUIZ_HEADER.size
+        self.metadata = json.loads(self.map[start:start + meta_len])
+        self.questions = self.metadata["questions"]
+        self.data_start = (start + meta_len + QUIZ_ALIGN - 1) // QUIZ_ALIGN * QUIZ_ALIGN
+
+    def __len__(self):
+        return len(self.questions)
+
+    def audio(self, index):
+        """Zero-copy view of one question's PCM; release() it (or copy it with bytes()) before close()"""
+        q = self.questions[index]
+        start = self.data_start + q["offset"]
+        return memoryview(self.map)[start:start + q["frames"] * self.bytes_per_sample]
+
+    def close(self):
+        """Unmap the file. Raises BufferError while any view from audio() is still alive."""
+        self.map.close()
+
+
+def generate(out_dir="packs", count=20, packs=1, exercises=DEFAULT_EXERCISES, audio_dir="audio",
+             seed=None, workers=None):
+    """Draw and render packs quiz packs of count questions each; returns their paths"""
+    for exercise in exercises:
+        if exercise not in EXERCISES:
+            raise ValueError(f"Unknown exercise: {exercise}")
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    os.makedirs(out_dir, exist_ok=True)
+    sets = [draw_questions(count, list(exercises), random.Random(seed + i)) for i in range(packs)]
+    audio = render_all([q for questions in sets for q in questions], audio_dir, workers)
+    paths = []
+    for i, questions in enumerate(sets):
+        path = os.path.join(out_dir, f"quiz_{i + 1:03d}.pack")
+        write_quiz_pack(path, questions, audio, seed + i)
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render offline ear-training quiz packs")
+    parser.add_argument("--count", type=int, default=20, help="questions per pack (default: 20)")
+    parser.add_argument("--packs", type=int, default=1, help="number of packs, each with its own questions")
+    parser.add_argument("--exercises", nargs="+", default=DEFAULT_EXERCISES, choices=EXERCISES)
+    parser.add_argument("--audio", default="audio", help="folder with note WAVs or notes.bank")
+    parser.add_argument("--out", default="packs", help="output folder (default: packs)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible packs")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    paths = generate(args.out, args.count, args.packs, args.exercises, args.audio, args.seed, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {len(paths)} quiz packs of {args.count} questions written to {args.out}/ ({elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
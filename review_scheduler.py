@@ -0,0 +1,96 @@
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+
+# Seconds until the next review for each Leitner box; a wrong answer goes
+# back to box 0 (due straight away), a right one moves up a box.
+BOX_INTERVALS = [0, 60, 10 * 60, 60 * 60, 24 * 60 * 60, 4 * 24 * 60 * 60, 14 * 24 * 60 * 60]
+MAX_ITEMS = 1000
+
+
+class ReviewScheduler:
+    """Leitner-style review queue over (exercise, item) keys.
+
+    Each key is tracked once however often it is missed. A min-heap keyed by
+    due time gives the next review in O(log n); rescheduling pushes a fresh
+    heap entry and older ones are skipped when they surface. Items that pass
+    the last box graduate and are dropped, and the least recently answered
+    item is evicted once max_items are tracked, so memory stays bounded.
+    """
+
+    def __init__(self, max_items=MAX_ITEMS, clock=time.time):
+        self.max_items = max_items
+        self.clock = clock
+        self.entries = OrderedDict()  # key -> (box, due, seq)
+        self.heap = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def record(self, exercise, item, correct, now=None):
+        """Update an item after an answer; only mistakes start tracking it"""
+        key = (exercise, item)
+        now = self.clock() if now is None else now
+        entry = self.entries.get(key)
+        if correct:
+            if entry is None:
+                return
+            box = entry[0] + 1
+            if box >= len(BOX_INTERVALS):
+                del self.entries[key]
+                self._maybe_compact()
+                return
+        else:
+            box = 0
+        self._schedule(key, box, now + BOX_INTERVALS[box])
+
+    def _schedule(self, key, box, due):
+        seq = next(self._seq)
+        self.entries[key] = (box, due, seq)
+        self.entries.move_to_end(key)
+        heapq.heappush(self.heap, (due, seq, key))
+        while len(self.entries) > self.max_items:
+            self.entries.popitem(last=False)
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        # Stale heap entries pile up as items are rescheduled; rebuild once
+        # they outnumber live ones so the heap stays O(max_items)
+        if len(self.heap) > 2 * len(self.entries) + 16:
+            self.heap = [(due, seq, key) for key, (_, due, seq) in self.entries.items()]
+            heapq.heapify(self.heap)
+
+    def _peek(self):
+        while self.heap:
+            due, seq, key = self.heap[0]
+            entry = self.entries.get(key)
+            if entry is not None and entry[2] == seq:
+                return due, key
+            heapq.heappop(self.heap)
+        return None
+
+    def next_due(self, now=None):
+        """The (exercise, item) most overdue for review, or None if nothing is due"""
+        now = self.clock() if now is None else now
+        top = self._peek()
+        if top is None or top[0] > now:
+            return None
+        return top[1]
+
+    def seconds_until_next(self, now=None):
+        """Seconds until the next item falls due, or None if nothing is tracked"""
+        now = self.clock() if now is None else now
+        top = self._peek()
+        return None if top is None else max(0.0, top[0] - now)
+
+    def to_state(self):
+        return [[exercise, item, box, due] for (exercise, item), (box, due, _) in self.entries.items()]
+
+    def load_state(self, state):
+        for exercise, item, box, due in state:
+            self._schedule((exercise, item), box, due)
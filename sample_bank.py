@@ -0,0 +1,176 @@
+import mmap
+import os
+import struct
+import sys
+import wave
+import audio_backends
+from startup import lazy_import
+
+np = lazy_import("numpy")
+
+# Packed bank layout: header, index of (name, offset, frames), then the PCM
+# for every note back to back. All offsets are from the start of the file.
+PACK_MAGIC = b"NOTEBANK"
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct("<8sHIHHI")  # magic, version, rate, channels, width, count
+PACK_ENTRY = struct.Struct("<16sQQ")     # note name, data offset, frame count
+PACK_ALIGN = 64
+
+
+class Sample:
+    """Decoded PCM data for one note, held read-only in memory"""
+
+    def __init__(self, data, num_channels, bytes_per_sample, sample_rate):
+        # memoryviews (slices of a mapped pack) are kept as-is to stay zero-copy
+        self.data = data if isinstance(data, memoryview) else bytes(data)
+        self.num_channels = num_channels
+        self.bytes_per_sample = bytes_per_sample
+        self.sample_rate = sample_rate
+
+    def samples(self):
+        """Return the PCM data as a read-only int16 array (no copy)"""
+        return np.frombuffer(self.data, dtype=np.int16)
+
+    def duration(self):
+        """Length of the sample in seconds"""
+        frames = len(self.data) // (self.num_channels * self.bytes_per_sample)
+        return frames / self.sample_rate
+
+    def play(self):
+        """Start playback from memory and return the play object"""
+        return audio_backends.play_buffer(self.data, self.num_channels, self.bytes_per_sample, self.sample_rate)
+
+
+class SampleBank:
+    """Decodes every note file once and serves later playback from memory"""
+
+    def __init__(self, note_files):
+        self.note_files = dict(note_files)
+        self.samples = {}
+        self.hits = 0
+        self.misses = 0
+        self.disk_reads = 0
+        self.pack = None
+
+    def load(self, pack_path=None):
+        """Map the packed bank if there is one, then decode any remaining note files"""
+        if pack_path and os.path.exists(pack_path):
+            try:
+                self.load_pack(pack_path)
+            except Exception as e:
+                print(f"Error loading sample pack {pack_path}: {e}")
+        for note, path in self.note_files.items():
+            if note in self.samples or not os.path.exists(path):
+                continue
+            try:
+                self.samples[note] = self._decode(path)
+            except Exception as e:
+                print(f"Error loading {note}: {e}")
+        return self
+
+    def load_pack(self, path):
+        """mmap a packed bank and expose each note as a zero-copy slice"""
+        with open(path, 'rb') as f:
+            pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.disk_reads += 1
+        magic, version, rate, channels, width, count = PACK_HEADER.unpack_from(pack, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            pack.close()
+            raise ValueError(f"{path} is not a version {PACK_VERSION} sample pack")
+        view = memoryview(pack)
+        frame_bytes = channels * width
+        for i in range(count):
+            name, offset, frames = PACK_ENTRY.unpack_from(pack, PACK_HEADER.size + i * PACK_ENTRY.size)
+            note = name.rstrip(b"\0").decode()
+            self.samples[note] = Sample(view[offset:offset + frames * frame_bytes], channels, width, rate)
+        self.pack = pack
+        return self
+
+    def _decode(self, path):
+        self.disk_reads += 1
+        with wave.open(path, 'rb') as wf:
+            return Sample(
+                wf.readframes(wf.getnframes()),
+                wf.getnchannels(),
+                wf.getsampwidth(),
+                wf.getframerate(),
+            )
+
+    def __contains__(self, note):
+        return note in self.samples
+
+    def get(self, note):
+        """Return the cached sample for a note, or None if it was never loaded"""
+        sample = self.samples.get(note)
+        if sample is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return sample
+
+    def buffer(self, note):
+        """Return a note's PCM as an int16 array, or None if it is not in the bank"""
+        sample = self.get(note)
+        if sample is None:
+            return None
+        return sample.samples()
+
+    def play(self, note):
+        """Play a note from memory, returning None if it is not in the bank"""
+        sample = self.get(note)
+        if sample is None:
+            return None
+        return sample.play()
+
+    def stats(self):
+        """Hit/miss counters; disk_reads should stay flat after warm-up"""
+        return {
+            "loaded": len(self.samples),
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_reads": self.disk_reads,
+        }
+
+
+def write_pack(note_files, path):
+    """Pack the given note .wav files into one bank file for SampleBank.load"""
+    entries = []
+    fmt = None
+    for note, wav_path in note_files.items():
+        if not os.path.exists(wav_path):
+            continue
+        with wave.open(wav_path, 'rb') as wf:
+            note_fmt = (wf.getframerate(), wf.getnchannels(), wf.getsampwidth())
+            if fmt is None:
+                fmt = note_fmt
+            elif note_fmt != fmt:
+                raise ValueError(f"{wav_path} does not match the format of the other notes")
+            entries.append((note, wf.getnframes(), wf.readframes(wf.getnframes())))
+    if fmt is None:
+        raise ValueError("No note files found to pack")
+
+    def align(n):
+        return (n + PACK_ALIGN - 1) // PACK_ALIGN * PACK_ALIGN
+
+    offset = align(PACK_HEADER.size + PACK_ENTRY.size * len(entries))
+    index = []
+    for note, frames, data in entries:
+        index.append(PACK_ENTRY.pack(note.encode(), offset, frames))
+        offset = align(offset + len(data))
+    tmp = path + ".tmp"
+    with open(tmp, 'wb') as f:
+        f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, *fmt, len(entries)))
+        f.write(b"".join(index))
+        for (note, frames, data), entry in zip(entries, index):
+            f.seek(PACK_ENTRY.unpack(entry)[1])
+            f.write(data)
+    os.replace(tmp, path)
+    return len(entries)
+
+
+if __name__ == "__main__":
+    # python sample_bank.py <audio folder> [bank file]
+    folder = sys.argv[1] if len(sys.argv) > 1 else "audio"
+    out = sys.argv[2] if len(sys.argv) > 2 else os.path.join(folder, "notes.bank")
+    wavs = {name[:-4]: os.path.join(folder, name) for name in sorted(os.listdir(folder)) if name.endswith(".wav")}
+    print(f"Packed {write_pack(wavs, out)} notes into {out}")
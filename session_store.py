@@ -0,0 +1,198 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+BATCH_SIZE = 64       # Max writes per transaction
+BATCH_WAIT = 0.25     # Seconds to wait for more writes before committing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    learner TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    item TEXT NOT NULL,
+    root TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    answered_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counts (
+    learner TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    item TEXT NOT NULL,
+    root TEXT NOT NULL,
+    correct INTEGER NOT NULL DEFAULT 0,
+    wrong INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (learner, exercise, item, root)
+);
+CREATE TABLE IF NOT EXISTS learner_state (
+    learner TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    saved_at REAL NOT NULL
+);
+"""
+
+
+def default_path():
+    """Per-user database on local disk (TRAINER_DB overrides it)"""
+    if os.environ.get("TRAINER_DB"):
+        return os.environ["TRAINER_DB"]
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "ai_music_trainer", "sessions.db")
+
+
+def default_learner():
+    if os.environ.get("TRAINER_LEARNER"):
+        return os.environ["TRAINER_LEARNER"]
+    try:
+        import getpass
+        return getpass.getuser()
+    except Exception:
+        return "default"
+
+
+def connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class SessionDatabase:
+    """One SQLite file (WAL mode) and one writer thread, shared by any number of learners.
+
+    Writes are only enqueued; the writer thread groups queued writes from
+    every learner into one transaction. Only each learner's newest state
+    in a batch is built, serialized and written.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = connect(self.path)
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self.writes = queue.Queue()
+        self.writer = threading.Thread(target=self._run, name="SessionStore", daemon=True)
+        self.writer.start()
+
+    def store(self, learner=None):
+        return SessionStore(learner=learner, database=self)
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is committed"""
+        done = threading.Event()
+        self.writes.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self):
+        done = threading.Event()
+        self.writes.put(("stop", done))
+        done.wait(5.0)
+        self.writer.join(5.0)
+        self.conn.close()
+
+    def _run(self):
+        conn = connect(self.path)
+        while True:
+            batch = [self.writes.get()]
+            deadline = time.monotonic() + BATCH_WAIT
+            while len(batch) < BATCH_SIZE and batch[-1][0] not in ("flush", "stop"):
+                try:
+                    batch.append(self.writes.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self._write(conn, batch)
+            except Exception as e:  # A failed batch, even a bad snapshot, must not stop the writer
+                print(f"Error saving session: {e}")
+            for kind, payload in batch:
+                if kind in ("flush", "stop"):
+                    payload.set()
+            if batch[-1][0] == "stop":
+                conn.close()
+                return
+
+    def _write(self, conn, batch):
+        answers = [payload for kind, payload in batch if kind == "answer"]
+        states = dict(payload for kind, payload in batch if kind == "state")
+        if not answers and not states:
+            return
+        states = {learner: json.dumps(state() if callable(state) else state) for learner, state in states.items()}
+        with conn:
+            if answers:
+                conn.executemany(
+                    "INSERT INTO answers (learner, exercise, item, root, correct, answered_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    answers)
+                conn.executemany(
+                    "INSERT INTO counts (learner, exercise, item, root, correct, wrong) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (learner, exercise, item, root) DO UPDATE SET "
+                    "correct = correct + excluded.correct, wrong = wrong + excluded.wrong",
+                    [(learner, ex, item, root, correct, 1 - correct)
+                     for learner, ex, item, root, correct, _ in answers])
+            if states:
+                now = time.time()
+                conn.executemany(
+                    "INSERT INTO learner_state (learner, state, saved_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (learner) DO UPDATE SET state = excluded.state, saved_at = excluded.saved_at",
+                    [(learner, state, now) for learner, state in states.items()])
+
+
+class SessionStore:
+    """One learner's state in a SessionDatabase, written in batches off the Tk thread.
+
+    record_answer and save_state only enqueue. A store opened on its own
+    owns its database; one from SessionDatabase.store() shares it, and
+    closing it only waits for its writes to be committed.
+    """
+
+    def __init__(self, path=None, learner=None, database=None):
+        self.database = database or SessionDatabase(path)
+        self.owns_database = database is None
+        self.path = self.database.path
+        self.learner = learner or default_learner()
+
+    def load(self):
+        """Return (state dict or None, counts list) for the learner"""
+        conn = self.database.conn
+        row = conn.execute(
+            "SELECT state FROM learner_state WHERE learner = ?", (self.learner,)).fetchone()
+        counts = [
+            (exercise, json.loads(item), json.loads(root), correct, wrong)
+            for exercise, item, root, correct, wrong in conn.execute(
+                "SELECT exercise, item, root, correct, wrong FROM counts WHERE learner = ?",
+                (self.learner,))
+        ]
+        return (json.loads(row[0]) if row else None), counts
+
+    def record_answer(self, exercise, item, root, correct):
+        self.database.writes.put(
+            ("answer", (self.learner, exercise, json.dumps(item), json.dumps(root), int(bool(correct)), time.time())))
+
+    def save_state(self, state):
+        """Queue the learner's state: a dict, or a function returning one that the writer thread calls"""
+        self.database.writes.put(("state", (self.learner, state)))
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is committed"""
+        return self.database.flush(timeout)
+
+    def close(self):
+        if self.owns_database:
+            self.database.close()
+        else:
+            self.database.flush()
+
+
+def open_default():
+    """Open the learner's store, or return None so the app runs without saving"""
+    try:
+        return SessionStore()
+    except (OSError, sqlite3.Error) as e:
+        print(f"Session state will not be saved: {e}")
+        return None
@@ -0,0 +1,75 @@
+import importlib
+import os
+import sys
+import threading
+import time
+
+# Import this first in an entry point so T0 is as close to launch as possible
+T0 = time.perf_counter()
+MARKS = []
+IMPORTS = {}
+LAZY_MODULES = {}
+REPORT_ENV = "TRAINER_STARTUP_REPORT"
+
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """Stands in for a heavy module and imports it on first attribute access"""
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            with _lock:
+                module = self.__dict__["_module"]
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    IMPORTS[self._name] = time.perf_counter() - start
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """Return a proxy that defers importing name until it is first used"""
+    with _lock:
+        if name not in LAZY_MODULES:
+            LAZY_MODULES[name] = LazyModule(name)
+        return LAZY_MODULES[name]
+
+
+def preload(*names):
+    """Import lazily declared modules now, e.g. from a background warm-up job"""
+    for name in names:
+        try:
+            lazy_import(name)._load()
+        except ImportError as e:
+            print(f"Error importing {name}: {e}")
+
+
+def mark(label):
+    """Record a startup milestone relative to T0"""
+    MARKS.append((label, time.perf_counter() - T0))
+
+
+def report(file=None):
+    """Print milestones and lazy import costs when TRAINER_STARTUP_REPORT is set"""
+    if not os.environ.get(REPORT_ENV):
+        return
+    file = file or sys.stderr
+    print("⏱ Startup report", file=file)
+    for label, elapsed in MARKS:
+        print(f"  {elapsed * 1000:8.1f} ms  {label}", file=file)
+    for name, elapsed in sorted(IMPORTS.items(), key=lambda item: -item[1]):
+        print(f"  {elapsed * 1000:8.1f} ms  import {name}", file=file)
@@ -0,0 +1,150 @@
+import datetime
+
+import startup
+
+np = startup.lazy_import("numpy")
+
+WINDOW = 20       # Answers per exercise that count towards rolling accuracy
+DAYS_KEPT = 366   # Per-day aggregates older than this are dropped
+
+
+class ExerciseStats:
+    """Running answer counters for one exercise, indexed by item and root.
+
+    The full (item, root) grid plus per-item, per-root and overall totals
+    are all bumped on every answer, so no view ever sums the history. The
+    last WINDOW outcomes sit in a ring buffer with a running sum for
+    rolling accuracy.
+    """
+
+    def __init__(self, items, roots, window=WINDOW):
+        self.items = list(items)
+        self.roots = list(roots)
+        self.item_index = {item: i for i, item in enumerate(self.items)}
+        self.root_index = {root: i for i, root in enumerate(self.roots)}
+        shape = (len(self.items), len(self.roots))
+        self.correct = np.zeros(shape, dtype=np.int64)
+        self.wrong = np.zeros(shape, dtype=np.int64)
+        self.item_correct = np.zeros(len(self.items), dtype=np.int64)
+        self.item_wrong = np.zeros(len(self.items), dtype=np.int64)
+        self.root_correct = np.zeros(len(self.roots), dtype=np.int64)
+        self.root_wrong = np.zeros(len(self.roots), dtype=np.int64)
+        self.total_correct = 0
+        self.total_wrong = 0
+        self.recent = np.zeros(window, dtype=np.int8)
+        self.recent_pos = 0
+        self.recent_count = 0
+        self.recent_sum = 0
+
+    def add(self, item, root, correct, wrong):
+        """Add answer counts for one (item, root); False if it is not registered"""
+        i = self.item_index.get(item)
+        r = self.root_index.get(root)
+        if i is None or r is None:
+            return False
+        self.correct[i, r] += correct
+        self.wrong[i, r] += wrong
+        self.item_correct[i] += correct
+        self.item_wrong[i] += wrong
+        self.root_correct[r] += correct
+        self.root_wrong[r] += wrong
+        self.total_correct += correct
+        self.total_wrong += wrong
+        return True
+
+    def push_recent(self, correct):
+        size = len(self.recent)
+        if self.recent_count == size:
+            self.recent_sum -= int(self.recent[self.recent_pos])
+        else:
+            self.recent_count += 1
+        self.recent[self.recent_pos] = correct
+        self.recent_sum += correct
+        self.recent_pos = (self.recent_pos + 1) % size
+
+    def recent_outcomes(self):
+        """Outcomes in the window, oldest first"""
+        size = len(self.recent)
+        if self.recent_count < size:
+            return self.recent[:self.recent_count].tolist()
+        return np.roll(self.recent, -self.recent_pos).tolist()
+
+    def rolling_accuracy(self):
+        return self.recent_sum / self.recent_count if self.recent_count else None
+
+    def accuracy(self):
+        total = self.total_correct + self.total_wrong
+        return self.total_correct / total if total else None
+
+
+class StatsEngine:
+    """Incremental answer statistics across exercises, plus per-day totals"""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.exercises = {}
+        self.days = {}  # ISO date -> {exercise: [correct, wrong]}
+
+    def register(self, exercise, items, roots):
+        """Declare the items and roots an exercise can ask about"""
+        self.exercises[exercise] = ExerciseStats(items, roots, self.window)
+
+    def __getitem__(self, exercise):
+        return self.exercises[exercise]
+
+    def record(self, exercise, item, root, correct, day=None):
+        """Count one answer in O(1)"""
+        ex = self.exercises[exercise]
+        correct = int(bool(correct))
+        if not ex.add(item, root, correct, 1 - correct):
+            return
+        ex.push_recent(correct)
+        day = day or datetime.date.today().isoformat()
+        totals = self.days.get(day)
+        if totals is None:
+            totals = self.days[day] = {}
+            if len(self.days) > DAYS_KEPT:
+                del self.days[min(self.days)]
+        counts = totals.setdefault(exercise, [0, 0])
+        counts[0] += correct
+        counts[1] += 1 - correct
+
+    def restore(self, exercise, item, root, correct, wrong):
+        """Add saved per-combination counts, e.g. when resuming a session"""
+        ex = self.exercises.get(exercise)
+        if ex is not None:
+            ex.add(item, root, correct, wrong)
+
+    def totals(self):
+        """(correct, wrong) over every exercise"""
+        correct = sum(ex.total_correct for ex in self.exercises.values())
+        wrong = sum(ex.total_wrong for ex in self.exercises.values())
+        return correct, wrong
+
+    def hardest(self, exercise):
+        """Item with the most wrong answers net of right ones, or None before any answers"""
+        ex = self.exercises[exercise]
+        if not ex.total_correct + ex.total_wrong:
+            return None
+        return ex.items[int(np.argmax(ex.item_wrong - ex.item_correct))]
+
+    def day(self, day=None):
+        """{exercise: [correct, wrong]} for one day, today by default"""
+        return self.days.get(day or datetime.date.today().isoformat(), {})
+
+    def to_state(self):
+        # Per-combination counts are already saved answer by answer; only the
+        # parts that cannot be rebuilt from them are kept here
+        return {
+            "recent": {name: ex.recent_outcomes() for name, ex in self.exercises.items()},
+            "days": self.days,
+        }
+
+    def load_state(self, state):
+        for name, outcomes in state.get("recent", {}).items():
+            ex = self.exercises.get(name)
+            if ex is not None:
+                for correct in outcomes[-len(ex.recent):]:
+                    ex.push_recent(int(correct))
+        self.days = {day: {ex: list(counts) for ex, counts in totals.items()}
+                     for day, totals in sorted(state.get("days", {}).items())[-DAYS_KEPT:]}
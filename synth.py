@@ -0,0 +1,214 @@
+"""Additive synthesis with ADSR envelopes, one batched numpy pass per note.
+
+A Timbre is a list of harmonic amplitudes, an envelope and a damping rate.
+render() builds every harmonic as a row of one (harmonics x samples) matrix
+and reduces it with a single matrix-vector product against the amplitudes.
+Rows are successive powers of z = exp((-damping + 2j*pi*freq) * t), so the
+k-th row is exp(-k * damping * t) * sin(k * 2*pi*freq * t) for the cost of a
+complex multiply instead of a sin and an exp per element. Damping makes
+higher harmonics die away faster, which is most of what separates a
+plucked or struck tone from an organ. Undamped timbres repeat one fixed
+cycle, so they are read from a wavetable of that cycle instead, which
+costs the same however many harmonics there are.
+
+tone() is the cached entry point the trainers use: rendered notes are kept
+per (pitch, timbre, duration) in a ToneCache, so after the first click a
+realistic tone costs a dict lookup.
+
+stream() and stream_notes() are generators for long notes and long note
+sequences. They render CHUNK_FRAMES samples at a time from absolute sample
+positions, so chunks join seamlessly, memory stays constant however long
+the exercise is, and the first chunk can play before the rest exist.
+sequence() turns a scale or melody into the (start, freq, duration) notes
+stream_notes() takes.
+"""
+from collections import namedtuple
+
+from startup import lazy_import
+from tone_cache import ToneCache
+from wavetable import PHASE_BITS, TABLE_SIZE, Wavetable
+
+np = lazy_import("numpy")
+
+SAMPLE_RATE = 44100
+AMPLITUDE = 0.5  # Peak level relative to full scale
+CHUNK_FRAMES = 4096  # Samples per streamed chunk, about 93 ms at 44.1 kHz
+PEAK_WINDOW = 0.05  # Seconds past the attack and decay searched for a note's peak
+
+Envelope = namedtuple("Envelope", "attack decay sustain release")  # Seconds, except sustain (level 0-1)
+Timbre = namedtuple("Timbre", "harmonics envelope damping")  # damping: decay rate per harmonic number, 1/s
+
+TIMBRES = {
+    "sine": Timbre([1.0], Envelope(0.005, 0.0, 1.0, 0.02), 0.0),
+    "organ": Timbre([1.0, 0.5, 0.0, 0.25, 0.0, 0.125, 0.0, 0.0625], Envelope(0.01, 0.05, 0.9, 0.05), 0.0),
+    "square": Timbre([1.0 / k if k % 2 else 0.0 for k in range(1, 16)], Envelope(0.005, 0.05, 0.8, 0.05), 0.0),
+    "saw": Timbre([1.0 / k for k in range(1, 16)], Envelope(0.005, 0.05, 0.8, 0.05), 0.0),
+    "piano": Timbre([1.0 / k ** 1.5 for k in range(1, 13)], Envelope(0.002, 0.3, 0.35, 0.08), 1.5),
+    "pluck": Timbre([1.0 / k for k in range(1, 13)], Envelope(0.001, 0.15, 0.2, 0.05), 4.0),
+}
+DEFAULT_TIMBRE = "piano"
+
+CACHE = ToneCache()
+_peaks = {}  # (freq, timbre name, sample_rate) -> unscaled peak of a note long enough to sustain
+_tables = {}  # Harmonic amplitudes -> Wavetable of one cycle of their sum
+
+
+def adsr(n_samples, envelope, sample_rate=SAMPLE_RATE, start=0, total=None):
+    """float32 gain curve: attack, decay to the sustain level, release to 0 at the end.
+
+    Covers samples start to start + n_samples of a note total samples long
+    (by default, the whole note).
+    """
+    t = np.arange(start, start + n_samples) / sample_rate
+    a, d, s, r = envelope
+    duration = (n_samples if total is None else total) / sample_rate
+    gain = np.interp(t, [0.0, a, a + d], [0.0, 1.0, s]).astype(np.float32)
+    gain *= np.interp(t, [max(duration - r, 0.0), duration], [1.0, 0.0]).astype(np.float32)
+    return gain
+
+
+def harmonic_matrix(freq, n_samples, count, sample_rate=SAMPLE_RATE, damping=0.0, start=0):
+    """(count x n_samples) float32 matrix; row k-1 is the k-th harmonic, decaying at k * damping"""
+    t = np.arange(start, start + n_samples) / sample_rate
+    z = np.exp((-damping + 2j * np.pi * freq) * t).astype(np.complex64)
+    powers = np.empty((count, n_samples), dtype=np.complex64)
+    powers[0] = z
+    for k in range(1, count):
+        np.multiply(powers[k - 1], z, out=powers[k])
+    return powers.imag
+
+
+def get_timbre(timbre):
+    if isinstance(timbre, Timbre):
+        return timbre
+    try:
+        return TIMBRES[timbre]
+    except KeyError:
+        raise ValueError(f"Unknown timbre: {timbre}") from None
+
+
+def timbre_key(timbre):
+    """Hashable form of a timbre name or Timbre, for cache keys"""
+    if isinstance(timbre, Timbre):
+        harmonics, envelope, damping = timbre
+        return tuple(harmonics), tuple(envelope), damping
+    return timbre
+
+
+def partials(freq, harmonics, sample_rate=SAMPLE_RATE):
+    """float32 harmonic amplitudes for freq, without those at or above Nyquist"""
+    # They would alias back down as inharmonic noise
+    count = max(1, min(len(harmonics), int((sample_rate / 2 - 1) // freq)))
+    return np.asarray(harmonics[:count], dtype=np.float32)
+
+
+def harmonic_table(weights):
+    """Wavetable holding one cycle of the harmonics in weights, built once per set"""
+    key = tuple(float(w) for w in weights)
+    table = _tables.get(key)
+    if table is None:
+        phase = 2 * np.pi * np.arange(TABLE_SIZE) / TABLE_SIZE
+        table = _tables[key] = Wavetable(sum(w * np.sin(k * phase) for k, w in enumerate(key, start=1)))
+    return table
+
+
+def waveform(freq, timbre, n_samples, sample_rate=SAMPLE_RATE, start=0, total=None):
+    """Unscaled float32 samples start to start + n_samples of a note total samples long"""
+    harmonics, envelope, damping = get_timbre(timbre)
+    weights = partials(freq, harmonics, sample_rate)
+    if damping:
+        wave = weights @ harmonic_matrix(freq, n_samples, len(weights), sample_rate, damping, start)
+    else:
+        table = harmonic_table(weights)
+        # Fixed-point phase of sample start is exact, so chunks join sample for sample
+        phase = table.increment(freq, sample_rate) * start % 2 ** PHASE_BITS
+        wave, _ = table.render(freq, n_samples, sample_rate, phase)
+    wave *= adsr(n_samples, envelope, sample_rate, start, total)
+    return wave
+
+
+def render(freq, duration, timbre=DEFAULT_TIMBRE, sample_rate=SAMPLE_RATE, amplitude=AMPLITUDE):
+    """int16 note at freq, peak-normalized to amplitude by note_peak()"""
+    n_samples = int(sample_rate * duration)
+    wave = waveform(freq, timbre, n_samples, sample_rate)
+    peak = note_peak(freq, timbre, n_samples, sample_rate)
+    if peak > 0:
+        wave *= np.float32(amplitude * 32767 / peak)
+    return wave.astype(np.int16)
+
+
+def note_peak(freq, timbre, n_samples, sample_rate=SAMPLE_RATE):
+    """Peak of a note's unscaled waveform, measured over its opening only.
+
+    Past the attack and decay the envelope only holds or falls and damping
+    only removes energy, so the loudest samples come early. render() and
+    stream_notes() both scale by this, so a streamed note matches the
+    rendered one sample for sample. Peaks of notes that sustain past the
+    window are cached, since they do not depend on the note's length.
+    """
+    a, d, _, r = get_timbre(timbre).envelope
+    window = min(n_samples, int(np.ceil((a + d + PEAK_WINDOW) * sample_rate)))
+    sustained = window < n_samples - r * sample_rate
+    key = (round(freq, 6), timbre_key(timbre), sample_rate) if sustained else None
+    peak = _peaks.get(key)
+    if peak is None:
+        peak = float(np.abs(waveform(freq, timbre, window, sample_rate, 0, n_samples)).max()) if window else 0.0
+        if key is not None:
+            _peaks[key] = peak
+    return peak
+
+
+def tone(freq, duration, timbre=DEFAULT_TIMBRE, sample_rate=SAMPLE_RATE):
+    """Cached render(): the same (pitch, timbre, duration) is only synthesized once"""
+    return CACHE.get(freq, duration, sample_rate, lambda f, d, sr: render(f, d, timbre, sr),
+                     variant=timbre_key(timbre))
+
+
+def stream_notes(notes, timbre=DEFAULT_TIMBRE, sample_rate=SAMPLE_RATE, chunk_frames=CHUNK_FRAMES,
+                 amplitude=AMPLITUDE):
+    """Yield int16 chunks of (start_seconds, freq, duration) notes, which must come in start order.
+
+    notes may be any iterable, including an endless generator: it is only
+    read as far as the chunk being rendered. Each note is scaled by
+    note_peak(), so a streamed note comes out exactly as render() would
+    produce it; overlapping notes are clipped to int16.
+    """
+    notes = iter(notes)
+    pending = next(notes, None)
+    active = []  # (first sample, sample count, freq, gain)
+    pos = 0
+    while True:
+        end = pos + chunk_frames
+        while pending is not None and int(round(pending[0] * sample_rate)) < end:
+            start, freq, duration = pending
+            count = int(sample_rate * duration)
+            peak = note_peak(freq, timbre, count, sample_rate)
+            gain = amplitude * 32767 / peak if peak > 0 else 0.0
+            active.append((int(round(start * sample_rate)), count, freq, gain))
+            pending = next(notes, None)
+        chunk = np.zeros(chunk_frames, dtype=np.float32)
+        for first, count, freq, gain in active:
+            lo, hi = max(pos, first), min(end, first + count)
+            if lo < hi:
+                wave = waveform(freq, timbre, hi - lo, sample_rate, lo - first, count)
+                chunk[lo - pos:hi - pos] += wave * np.float32(gain)
+        last = max((first + count for first, count, _, _ in active), default=pos)
+        active = [note for note in active if note[0] + note[1] > end]
+        np.clip(chunk, -32768, 32767, out=chunk)
+        if pending is None and not active:
+            if last > pos:
+                yield chunk[:last - pos].astype(np.int16)
+            return
+        yield chunk.astype(np.int16)
+        pos = end
+
+
+def sequence(freqs, duration, gap, sample_rate=SAMPLE_RATE):
+    """stream_notes() schedule playing freqs end to end gap seconds apart, as mixer.render_sequence() lays them out"""
+    step = int(sample_rate * duration) + int(round(gap * sample_rate))
+    return [(i * step / sample_rate, freq, duration) for i, freq in enumerate(freqs)]
+
+
+def stream(freq, duration, timbre=DEFAULT_TIMBRE, sample_rate=SAMPLE_RATE, chunk_frames=CHUNK_FRAMES):
+    """Yield one note as int16 chunks; see stream_notes()"""
+    return stream_notes([(0.0, freq, duration)], timbre, sample_rate, chunk_frames)
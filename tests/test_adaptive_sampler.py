@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from adaptive_sampler import AdaptiveSampler, FenwickTree
+
+
+def test_fenwick_total_and_set():
+    tree = FenwickTree([1.0, 2.0, 3.0, 4.0, 5.0])
+    assert tree.total() == pytest.approx(15.0)
+    tree.set(2, 0.5)
+    assert tree.weights[2] == 0.5
+    assert tree.total() == pytest.approx(12.5)
+
+
+def test_fenwick_find_walks_prefix_sums():
+    weights = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]
+    tree = FenwickTree(weights)
+    start = 0.0
+    for i, w in enumerate(weights):
+        assert tree.find(start) == i
+        assert tree.find(start + w * 0.5) == i
+        start += w
+    # Rounding past the end clamps to the last entry
+    assert tree.find(start) == len(weights) - 1
+
+
+def test_fenwick_find_skips_zero_weights():
+    tree = FenwickTree([1.0, 0.0, 0.0, 1.0])
+    assert tree.find(0.99) == 0
+    assert tree.find(1.0) == 3
+
+
+def test_fenwick_matches_linear_scan_after_updates():
+    rng = random.Random(1)
+    weights = [rng.random() for _ in range(37)]
+    tree = FenwickTree(weights)
+    for _ in range(50):
+        i = rng.randrange(len(weights))
+        weights[i] = rng.random()
+        tree.set(i, weights[i])
+    assert tree.total() == pytest.approx(sum(weights))
+    for _ in range(200):
+        target = rng.random() * sum(weights)
+        acc = 0.0
+        for expected, w in enumerate(weights):
+            acc += w
+            if target < acc:
+                break
+        assert tree.find(target) == expected
+
+
+def test_register_splits_item_weight_across_roots():
+    sampler = AdaptiveSampler(random.Random(0))
+    sampler.register("chord", [("Major", 0), ("Major", 1), ("Minor", 0)])
+    assert sampler.probability("chord", "Major", 0) == pytest.approx(0.25)
+    assert sampler.probability("chord", "Major", 1) == pytest.approx(0.25)
+    assert sampler.probability("chord", "Minor", 0) == pytest.approx(0.5)
+
+
+def test_record_favours_wrong_answers():
+    sampler = AdaptiveSampler(random.Random(0))
+    sampler.register("interval", [(1, 0), (2, 0)])
+    sampler.record("interval", 1, 0, False)
+    sampler.record("interval", 2, 0, True)
+    # Weights 2/1 and 1/2
+    assert sampler.probability("interval", 1, 0) == pytest.approx(0.8)
+    assert sampler.probability("interval", 2, 0) == pytest.approx(0.2)
+
+
+def test_record_ignores_unknown_combinations():
+    sampler = AdaptiveSampler(random.Random(0))
+    sampler.register("interval", [(1, 0)])
+    sampler.record("interval", 9, 0, False)
+    assert sampler.probability("interval", 1, 0) == pytest.approx(1.0)
+
+
+def test_sample_follows_weights():
+    sampler = AdaptiveSampler(random.Random(42))
+    sampler.register("interval", [(1, 0), (2, 0)])
+    for _ in range(3):
+        sampler.record("interval", 1, 0, False)
+    # Weights 4 and 1
+    draws = [sampler.sample("interval") for _ in range(5000)]
+    assert draws.count((1, 0)) / len(draws) == pytest.approx(0.8, abs=0.03)
+
+
+def test_restore_sets_counts():
+    sampler = AdaptiveSampler(random.Random(0))
+    sampler.register("interval", [(1, 0), (2, 0)])
+    sampler.restore("interval", 1, 0, correct=0, wrong=3)
+    assert sampler.exercises["interval"]["wrong"][0] == 3
+    assert sampler.probability("interval", 1, 0) == pytest.approx(0.8)
+    # Further answers build on the restored counts
+    sampler.record("interval", 1, 0, True)
+    assert sampler.probability("interval", 1, 0) == pytest.approx(2 / 3)
+
+
+def test_restore_ignores_unregistered_exercise():
+    sampler = AdaptiveSampler(random.Random(0))
+    sampler.restore("missing", 1, 0, 1, 1)
+    assert "missing" not in sampler.exercises
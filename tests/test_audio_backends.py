@@ -0,0 +1,39 @@
+import threading
+
+import numpy as np
+
+import audio_backends
+import synth
+
+
+def feed(chunks):
+    chunks = iter(chunks)
+    return lambda: next(chunks, None)
+
+
+def test_sink_plays_stream_as_one_buffer():
+    sink = audio_backends.NullSink()
+    sink.open_stream(feed(synth.stream(440.0, 0.5)), 1, 2, synth.SAMPLE_RATE).wait_done()
+    assert sink.count == 1
+    played = np.frombuffer(sink.played[-1].data, dtype=np.int16)
+    np.testing.assert_array_equal(played, synth.render(440.0, 0.5))
+
+
+def test_sink_history_is_bounded_by_bytes():
+    sink = audio_backends.NullSink(max_bytes=10000)
+    for _ in range(50):
+        sink.play_buffer(bytes(1000), 1, 2, synth.SAMPLE_RATE)
+    assert sink.count == 50 and sink.bytes == 50000
+    assert len(sink.played) == 10 and sink.held == 10000
+
+
+def test_wav_sink_numbers_concurrent_buffers_uniquely(tmp_path):
+    sink = audio_backends.WavFileSink(str(tmp_path))
+    sink.probe()
+    threads = [threading.Thread(target=sink.play_buffer, args=(bytes(200), 1, 2, synth.SAMPLE_RATE))
+               for _ in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"{i:06d}.wav" for i in range(1, 41)]
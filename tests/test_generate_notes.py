@@ -0,0 +1,9 @@
+import generate_notes
+
+
+def test_force_keeps_other_manifest_entries(tmp_path):
+    out = str(tmp_path)
+    assert generate_notes.generate(out, ["C4", "D4"], workers=1) == (2, 0)
+    assert generate_notes.generate(out, ["C4"], workers=1, force=True) == (1, 0)
+    assert set(generate_notes.load_manifest(out)) == {"C4.wav", "D4.wav"}
+    assert generate_notes.generate(out, ["C4", "D4"], workers=1) == (0, 2)
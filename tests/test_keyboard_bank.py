@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import synth
+from generate_notes import write_wav
+from keyboard_bank import KeyboardBank, resample
+from pitch import midi_to_freq, note_to_midi
+from sample_bank import SampleBank
+
+
+def dominant_freq(samples, sample_rate=synth.SAMPLE_RATE):
+    window = samples[:len(samples) // 2].astype(np.float64)
+    spectrum = np.abs(np.fft.rfft(window * np.hanning(len(window))))
+    return np.argmax(spectrum) * sample_rate / len(window)
+
+
+@pytest.mark.parametrize("semitones", [-12, -3, 2, 7, 19, 39])
+def test_resample_keeps_length_and_shifts_pitch(semitones):
+    source = synth.render(440.0, 0.5, "sine")
+    shifted = resample(source, 2 ** (semitones / 12), period=synth.SAMPLE_RATE / 440.0)
+    assert len(shifted) == len(source)
+    target = 440.0 * 2 ** (semitones / 12)
+    assert dominant_freq(shifted) == pytest.approx(target, rel=0.01)
+
+
+def test_upward_shift_sustains_then_fades():
+    source = synth.render(440.0, 0.5, "sine")
+    shifted = resample(source, 4.0, period=synth.SAMPLE_RATE / 440.0).astype(np.int32)
+    middle = shifted[len(shifted) // 2:len(shifted) // 2 + 1000]
+    assert np.abs(middle).max() > 0.9 * np.abs(source).max()
+    assert abs(shifted[-1]) < 100
+
+
+def test_upward_shift_without_period_ends_early():
+    source = synth.render(440.0, 0.5, "sine")
+    assert len(resample(source, 2.0)) == (len(source) - 1) // 2
+
+
+@pytest.fixture
+def bank(tmp_path):
+    note_files = {}
+    for note in ("C4", "A4"):
+        path = str(tmp_path / f"{note}.wav")
+        write_wav(path, synth.render(midi_to_freq(note_to_midi(note)), 0.5, "sine"), synth.SAMPLE_RATE)
+        note_files[note] = path
+    return KeyboardBank(SampleBank(note_files)).load()
+
+
+def test_bank_covers_the_keyboard(bank):
+    assert bank.anchors == [note_to_midi("C4"), note_to_midi("A4")]
+    for note in ("A0", "E2", "Db4", "E6", "C8"):
+        buffer = bank.buffer(note)
+        assert len(buffer) == int(0.5 * synth.SAMPLE_RATE), note
+        assert dominant_freq(buffer) == pytest.approx(midi_to_freq(note_to_midi(note)), rel=0.02, abs=4), note
+    assert bank.buffer("C9") is None
+    assert bank.stats()["shifted"] == 5
+
+
+def test_nearest_anchor(bank):
+    c4, a4 = note_to_midi("C4"), note_to_midi("A4")
+    assert [bank.nearest(m) for m in (21, c4 + 4, c4 + 5, 108)] == [c4, c4, a4, a4]
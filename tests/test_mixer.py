@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from mixer import SAMPLE_RATE, mix, overlap_add, render_sequence
+
+
+def note(length, value=1000):
+    return np.full(length, value, dtype=np.int16)
+
+
+@pytest.mark.parametrize("buffers", [[], [note(0)], [note(0), note(0), note(0)]])
+def test_overlap_add_empty_input(buffers):
+    out = overlap_add(buffers)
+    assert out.dtype == np.int16
+    assert len(out) == 0
+
+
+def test_overlap_add_spaces_onsets_by_step():
+    hop = int(round(0.1 * SAMPLE_RATE))
+    out = overlap_add([note(hop // 2), note(hop // 2, 2000)], step=0.1, fade=0.0)
+    assert len(out) == hop + hop // 2
+    assert (out[:hop // 2] == 1000).all()
+    assert (out[hop // 2:hop] == 0).all()
+    assert (out[hop:] == 2000).all()
+
+
+def test_overlap_add_fades_tail_under_next_note():
+    hop = int(round(0.1 * SAMPLE_RATE))
+    tail = int(round(0.02 * SAMPLE_RATE))
+    out = overlap_add([note(2 * hop), note(hop, 0)], step=0.1, fade=0.02)
+    assert len(out) == hop + min(hop + tail, 2 * hop)
+    assert out[hop] == 1000
+    assert (np.diff(out[hop:hop + tail].astype(np.int32)) <= 0).all()
+    assert (out[hop + tail:] == 0).all()
+
+
+def test_overlap_add_attenuates_only_when_clipping():
+    loud = overlap_add([note(8820, 30000), note(8820, 30000)], step=0.1, fade=0.1)
+    assert np.abs(loud.astype(np.int32)).max() <= 32767
+
+
+def test_mix_and_sequence_empty_input():
+    assert len(mix([])) == 0
+    assert len(render_sequence([])) == 0
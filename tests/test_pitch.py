@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from pitch import (MIDI_KEYS, midi_to_freq, midi_to_freqs, midi_to_note, note_range, note_to_freq,
+                   note_to_midi, notes_to_freqs, notes_to_midi, parse)
+
+
+def test_piano_range_bounds():
+    assert note_to_midi("A0") == 21
+    assert note_to_midi("C8") == 108
+    assert note_to_midi("A4") == 69
+    assert note_to_midi("C-1") == 0
+    assert note_to_midi("G9") == 127
+
+
+def test_enharmonic_spellings_agree():
+    assert note_to_midi("Db4") == note_to_midi("C#4") == note_to_midi("Cs4") == 61
+    assert note_to_midi("Bbb3") == note_to_midi("A3")
+    assert note_to_midi("Cb4") == note_to_midi("B3")
+    assert note_to_midi("B#3") == note_to_midi("C4")
+
+
+def test_midi_name_round_trip():
+    for midi in range(MIDI_KEYS):
+        assert note_to_midi(midi_to_note(midi)) == midi
+    assert midi_to_note(61) == "Cs4"
+    assert midi_to_note(60) == "C4"
+
+
+def test_lookup_matches_parser():
+    for midi in range(MIDI_KEYS):
+        name = midi_to_note(midi)
+        assert parse(name) == midi
+
+
+def test_out_of_table_notes_still_parse():
+    assert note_to_midi("C10") == 132
+    assert midi_to_note(132) == "C10"
+    assert midi_to_freq(132) == pytest.approx(440.0 * 2 ** ((132 - 69) / 12))
+
+
+@pytest.mark.parametrize("name", ["", "H4", "C", "Cx4", "4C", "C#"])
+def test_parse_errors(name):
+    with pytest.raises(ValueError):
+        note_to_midi(name)
+
+
+def test_frequencies():
+    assert midi_to_freq(69) == 440.0
+    assert note_to_freq("A5") == pytest.approx(880.0)
+    assert note_to_freq("C4") == pytest.approx(261.6256, abs=1e-4)
+    assert note_to_freq("A0") == pytest.approx(27.5)
+
+
+def test_note_range():
+    assert note_range("C4", "E4") == ["C4", "Cs4", "D4", "Ds4", "E4"]
+    assert note_range("Db4", "D4") == ["Cs4", "D4"]
+    assert note_range("C4", "C4") == ["C4"]
+
+
+def test_array_conversions():
+    notes = ["A0", "Db4", "A4", "C8"]
+    midis = notes_to_midi(notes)
+    assert midis.dtype == np.int64
+    assert midis.tolist() == [21, 61, 69, 108]
+    freqs = notes_to_freqs(notes)
+    assert freqs.dtype == np.float64
+    np.testing.assert_allclose(freqs, [note_to_freq(n) for n in notes])
+
+
+def test_midi_to_freqs_outside_table():
+    freqs = midi_to_freqs([-12, 69, 140])
+    np.testing.assert_allclose(freqs, [midi_to_freq(-12), 440.0, midi_to_freq(140)])
+
+
+def test_empty_arrays():
+    assert notes_to_midi([]).size == 0
+    assert midi_to_freqs([]).size == 0
@@ -0,0 +1,105 @@
+from review_scheduler import BOX_INTERVALS, ReviewScheduler
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_correct_answer_on_untracked_item_is_ignored():
+    scheduler = ReviewScheduler(clock=FakeClock())
+    scheduler.record("interval", 4, True)
+    assert len(scheduler) == 0
+    assert scheduler.seconds_until_next() is None
+
+
+def test_wrong_answer_is_due_immediately():
+    scheduler = ReviewScheduler(clock=FakeClock())
+    scheduler.record("interval", 4, False)
+    assert ("interval", 4) in scheduler
+    assert scheduler.next_due() == ("interval", 4)
+    assert scheduler.seconds_until_next() == 0.0
+
+
+def test_correct_answers_promote_through_boxes():
+    clock = FakeClock()
+    scheduler = ReviewScheduler(clock=clock)
+    scheduler.record("chord", "Major", False)
+    for box in range(1, len(BOX_INTERVALS)):
+        scheduler.record("chord", "Major", True)
+        assert scheduler.entries[("chord", "Major")][0] == box
+        assert scheduler.seconds_until_next() == BOX_INTERVALS[box]
+        assert scheduler.next_due() is None
+        clock.now += BOX_INTERVALS[box]
+        assert scheduler.next_due() == ("chord", "Major")
+
+
+def test_wrong_answer_demotes_to_box_zero():
+    scheduler = ReviewScheduler(clock=FakeClock())
+    scheduler.record("chord", "Major", False)
+    scheduler.record("chord", "Major", True)
+    scheduler.record("chord", "Major", True)
+    scheduler.record("chord", "Major", False)
+    assert scheduler.entries[("chord", "Major")][0] == 0
+    assert scheduler.next_due() == ("chord", "Major")
+
+
+def test_item_graduates_after_last_box():
+    scheduler = ReviewScheduler(clock=FakeClock())
+    scheduler.record("chord", "Major", False)
+    for _ in range(len(BOX_INTERVALS)):
+        scheduler.record("chord", "Major", True)
+    assert ("chord", "Major") not in scheduler
+    assert scheduler.next_due() is None
+
+
+def test_most_overdue_item_comes_first():
+    clock = FakeClock()
+    scheduler = ReviewScheduler(clock=clock)
+    scheduler.record("interval", 1, False)
+    scheduler.record("interval", 1, True)  # due in BOX_INTERVALS[1]
+    scheduler.record("interval", 2, False)  # due now
+    assert scheduler.next_due() == ("interval", 2)
+    scheduler.record("interval", 2, True)
+    scheduler.record("interval", 2, True)  # due in BOX_INTERVALS[2]
+    clock.now += BOX_INTERVALS[2]
+    assert scheduler.next_due() == ("interval", 1)
+
+
+def test_max_items_evicts_least_recently_answered():
+    scheduler = ReviewScheduler(max_items=3, clock=FakeClock())
+    for item in range(3):
+        scheduler.record("interval", item, False)
+    scheduler.record("interval", 0, False)  # refresh item 0
+    scheduler.record("interval", 3, False)
+    assert len(scheduler) == 3
+    assert ("interval", 1) not in scheduler
+    assert ("interval", 0) in scheduler
+    assert ("interval", 3) in scheduler
+
+
+def test_heap_stays_bounded_when_rescheduling():
+    scheduler = ReviewScheduler(max_items=5, clock=FakeClock())
+    for i in range(1000):
+        scheduler.record("interval", i % 5, i % 3 != 0)
+    assert len(scheduler.heap) <= 2 * len(scheduler) + 17
+
+
+def test_state_round_trip():
+    clock = FakeClock()
+    scheduler = ReviewScheduler(clock=clock)
+    scheduler.record("interval", 4, False)
+    scheduler.record("chord", "Minor", False)
+    scheduler.record("chord", "Minor", True)
+    state = scheduler.to_state()
+
+    restored = ReviewScheduler(clock=clock)
+    restored.load_state(state)
+    assert restored.to_state() == state
+    assert restored.next_due() == ("interval", 4)
+    assert restored.seconds_until_next(now=clock.now + 1) == 0.0
+    restored.record("interval", 4, True)
+    assert restored.next_due() is None
@@ -0,0 +1,111 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import session_store
+from exercise_session import ExerciseSession
+from session_store import SessionDatabase, SessionStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "sessions.db")
+
+
+def test_database_uses_wal(db_path):
+    database = SessionDatabase(db_path)
+    try:
+        assert database.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        database.close()
+
+
+def test_answers_and_state_round_trip(db_path):
+    store = SessionStore(db_path, "ann")
+    store.record_answer("chord", "Major", 3, True)
+    store.record_answer("chord", "Major", 3, False)
+    store.record_answer("interval", 4, 0, True)
+    store.save_state({"streak": 1})
+    store.close()
+
+    state, counts = SessionStore(db_path, "ann").load()
+    assert state == {"streak": 1}
+    assert sorted(counts) == [("chord", "Major", 3, 1, 1), ("interval", 4, 0, 1, 0)]
+
+
+def test_only_the_newest_state_in_a_batch_is_built(db_path):
+    store = SessionStore(db_path, "ben")
+    built = []
+
+    def snapshot(n):
+        built.append(n)
+        return {"n": n}
+
+    hold = threading.Event()
+    store.save_state(lambda: hold.wait(5) and {"n": -1})  # Keeps the writer busy while the rest queue up
+    for n in range(50):
+        store.save_state(lambda n=n: snapshot(n))
+    hold.set()
+    store.flush()
+    assert built[-1] == 49 and len(built) < 50
+    assert store.load()[0] == {"n": 49}
+    store.close()
+
+
+def test_bad_snapshot_does_not_stop_the_writer(db_path, capsys):
+    store = SessionStore(db_path, "cat")
+    store.save_state(lambda: 1 / 0)
+    assert store.flush()
+    store.save_state({"ok": True})
+    assert store.flush()
+    assert store.load()[0] == {"ok": True}
+    assert "Error saving session" in capsys.readouterr().out
+    store.close()
+
+
+def test_learners_share_one_database(db_path):
+    database = SessionDatabase(db_path)
+    ann, ben = database.store("ann"), database.store("ben")
+    ann.record_answer("note", 0, 0, True)
+    ben.record_answer("note", 0, 0, False)
+    ben.save_state({"who": "ben"})
+    ann.close()  # Only waits for the writes; the database stays open
+    ben.record_answer("note", 1, 0, True)
+    ben.flush()
+    assert ann.load() == (None, [("note", 0, 0, 1, 0)])
+    assert ben.load() == ({"who": "ben"}, [("note", 0, 0, 0, 1), ("note", 1, 0, 1, 0)])
+    assert database.writer.is_alive()
+    database.close()
+    assert not database.writer.is_alive()
+
+
+def test_flushed_writes_survive_a_crash(db_path):
+    # The child commits, then dies without closing anything
+    script = (
+        "import os, session_store\n"
+        f"store = session_store.SessionStore({db_path!r}, 'dee')\n"
+        "store.record_answer('scale', 'Major', 2, True)\n"
+        "store.save_state({'streak': 3})\n"
+        "store.flush()\n"
+        "store.record_answer('scale', 'Major', 2, True)\n"  # Queued only: lost in the crash
+        "os._exit(1)\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=os.path.dirname(os.path.abspath(session_store.__file__)))
+    state, counts = SessionStore(db_path, "dee").load()
+    assert state == {"streak": 3}
+    assert counts == [("scale", "Major", 2, 1, 0)]
+
+
+def test_exercise_session_resumes_from_its_store(db_path):
+    session = ExerciseSession(SessionStore(db_path, "eve"))
+    question = session.next_question("interval")
+    session.check("interval", question.item)
+    session.store.close()
+
+    resumed = ExerciseSession(SessionStore(db_path, "eve"))
+    assert resumed.streak == 1 and resumed.daily_progress == 1
+    assert resumed.stats.totals() == session.stats.totals()
+    resumed.store.close()
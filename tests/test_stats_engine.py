@@ -0,0 +1,113 @@
+import datetime
+
+import pytest
+
+import stats_engine
+from stats_engine import StatsEngine
+
+
+@pytest.fixture
+def engine():
+    engine = StatsEngine(window=4)
+    engine.register("chord", ["Major", "Minor", "Diminished"], [0, 1])
+    engine.register("interval", [1, 2, 3], [0])
+    return engine
+
+
+def test_record_updates_every_view(engine):
+    engine.record("chord", "Major", 0, True, day="2026-01-01")
+    engine.record("chord", "Major", 1, False, day="2026-01-01")
+    engine.record("chord", "Minor", 1, False, day="2026-01-01")
+    ex = engine["chord"]
+    assert ex.correct.tolist() == [[1, 0], [0, 0], [0, 0]]
+    assert ex.wrong.tolist() == [[0, 1], [0, 1], [0, 0]]
+    assert ex.item_correct.tolist() == [1, 0, 0]
+    assert ex.item_wrong.tolist() == [1, 1, 0]
+    assert ex.root_correct.tolist() == [1, 0]
+    assert ex.root_wrong.tolist() == [0, 2]
+    assert ex.accuracy() == pytest.approx(1 / 3)
+
+
+def test_unregistered_combination_is_ignored(engine):
+    engine.record("chord", "Augmented", 0, True, day="2026-01-01")
+    engine.record("chord", "Major", 7, True, day="2026-01-01")
+    assert engine["chord"].accuracy() is None
+    assert engine["chord"].rolling_accuracy() is None
+    assert engine.day("2026-01-01") == {}
+
+
+def test_rolling_window_keeps_last_outcomes(engine):
+    outcomes = [True, False, True, True, False, False]
+    for correct in outcomes:
+        engine.record("interval", 1, 0, correct, day="2026-01-01")
+    ex = engine["interval"]
+    assert ex.recent_outcomes() == [1, 1, 0, 0]
+    assert ex.rolling_accuracy() == pytest.approx(0.5)
+    assert ex.accuracy() == pytest.approx(0.5)
+
+
+def test_rolling_window_before_it_fills(engine):
+    engine.record("interval", 2, 0, False, day="2026-01-01")
+    engine.record("interval", 2, 0, True, day="2026-01-01")
+    assert engine["interval"].recent_outcomes() == [0, 1]
+    assert engine["interval"].rolling_accuracy() == pytest.approx(0.5)
+
+
+def test_per_day_counters(engine):
+    engine.record("chord", "Major", 0, True, day="2026-01-01")
+    engine.record("chord", "Major", 0, False, day="2026-01-01")
+    engine.record("interval", 1, 0, True, day="2026-01-02")
+    assert engine.day("2026-01-01") == {"chord": [1, 1]}
+    assert engine.day("2026-01-02") == {"interval": [1, 0]}
+    assert engine.day("2026-01-03") == {}
+
+
+def test_day_defaults_to_today(engine):
+    engine.record("interval", 1, 0, True)
+    assert engine.day() == {"interval": [1, 0]}
+    assert datetime.date.today().isoformat() in engine.days
+
+
+def test_old_days_are_dropped(engine, monkeypatch):
+    monkeypatch.setattr(stats_engine, "DAYS_KEPT", 3)
+    for day in range(1, 6):
+        engine.record("interval", 1, 0, True, day=f"2026-01-0{day}")
+    assert sorted(engine.days) == ["2026-01-03", "2026-01-04", "2026-01-05"]
+
+
+def test_totals_and_hardest(engine):
+    assert engine.hardest("chord") is None
+    engine.record("chord", "Major", 0, True, day="2026-01-01")
+    engine.record("chord", "Minor", 0, False, day="2026-01-01")
+    engine.record("chord", "Minor", 1, False, day="2026-01-01")
+    engine.record("chord", "Diminished", 0, False, day="2026-01-01")
+    engine.record("interval", 3, 0, True, day="2026-01-01")
+    assert engine.totals() == (2, 3)
+    assert engine.hardest("chord") == "Minor"
+
+
+def test_restore_adds_counts_without_touching_window(engine):
+    engine.restore("chord", "Minor", 1, 2, 5)
+    engine.restore("missing", "Minor", 1, 2, 5)
+    ex = engine["chord"]
+    assert ex.correct[1, 1] == 2 and ex.wrong[1, 1] == 5
+    assert engine.totals() == (2, 5)
+    assert ex.rolling_accuracy() is None
+    assert engine.hardest("chord") == "Minor"
+
+
+def test_state_round_trip(engine):
+    for correct in [True, True, False, True, False]:
+        engine.record("interval", 1, 0, correct, day="2026-01-01")
+    engine.record("chord", "Major", 0, False, day="2026-01-02")
+    state = engine.to_state()
+
+    restored = StatsEngine(window=4)
+    restored.register("chord", ["Major", "Minor", "Diminished"], [0, 1])
+    restored.register("interval", [1, 2, 3], [0])
+    restored.load_state(state)
+    assert restored["interval"].recent_outcomes() == [1, 0, 1, 0]
+    assert restored["chord"].recent_outcomes() == [0]
+    assert restored.days == engine.days
+    assert restored.days is not engine.days
+    assert restored.to_state() == state
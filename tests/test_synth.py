@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import synth
+
+
+@pytest.mark.parametrize("timbre", sorted(synth.TIMBRES))
+@pytest.mark.parametrize("freq", [55.0, 261.63, 440.0, 4186.01])
+@pytest.mark.parametrize("duration", [0.05, 3.0])
+def test_stream_matches_render(timbre, freq, duration):
+    whole = synth.render(freq, duration, timbre)
+    streamed = np.concatenate(list(synth.stream(freq, duration, timbre)))
+    assert np.abs(streamed).max() == np.abs(whole).max()
+    np.testing.assert_array_equal(streamed, whole)
+
+
+def test_render_peak_is_amplitude():
+    peak = int(np.abs(synth.render(440.0, 1.0)).max())
+    assert abs(peak - synth.AMPLITUDE * 32767) <= 0.01 * 32767
+
+
+def test_tone_accepts_timbre_instance():
+    timbre = synth.Timbre([1.0, 0.5], synth.Envelope(0.01, 0.05, 0.7, 0.1), 2.0)
+    first = synth.tone(330.0, 0.3, timbre)
+    same = synth.Timbre([1.0, 0.5], synth.Envelope(0.01, 0.05, 0.7, 0.1), 2.0)
+    assert synth.tone(330.0, 0.3, same) is first
+    np.testing.assert_array_equal(first, synth.render(330.0, 0.3, timbre))
+    assert synth.tone(330.0, 0.3, "organ") is not first
+
+
+def test_stream_notes_joins_sequence():
+    chunks = list(synth.stream_notes([(0.0, 440.0, 0.5), (0.5, 660.0, 0.5)], chunk_frames=1000))
+    assert sum(len(c) for c in chunks) == int(synth.SAMPLE_RATE * 1.0)
+    assert all(len(c) == 1000 for c in chunks[:-1])
+
+
+@pytest.mark.parametrize("gap", [0.0, 0.25, 0.4])
+def test_streamed_sequence_matches_render_sequence(gap):
+    from mixer import render_sequence
+    freqs = [261.63, 293.66, 329.63, 349.23, 392.0, 440.0, 493.88, 523.25]
+    whole = render_sequence([synth.render(freq, 0.8) for freq in freqs], gap)
+    streamed = np.concatenate(list(synth.stream_notes(synth.sequence(freqs, 0.8, gap))))
+    np.testing.assert_array_equal(streamed, whole)
+
+
+@pytest.mark.parametrize("timbre", ["sine", "organ", "square", "saw"])
+def test_undamped_timbres_read_the_wavetable(timbre):
+    harmonics = synth.TIMBRES[timbre].harmonics
+    weights = synth.partials(440.0, harmonics)
+    wave = synth.waveform(440.0, timbre, 4410)
+    direct = weights @ synth.harmonic_matrix(440.0, 4410, len(weights))
+    direct *= synth.adsr(4410, synth.TIMBRES[timbre].envelope)
+    assert np.abs(wave - direct).max() < 1e-3 * np.abs(direct).max()
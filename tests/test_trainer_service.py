@@ -0,0 +1,192 @@
+import asyncio
+import io
+import struct
+import wave
+
+import pytest
+
+from exercise_session import ExerciseSession
+from question_audio import CHOICES, load_bank
+from trainer_service import MAX_BODY, AudioCache, InProcessClient, TrainerService, serve_websocket
+
+
+@pytest.fixture
+def client(tmp_path):
+    service = TrainerService(load_bank(str(tmp_path), warn=False))
+    yield InProcessClient(service)
+    service.close()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_exercises_lists_choices(client):
+    response = run(client.get("/exercises"))
+    assert response.status == 200
+    assert response.data() == CHOICES
+
+
+@pytest.mark.parametrize("exercise", sorted(CHOICES))
+def test_next_audio_answer(client, exercise):
+    guess = [1] if exercise == "melody" else CHOICES[exercise][0]
+
+    async def go():
+        question = await client.post(f"/learners/amy/{exercise}/next")
+        audio = await client.get(question.data()["audio"])
+        pcm = await client.get(question.data()["audio"] + "?format=pcm")
+        answer = await client.post(f"/learners/amy/{exercise}/answer", {"guess": guess})
+        return question, audio, pcm, answer
+
+    question, audio, pcm, answer = run(go())
+    assert question.status == 200
+    info = question.data()
+    assert info["exercise"] == exercise and "notes" not in info
+    assert audio.status == 200 and audio.content_type == "audio/wav"
+    with wave.open(io.BytesIO(audio.body)) as wf:
+        assert wf.getnchannels() == 1 and wf.getsampwidth() == 2 and wf.getnframes() > 0
+        assert wf.readframes(wf.getnframes()) == pcm.body
+    assert answer.status == 200
+    reply = answer.data()
+    assert isinstance(reply["correct"], bool) and reply["notes"]
+
+
+def test_answers_are_scored(client):
+    async def go():
+        replies = []
+        for _ in range(5):
+            await client.post("/learners/bo/chord/next")
+            replies.append((await client.post("/learners/bo/chord/answer", {"guess": "Major"})).data())
+        return replies, (await client.get("/learners/bo/stats")).data()
+
+    replies, stats = run(go())
+    assert all(reply["correct"] == (reply["answer"] == "Major") for reply in replies)
+    right = sum(reply["correct"] for reply in replies)
+    assert (stats["correct"], stats["wrong"]) == (right, len(replies) - right)
+
+
+def test_review_asks_a_missed_item(client):
+    async def go():
+        before = (await client.post("/learners/cy/review")).data()
+        for _ in range(100):  # Guess until one is wrong
+            await client.post("/learners/cy/scale/next")
+            if not (await client.post("/learners/cy/scale/answer", {"guess": "Major"})).data()["correct"]:
+                break
+        return before, (await client.post("/learners/cy/review")).data()
+
+    before, review = run(go())
+    assert before["due"] is None
+    assert review["due"] is True and review["exercise"] == "scale"
+
+
+@pytest.mark.parametrize("method, path, body, status", [
+    ("POST", "/learners/dee/nope/next", None, 404),
+    ("POST", "/learners/bad id!/note/next", None, 400),
+    ("POST", "/learners/dee/note/answer", {"guess": 0}, 409),
+    ("GET", "/learners/dee/note/audio", None, 409),
+    ("GET", "/learners/dee/note/next", None, 405),
+    ("GET", "/nowhere", None, 404),
+])
+def test_bad_requests(client, method, path, body, status):
+    request = client.get(path) if method == "GET" else client.post(path, body)
+    response = run(request)
+    assert response.status == status
+    assert "error" in response.data()
+
+
+@pytest.mark.parametrize("exercise, guess", [
+    ("note", 999), ("note", True), ("chord", "Sus4"), ("melody", [0]), ("melody", "1 2 3"),
+])
+def test_invalid_guesses(client, exercise, guess):
+    async def go():
+        await client.post(f"/learners/eve/{exercise}/next")
+        return await client.post(f"/learners/eve/{exercise}/answer", {"guess": guess})
+
+    response = run(go())
+    assert response.status == 400
+
+
+def test_malformed_answer_body(client):
+    async def go():
+        await client.post("/learners/fay/note/next")
+        return await client.service.handle("POST", "/learners/fay/note/answer", b"not json")
+
+    assert run(go()).status == 400
+
+
+def test_websocket_messages(client):
+    async def go():
+        question = await client.ws("gus", {"op": "next", "exercise": "interval"})
+        answer = await client.ws("gus", {"op": "answer", "exercise": "interval", "guess": 0})
+        bad = await client.ws("gus", {"op": "sing"})
+        return question, answer, bad
+
+    question, answer, bad = run(go())
+    assert len(question) == 2 and isinstance(question[1], bytes)
+    assert len(answer) == 1 and "correct" in answer[0]
+    assert "error" in bad[0]
+
+
+def test_dropped_learners_reload_from_the_database(tmp_path):
+    service = TrainerService(load_bank(str(tmp_path), warn=False), str(tmp_path / "progress.db"), max_learners=2)
+    client = InProcessClient(service)
+
+    async def go():
+        for name in ("ann", "ben", "cat"):
+            await client.post(f"/learners/{name}/note/next")
+            await client.post(f"/learners/{name}/note/answer", {"guess": 0})
+        kept = list(service.learners)
+        return kept, (await client.get("/learners/ann/stats")).data()
+
+    try:
+        learners, stats = run(go())
+    finally:
+        service.close()
+    assert learners == ["ben", "cat"]
+    assert stats["correct"] + stats["wrong"] == 1
+
+
+def test_concurrent_first_requests_share_one_learner(client):
+    async def go():
+        return await asyncio.gather(*(client.service.learner("dot") for _ in range(5)))
+
+    learners = run(go())
+    assert all(learner is learners[0] for learner in learners)
+
+
+class FakeWriter:
+    def __init__(self):
+        self.sent = b""
+
+    def write(self, data):
+        self.sent += data
+
+    async def drain(self):
+        pass
+
+
+@pytest.mark.parametrize("frames", [
+    [(0x81, b"x" * (MAX_BODY + 1))],  # One oversized frame
+    [(0x01, b"x" * 60000), (0x80, b"x" * 60000)],  # Fragments that add up to too much
+])
+def test_websocket_closes_oversized_messages_with_1009(client, frames):
+    async def go():
+        reader = asyncio.StreamReader()
+        for head, payload in frames:
+            n = len(payload)
+            length = struct.pack("!BQ", 127, n) if n >= 1 << 16 else struct.pack("!BH", 126, n)
+            reader.feed_data(bytes([head]) + length + payload)
+        writer = FakeWriter()
+        await serve_websocket(client.service, "hal", {}, reader, writer)
+        return writer.sent
+
+    assert run(go()).endswith(b"\x88\x02" + struct.pack("!H", 1009))
+
+
+def test_audio_cache_is_bounded_by_bytes(tmp_path):
+    cache = AudioCache(load_bank(str(tmp_path), warn=False), max_bytes=200 * 1024)
+    session = ExerciseSession()
+    for _ in range(20):
+        cache.pcm(session.next_question("melody"))
+    assert 0 < cache.bytes_used <= cache.max_bytes
+    assert cache.bytes_used == sum(len(data) for data in cache.entries.values())
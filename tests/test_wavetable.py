@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import wavetable
+from wavetable import INTERPOLATIONS, Oscillator, Wavetable, render_tone
+
+SAMPLE_RATE = wavetable.SAMPLE_RATE
+
+
+@pytest.mark.parametrize("interpolation, tolerance", [("nearest", 2e-3), ("linear", 1e-5), ("cubic", 1e-5)])
+@pytest.mark.parametrize("freq", [27.5, 440.0, 4186.01, 12345.6])
+def test_sine_table_matches_sin(freq, interpolation, tolerance):
+    samples, _ = wavetable.sine_table().render(freq, 4096, interpolation=interpolation)
+    t = np.arange(4096) / SAMPLE_RATE
+    error = np.abs(samples - np.sin(2 * np.pi * freq * t)).max()
+    assert error < tolerance
+
+
+def test_blocks_join_like_one_render():
+    osc = Oscillator(440.0)
+    blocks = np.concatenate([osc.next(n) for n in (1000, 1, 4096, 333)])
+    whole, _ = wavetable.sine_table().render(440.0, len(blocks))
+    np.testing.assert_array_equal(blocks, whole)
+
+
+def test_long_renders_do_not_drift():
+    table = wavetable.sine_table()
+    n = SAMPLE_RATE * 60
+    samples, end_phase = table.render(1000.0, n)
+    assert end_phase == table.increment(1000.0) * n % 2 ** wavetable.PHASE_BITS
+    # The last second is still in phase with the (fixed-point) frequency
+    actual = table.increment(1000.0) / 2 ** wavetable.PHASE_BITS * SAMPLE_RATE
+    k = np.arange(n - SAMPLE_RATE, n)
+    np.testing.assert_allclose(samples[-SAMPLE_RATE:], np.sin(2 * np.pi * actual * k / SAMPLE_RATE), atol=1e-5)
+
+
+def test_harmonic_table_is_peak_normalized():
+    table = Wavetable.harmonic([1.0, 0.5, 0.25])
+    assert np.abs(table.table).max() == pytest.approx(1.0)
+
+
+def test_render_tone_is_int16_at_amplitude():
+    tone = render_tone(440.0, 0.5, amplitude=0.5)
+    assert tone.dtype == np.int16 and len(tone) == SAMPLE_RATE // 2
+    assert abs(int(np.abs(tone).max()) - 16383) <= 2
+
+
+def test_rejects_bad_tables_and_interpolations():
+    with pytest.raises(ValueError):
+        Wavetable(np.zeros(1000))
+    with pytest.raises(ValueError):
+        wavetable.sine_table().render(440.0, 10, interpolation="sinc")
+    assert set(INTERPOLATIONS) == {"nearest", "linear", "cubic"}
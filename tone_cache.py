@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024  # Roughly 230 notes of 0.8 s at 44.1 kHz
+
+
+class ToneCache:
+    """LRU cache of rendered int16 tone buffers with a byte budget.
+
+    Entries are keyed by (freq, duration, sample_rate) plus an optional
+    variant, such as the timbre, for callers that render one pitch several ways.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(freq, duration, sample_rate, variant=None):
+        # Round so the same note computed two ways lands on the same entry
+        return (round(freq, 6), round(duration, 6), int(sample_rate), variant)
+
+    def get(self, freq, duration, sample_rate, render, variant=None):
+        """Return the cached buffer, calling render(freq, duration, sample_rate) on a miss"""
+        key = self.key(freq, duration, sample_rate, variant)
+        with self.lock:
+            buffer = self.entries.get(key)
+            if buffer is not None:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return buffer
+            self.misses += 1
+        buffer = render(freq, duration, sample_rate)
+        buffer.flags.writeable = False  # Shared between callers
+        with self.lock:
+            self._put(key, buffer)
+        return buffer
+
+    def _put(self, key, buffer):
+        if buffer.nbytes > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes_used -= old.nbytes
+        self.entries[key] = buffer
+        self.bytes_used += buffer.nbytes
+        while self.bytes_used > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes_used -= evicted.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes_used = 0
+
+    def stats(self):
+        """Hit/miss/eviction counters and current memory use"""
+        return {
+            "entries": len(self.entries),
+            "bytes_used": self.bytes_used,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,524 @@
+"""Headless ear-training service: one process, many learners.
+
+    python trainer_service.py --port 8765 --audio audio
+
+Every learner gets their own ExerciseSession (and SQLite state when --db is
+given, all learners sharing one connection and writer thread). Audio is rendered once per distinct question and shared by all
+learners who are asked it.
+
+HTTP (JSON replies unless noted):
+    GET  /exercises                          answer choices per exercise
+    POST /learners/<id>/<exercise>/next      ask a new interval, note, chord, scale or melody
+    POST /learners/<id>/review               ask the mistake most overdue for review
+    GET  /learners/<id>/<exercise>/audio     WAV of the current question (?format=pcm
+                                             for raw mono int16 little-endian)
+    POST /learners/<id>/<exercise>/answer    body {"guess": ...}; for a melody, a list
+                                             of 1-based scale degrees. The reply gives
+                                             the answer and the notes that were played
+    GET  /learners/<id>/stats
+
+WebSocket at /learners/<id>/ws takes JSON text messages
+{"op": "next", "exercise": ...}, {"op": "review"},
+{"op": "answer", "exercise": ..., "guess": ...} and {"op": "stats"}.
+A question reply is followed by one binary message holding its WAV.
+
+InProcessClient drives the same handlers without sockets, for tests.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import re
+import struct
+import threading
+import wave
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+from exercise_session import ExerciseSession, EXERCISES, NOTE_NAMES, answer_label
+from mixer import SAMPLE_RATE
+from question_audio import CHOICES, load_bank, render_pcm
+from session_store import SessionDatabase
+from startup import lazy_import
+
+np = lazy_import("numpy")
+
+AUDIO_CACHE_BYTES = 64 * 1024 * 1024  # Rendered question audio kept for reuse across learners
+MAX_BODY = 64 * 1024         # Largest HTTP body or WebSocket message accepted
+MAX_LEARNERS = 1024          # Learners kept in memory; the least recently seen is dropped first
+LEARNER_ID = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+REASONS = {200: "OK", 101: "Switching Protocols", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Response:
+    def __init__(self, status=200, body=b"", content_type="application/json"):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+
+    @classmethod
+    def json(cls, data, status=200):
+        return cls(status, json.dumps(data).encode())
+
+    def data(self):
+        """Decoded JSON body"""
+        return json.loads(self.body)
+
+
+def wav_bytes(pcm, sample_rate=SAMPLE_RATE):
+    out = io.BytesIO()
+    with wave.open(out, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+    return out.getvalue()
+
+
+class AudioCache:
+    """Rendered question audio as PCM bytes, least recently used evicted first once over max_bytes"""
+
+    def __init__(self, bank, max_bytes=AUDIO_CACHE_BYTES):
+        self.bank = bank
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def pcm(self, question):
+        key = (question.exercise, tuple(question.notes))
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return data
+            self.misses += 1
+        data = render_pcm(self.bank, question).astype("<i2").tobytes()
+        if len(data) > self.max_bytes:
+            return data
+        with self.lock:
+            old = self.entries.pop(key, None)
+            self.bytes_used += len(data) - (len(old) if old is not None else 0)
+            self.entries[key] = data
+            while self.bytes_used > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes_used -= len(evicted)
+        return data
+
+
+class Learner:
+    def __init__(self, session):
+        self.session = session
+        self.lock = asyncio.Lock()  # One request at a time per learner
+
+
+def parse_guess(exercise, guess):
+    """Turn an answer given by name (or index, for intervals and notes) into an item.
+
+    Melodies are answered with a list of 1-based scale degrees.
+    """
+    if exercise == "melody":
+        if isinstance(guess, list) and all(g in CHOICES["melody"] and not isinstance(g, bool) for g in guess):
+            return [g - 1 for g in guess]
+    elif exercise in ("interval", "note"):
+        choices = CHOICES[exercise]
+        if isinstance(guess, int) and not isinstance(guess, bool) and 0 <= guess < len(choices):
+            return guess
+        if guess in choices:
+            return choices.index(guess)
+    elif guess in CHOICES[exercise]:
+        return guess
+    raise ServiceError(400, f"not a valid {exercise}: {guess!r}")
+
+
+class TrainerService:
+    """Routes requests to per-learner exercise sessions.
+
+    At most max_learners sessions are kept. With a database, a dropped
+    learner's progress is committed and reloaded on their next request;
+    without one it is lost. Loading and closing stores touches SQLite, so
+    it runs in the executor, never on the event loop.
+    """
+
+    def __init__(self, bank, db_path=None, max_learners=MAX_LEARNERS):
+        self.bank = bank
+        self.database = SessionDatabase(db_path) if db_path else None
+        self.audio = AudioCache(bank)
+        self.max_learners = max_learners
+        self.learners = OrderedDict()
+        self.loading = {}  # learner id -> future of their ExerciseSession
+
+    def open_session(self, learner_id):
+        """Load a learner's session; blocks on SQLite, so runs in the executor"""
+        if self.database is None:
+            return ExerciseSession()
+        self.database.flush()  # A learner dropped a moment ago may still have writes queued
+        return ExerciseSession(self.database.store(learner_id))
+
+    async def learner(self, learner_id):
+        if not LEARNER_ID.match(learner_id):
+            raise ServiceError(400, "learner ids are 1-64 letters, digits, '.', '_' or '-'")
+        learner = self.learners.get(learner_id)
+        if learner is not None:
+            self.learners.move_to_end(learner_id)
+            return learner
+        loop = asyncio.get_running_loop()
+        loading = self.loading.get(learner_id)
+        if loading is None:
+            # Concurrent first requests from one learner share a single load
+            loading = self.loading[learner_id] = loop.run_in_executor(None, self.open_session, learner_id)
+        try:
+            session = await loading
+        finally:
+            self.loading.pop(learner_id, None)
+        learner = self.learners.get(learner_id)
+        if learner is None:
+            learner = self.learners[learner_id] = Learner(session)
+            while len(self.learners) > self.max_learners:
+                _, dropped = self.learners.popitem(last=False)
+                if dropped.session.store is not None:
+                    loop.run_in_executor(None, dropped.session.store.close)
+        return learner
+
+    def close(self):
+        for learner in self.learners.values():
+            if learner.session.store is not None:
+                learner.session.store.close()
+        self.learners.clear()
+        if self.database is not None:
+            self.database.close()
+
+    def describe(self, learner_id, question):
+        info = {
+            "exercise": question.exercise,
+            "choices": CHOICES[question.exercise],
+            "audio": f"/learners/{learner_id}/{question.exercise}/audio",
+        }
+        if question.exercise == "melody":
+            info.update(scale=question.item, tonic=NOTE_NAMES[question.root], length=len(question.degrees))
+        return info
+
+    async def render(self, question):
+        # numpy releases the GIL for most of the work; keep it off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, self.audio.pcm, question)
+
+    async def next_question(self, learner_id, exercise):
+        if exercise not in EXERCISES:
+            raise ServiceError(404, f"unknown exercise {exercise!r}")
+        learner = await self.learner(learner_id)
+        async with learner.lock:
+            question = learner.session.next_question(exercise)
+        return question, self.describe(learner_id, question)
+
+    async def review(self, learner_id):
+        learner = await self.learner(learner_id)
+        async with learner.lock:
+            question = learner.session.review()
+            wait = learner.session.reviews.seconds_until_next()
+        if question is None:
+            return None, {"due": None, "next_review_in": wait}
+        return question, dict(self.describe(learner_id, question), due=True)
+
+    async def answer(self, learner_id, exercise, guess):
+        if exercise not in EXERCISES:
+            raise ServiceError(404, f"unknown exercise {exercise!r}")
+        learner = await self.learner(learner_id)
+        item = parse_guess(exercise, guess)
+        async with learner.lock:
+            session = learner.session
+            question = session.current.get(exercise)
+            if question is None:
+                raise ServiceError(409, f"no {exercise} question has been asked yet")
+            correct, answer = session.check(exercise, item)
+            # The notes give the answer away, so they are only sent once it is given
+            return {"correct": correct, "answer": answer_label(exercise, answer), "notes": question.notes,
+                    "streak": session.streak, "daily_progress": session.daily_progress}
+
+    async def current_audio(self, learner_id, exercise):
+        if exercise not in EXERCISES:
+            raise ServiceError(404, f"unknown exercise {exercise!r}")
+        learner = await self.learner(learner_id)
+        async with learner.lock:
+            question = learner.session.current_question(exercise)
+        if question is None:
+            raise ServiceError(409, f"no {exercise} question has been asked yet")
+        return await self.render(question)
+
+    async def stats(self, learner_id):
+        learner = await self.learner(learner_id)
+        async with learner.lock:
+            return learner.session.summary()
+
+    async def handle(self, method, target, body=b""):
+        """Answer one HTTP request; returns a Response"""
+        try:
+            return await self._route(method, target, body)
+        except ServiceError as e:
+            return Response.json({"error": str(e)}, e.status)
+        except Exception as e:
+            print(f"Error handling {method} {target}: {e}")
+            return Response.json({"error": "internal error"}, 500)
+
+    async def _route(self, method, target, body):
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["exercises"]:
+            return Response.json(CHOICES)
+        if len(parts) < 3 or parts[0] != "learners":
+            raise ServiceError(404, f"no route for {url.path}")
+        learner_id, rest = parts[1], parts[2:]
+        route = (method, len(rest), rest[-1])
+        if route == ("POST", 2, "next"):
+            _, info = await self.next_question(learner_id, rest[0])
+            return Response.json(info)
+        if route == ("POST", 1, "review"):
+            _, info = await self.review(learner_id)
+            return Response.json(info)
+        if route == ("POST", 2, "answer"):
+            try:
+                guess = json.loads(body or b"{}")["guess"]
+            except (ValueError, KeyError, TypeError):
+                raise ServiceError(400, 'expected a JSON body like {"guess": ...}')
+            return Response.json(await self.answer(learner_id, rest[0], guess))
+        if route == ("GET", 2, "audio"):
+            pcm = await self.current_audio(learner_id, rest[0])
+            if parse_qs(url.query).get("format") == ["pcm"]:
+                return Response(200, pcm, f"audio/L16; rate={SAMPLE_RATE}; channels=1")
+            return Response(200, wav_bytes(pcm), "audio/wav")
+        if route == ("GET", 1, "stats"):
+            return Response.json(await self.stats(learner_id))
+        raise ServiceError(405 if rest[-1] in ("next", "review", "answer", "audio", "stats") else 404,
+                           f"no route for {method} {url.path}")
+
+    async def ws_message(self, learner_id, text):
+        """Handle one WebSocket text message; returns the messages to send back.
+
+        Text replies are str, audio is bytes.
+        """
+        try:
+            message = json.loads(text)
+            op = message["op"]
+            if op == "next":
+                question, info = await self.next_question(learner_id, message["exercise"])
+            elif op == "review":
+                question, info = await self.review(learner_id)
+            elif op == "answer":
+                return [json.dumps(await self.answer(learner_id, message["exercise"], message["guess"]))]
+            elif op == "stats":
+                return [json.dumps(await self.stats(learner_id))]
+            else:
+                raise ServiceError(400, f"unknown op {op!r}")
+        except ServiceError as e:
+            return [json.dumps({"error": str(e)})]
+        except (ValueError, KeyError, TypeError) as e:
+            return [json.dumps({"error": f"bad message: {e}"})]
+        if question is None:
+            return [json.dumps(info)]
+        return [json.dumps(info), wav_bytes(await self.render(question))]
+
+
+class InProcessClient:
+    """Calls the service's handlers directly, exactly as the server would"""
+
+    def __init__(self, service):
+        self.service = service
+
+    async def get(self, path):
+        return await self.service.handle("GET", path)
+
+    async def post(self, path, data=None):
+        body = json.dumps(data).encode() if data is not None else b""
+        return await self.service.handle("POST", path, body)
+
+    async def ws(self, learner_id, message):
+        return await self.service.ws_message(learner_id, json.dumps(message))
+
+
+# --- Wire protocol ---------------------------------------------------------
+
+async def read_request(reader):
+    """Read one HTTP/1.1 request; returns None when the client hangs up"""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise ServiceError(400, "malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise ServiceError(400, "bad Content-Length") from None
+    if length < 0:
+        raise ServiceError(400, "bad Content-Length")
+    if length > MAX_BODY:
+        raise ServiceError(413, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, target, headers, body
+
+
+def write_response(writer, response, keep_alive=True):
+    head = (f"HTTP/1.1 {response.status} {REASONS.get(response.status, '')}\r\n"
+            f"Content-Type: {response.content_type}\r\n"
+            f"Content-Length: {len(response.body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    writer.write(head.encode("latin-1") + response.body)
+
+
+def ws_frame(opcode, payload):
+    """One unmasked server-to-client frame"""
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return head + payload
+
+
+async def ws_read_frame(reader):
+    """Read one frame; returns (fin, opcode, payload)"""
+    b0, b1 = await reader.readexactly(2)
+    n = b1 & 0x7F
+    if n == 126:
+        n, = struct.unpack("!H", await reader.readexactly(2))
+    elif n == 127:
+        n, = struct.unpack("!Q", await reader.readexactly(8))
+    if n > MAX_BODY:
+        raise ServiceError(413, "message too large")
+    mask = await reader.readexactly(4) if b1 & 0x80 else None
+    payload = await reader.readexactly(n)
+    if mask:
+        payload = (np.frombuffer(payload, dtype=np.uint8)
+                   ^ np.resize(np.frombuffer(mask, dtype=np.uint8), n)).tobytes()
+    return bool(b0 & 0x80), b0 & 0x0F, payload
+
+
+async def ws_close_too_big(writer):
+    writer.write(ws_frame(0x8, struct.pack("!H", 1009)))  # 1009: message too big
+    await writer.drain()
+
+
+async def serve_websocket(service, learner_id, headers, reader, writer):
+    key = headers.get("sec-websocket-key", "")
+    accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+    writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+    message = b""
+    while True:
+        try:
+            fin, opcode, payload = await ws_read_frame(reader)
+        except ServiceError:  # A single frame over MAX_BODY
+            await ws_close_too_big(writer)
+            return
+        if opcode == 0x8:  # close
+            writer.write(ws_frame(0x8, payload[:2]))
+            await writer.drain()
+            return
+        if opcode == 0x9:  # ping
+            writer.write(ws_frame(0xA, payload))
+            continue
+        if opcode in (0x1, 0x0):
+            message += payload
+            if len(message) > MAX_BODY:
+                await ws_close_too_big(writer)
+                return
+        if not fin or opcode not in (0x1, 0x0):
+            continue
+        replies = await service.ws_message(learner_id, message.decode("utf-8", "replace"))
+        message = b""
+        for reply in replies:
+            if isinstance(reply, bytes):
+                writer.write(ws_frame(0x2, reply))
+            else:
+                writer.write(ws_frame(0x1, reply.encode()))
+        await writer.drain()
+
+
+async def serve_connection(service, reader, writer):
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except ServiceError as e:
+                write_response(writer, Response.json({"error": str(e)}, e.status), keep_alive=False)
+                break
+            if request is None:
+                break
+            method, target, headers, body = request
+            parts = [p for p in urlsplit(target).path.split("/") if p]
+            if (headers.get("upgrade", "").lower() == "websocket" and len(parts) == 3
+                    and parts[0] == "learners" and parts[2] == "ws"):
+                if not LEARNER_ID.match(parts[1]):
+                    write_response(writer, Response.json({"error": "bad learner id"}, 400), keep_alive=False)
+                    break
+                await serve_websocket(service, parts[1], headers, reader, writer)
+                break
+            keep_alive = headers.get("connection", "").lower() != "close"
+            write_response(writer, await service.handle(method, target, body), keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ServiceError):
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def serve(service, host="127.0.0.1", port=8765):
+    """Start listening; returns the asyncio server"""
+    return await asyncio.start_server(lambda r, w: serve_connection(service, r, w), host, port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve ear-training exercises to many learners")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--audio", default="audio", help="folder with note WAVs or notes.bank")
+    parser.add_argument("--db", help="SQLite file for learner progress (kept in memory if omitted)")
+    args = parser.parse_args(argv)
+
+    service = TrainerService(load_bank(args.audio), args.db)
+
+    async def run():
+        server = await serve(service, args.host, args.port)
+        print(f"🎧 Serving on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
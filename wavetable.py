@@ -0,0 +1,177 @@
+import time
+from startup import lazy_import
+
+np = lazy_import("numpy")
+
+SAMPLE_RATE = 44100
+TABLE_SIZE = 2048
+INTERPOLATIONS = ("nearest", "linear", "cubic")
+PHASE_BITS = 32  # Phase is a uint32 that wraps once per cycle
+
+
+class Wavetable:
+    """A single-cycle waveform read back at any pitch with a phase accumulator.
+
+    Phase is a 32-bit fixed-point number: the top bits index the table and
+    the rest are the fractional position, so one full cycle is exactly one
+    uint32 wrap-around and no modulo is needed. The table size must be a
+    power of two. It is stored with three guard samples (one before, two
+    after) so interpolation can read neighbours without wrapping.
+    """
+
+    def __init__(self, cycle=None, size=TABLE_SIZE):
+        if cycle is None:
+            cycle = np.sin(2 * np.pi * np.arange(size) / size)
+        cycle = np.asarray(cycle, dtype=np.float32)
+        self.size = len(cycle)
+        if self.size & (self.size - 1):
+            raise ValueError(f"Wavetable size must be a power of two, got {self.size}")
+        self.frac_bits = PHASE_BITS - (self.size.bit_length() - 1)
+        self.table = np.concatenate((cycle[-1:], cycle, cycle[:2]))
+
+    @classmethod
+    def harmonic(cls, amplitudes, size=TABLE_SIZE):
+        """Build a table from harmonic amplitudes (1st, 2nd, ...), peak-normalized"""
+        phase = 2 * np.pi * np.arange(size) / size
+        cycle = sum(a * np.sin(k * phase) for k, a in enumerate(amplitudes, start=1))
+        return cls(cycle / np.abs(cycle).max(), size)
+
+    def increment(self, freq, sample_rate=SAMPLE_RATE):
+        """Fixed-point phase step per sample for freq"""
+        return int(round(freq / sample_rate * 2 ** PHASE_BITS)) % 2 ** PHASE_BITS
+
+    def phases(self, freq, n_samples, sample_rate=SAMPLE_RATE, phase=0):
+        """Fixed-point phases for n_samples, plus the phase to continue from.
+
+        Phases are computed as phase + k * step with uint32 wrap-around rather
+        than a running sum, so long renders do not accumulate drift.
+        """
+        step = self.increment(freq, sample_rate)
+        acc = np.arange(n_samples, dtype=np.uint32)
+        acc *= np.uint32(step)
+        acc += np.uint32(phase)
+        return acc, (phase + step * n_samples) % 2 ** PHASE_BITS
+
+    def read(self, acc, interpolation="linear"):
+        """Look up fixed-point phases with vectorized interpolation"""
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Unknown interpolation: {interpolation}")
+        shift = np.uint32(self.frac_bits)
+        if interpolation == "nearest":
+            rounded = acc + np.uint32(1 << (self.frac_bits - 1))
+            return np.take(self.table, (rounded >> shift).astype(np.intp) + 1)
+        # Shift by one for the leading guard sample
+        index = (acc >> shift).astype(np.intp) + 1
+        frac = (acc & np.uint32((1 << self.frac_bits) - 1)).astype(np.float32)
+        frac *= np.float32(1.0 / (1 << self.frac_bits))
+        y1 = np.take(self.table, index)
+        y2 = np.take(self.table, index + 1)
+        if interpolation == "linear":
+            y2 -= y1
+            y2 *= frac
+            y2 += y1
+            return y2
+        y0 = np.take(self.table, index - 1)
+        y3 = np.take(self.table, index + 2)
+        # Catmull-Rom cubic through y0..y3
+        return y1 + 0.5 * frac * (y2 - y0 + frac * (2 * y0 - 5 * y1 + 4 * y2 - y3
+                                                  + frac * (3 * (y1 - y2) + y3 - y0)))
+
+    def render(self, freq, n_samples, sample_rate=SAMPLE_RATE, phase=0, interpolation="linear"):
+        """Render n_samples of the waveform at freq; returns (samples, end_phase)"""
+        acc, end_phase = self.phases(freq, n_samples, sample_rate, phase)
+        return self.read(acc, interpolation), end_phase
+
+
+_sine = None
+
+
+def sine_table():
+    """The shared sine table, built on first use so importing stays cheap"""
+    global _sine
+    if _sine is None:
+        _sine = Wavetable()
+    return _sine
+
+
+class Oscillator:
+    """Keeps phase between calls so consecutive blocks join without clicks"""
+
+    def __init__(self, freq, table=None, sample_rate=SAMPLE_RATE, interpolation="linear"):
+        self.freq = freq
+        self.table = table or sine_table()
+        self.sample_rate = sample_rate
+        self.interpolation = interpolation
+        self.phase = 0
+
+    def next(self, n_samples):
+        block, self.phase = self.table.render(
+            self.freq, n_samples, self.sample_rate, self.phase, self.interpolation)
+        return block
+
+
+def render_tone(freq, duration, sample_rate=SAMPLE_RATE, amplitude=0.5, table=None, interpolation="linear"):
+    """Wavetable replacement for generate_tone/generate_sine_wave, returning int16"""
+    table = table or sine_table()
+    samples, _ = table.render(freq, int(sample_rate * duration), sample_rate, 0, interpolation)
+    return (samples * (amplitude * 32767)).astype(np.int16)
+
+
+def benchmark(repeat=20):
+    """Compare wavetable rendering with the direct-sin renderers"""
+    from generate_notes import generate_sine_wave
+
+    def direct(freq, duration, fs):
+        return generate_sine_wave(freq, duration, fs)
+
+    cases = [(440.0, 0.8), (440.0, 10.0), (27.5, 10.0), (4186.0, 10.0)]
+    results = []
+    for freq, duration in cases:
+        row = {"freq": freq, "duration": duration}
+        reference = direct(freq, duration, SAMPLE_RATE).astype(np.int32)
+        for name, fn in [("direct_sin", lambda: direct(freq, duration, SAMPLE_RATE))] + [
+            (interp, lambda interp=interp: render_tone(freq, duration, interpolation=interp))
+            for interp in INTERPOLATIONS
+        ]:
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                out = fn()
+                best = min(best, time.perf_counter() - start)
+            row[name] = best
+            row[name + "_max_err"] = int(np.abs(out.astype(np.int32) - reference).max())
+        results.append(row)
+
+    # Harmonic-rich tone: direct additive sin per harmonic vs one table read
+    amplitudes = [1 / k for k in range(1, 9)]
+    table = Wavetable.harmonic(amplitudes)
+    freq, duration = 220.0, 10.0
+
+    def additive():
+        t = np.linspace(0, duration, int(SAMPLE_RATE * duration), False)
+        tone = sum(a * np.sin(2 * np.pi * freq * k * t) for k, a in enumerate(amplitudes, start=1))
+        return np.int16(0.5 * tone / np.abs(tone).max() * 32767)
+
+    row = {"freq": freq, "duration": duration, "harmonics": len(amplitudes)}
+    reference = additive().astype(np.int32)
+    for name, fn in [("direct_sin", additive)] + [
+        (interp, lambda interp=interp: render_tone(freq, duration, table=table, interpolation=interp))
+        for interp in INTERPOLATIONS
+    ]:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            out = fn()
+            best = min(best, time.perf_counter() - start)
+        row[name] = best
+        row[name + "_max_err"] = int(np.abs(out.astype(np.int32) - reference).max())
+    results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    for row in benchmark():
+        label = f" x{row['harmonics']}" if "harmonics" in row else "   "
+        print(f"{row['freq']:>7.1f} Hz{label} {row['duration']:>5.1f} s  "
+              + "  ".join(f"{name}: {row[name] * 1000:.2f} ms (err {row[name + '_max_err']})"
+                          for name in ("direct_sin",) + INTERPOLATIONS))